@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, request, redirect, url_for
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify
 from firebase_utils import get_shows, get_questions_for_show, set_active_question, init_firebase
-import threading
+from routes.quiz_routes import publish_active_question
+from services.executor import run_with_timeout
+from services.swr_cache import StaleWhileRevalidateCache, resolve_all
+from services.data_loader import invalidate_quiz_cache
+from services import question_index, shared_state, timeline
+from services.logs import log_sampled
+from services.show_ids import is_valid_show_id
 import time
-import os
-import json
 
 admin_bp = Blueprint("admin", __name__, template_folder="admin_panel/templates")
 
@@ -24,154 +28,58 @@ FALLBACK_QUESTIONS = {
     ]
 }
 
-# Fișier local pentru a stoca întrebarea activă când Firebase eșuează
-ACTIVE_QUESTION_FILE = "active_questions.json"
-
-# Variabilă în memorie pentru întrebările active
-_active_questions_memory = {}
-
-# Rezultate cache pentru a evita apeluri Firebase repetate
-_shows_cache = None
-_questions_cache = {}
-_last_cache_update = 0
+# Show-urile și întrebările din Firestore, fiecare cheie cu expirarea ei;
+# datele expirate se servesc imediat și se reîmprospătează în fundal
 CACHE_TIMEOUT = 300  # 5 minute
+LOAD_TIMEOUT = 2     # cât așteaptă panoul prima încărcare a unei chei
 
-# Inițializează fișierul active_questions.json la pornire
-def initialize_active_questions_file():
-    """Creează fișierul active_questions.json dacă nu există"""
-    if not os.path.exists(ACTIVE_QUESTION_FILE):
-        try:
-            with open(ACTIVE_QUESTION_FILE, 'w') as f:
-                json.dump(_active_questions_memory, f)
-            print(f"✅ Fișierul {ACTIVE_QUESTION_FILE} creat cu succes")
-        except Exception as e:
-            print(f"❌ Eroare la crearea fișierului {ACTIVE_QUESTION_FILE}: {e}")
+def fetch_shows(_key=None):
+    if not init_firebase():
+        raise RuntimeError("Nu s-a putut inițializa Firebase")
+    shows = get_shows()
+    if not shows:
+        raise LookupError("Nu s-au găsit show-uri în Firebase")
+    return shows
 
-# Inițializează fișierul la import
-initialize_active_questions_file()
+def fetch_questions(show_id):
+    questions = get_questions_for_show(show_id)
+    if not questions:
+        raise LookupError(f"Nu s-au găsit întrebări pentru {show_id} în Firebase")
+    return questions
 
-def get_shows_with_timeout(timeout=2):
-    """Obține lista de show-uri cu timeout strict"""
-    global _shows_cache, _last_cache_update
-    
-    # Folosește cache dacă este disponibil și încă valid
-    current_time = time.time()
-    if _shows_cache is not None and (current_time - _last_cache_update) < CACHE_TIMEOUT:
-        print("💾 Folosind show-uri din cache")
-        return _shows_cache, None, False
-    
-    result = []
-    firebase_error = None
-    firebase_timeout = False
-    
-    def fetch_data():
-        nonlocal result
-        try:
-            db = init_firebase()
-            if db:
-                result = get_shows()
-            else:
-                firebase_error = "Nu s-a putut inițializa Firebase"
-        except Exception as e:
-            firebase_error = str(e)
-    
-    # Pornește operația într-un thread separat
-    thread = threading.Thread(target=fetch_data)
-    thread.daemon = True
-    thread.start()
-    
-    # Așteaptă thread-ul să termine sau timeout
-    thread.join(timeout)
-    
-    if thread.is_alive():
-        # Timeout - thread-ul încă rulează după timeout
-        print(f"⚠️ Timeout la obținerea show-urilor după {timeout} secunde")
-        firebase_timeout = True
-        return [], "Timeout la obținerea datelor din Firebase", True
-    
-    if not result and not firebase_error:
-        firebase_error = "Nu s-au găsit show-uri în Firebase"
-    
-    if result:
-        # Actualizează cache-ul
-        _shows_cache = result
-        _last_cache_update = current_time
-        
-    return result, firebase_error, firebase_timeout
+admin_shows = StaleWhileRevalidateCache("admin_shows", fetch_shows, CACHE_TIMEOUT)
+admin_questions = StaleWhileRevalidateCache("admin_questions", fetch_questions, CACHE_TIMEOUT)
 
-def get_questions_with_timeout(show_id, timeout=2):
-    """Obține întrebările pentru un show cu timeout strict"""
-    global _questions_cache, _last_cache_update
-    
-    # Folosește cache dacă este disponibil și încă valid
-    current_time = time.time()
-    if show_id in _questions_cache and (current_time - _last_cache_update) < CACHE_TIMEOUT:
-        print(f"💾 Folosind întrebări din cache pentru {show_id}")
-        return _questions_cache[show_id], None, False
-    
-    result = []
-    firebase_error = None
-    firebase_timeout = False
-    
-    def fetch_data():
-        nonlocal result
-        try:
-            result = get_questions_for_show(show_id)
-        except Exception as e:
-            firebase_error = str(e)
-    
-    # Pornește operația într-un thread separat
-    thread = threading.Thread(target=fetch_data)
-    thread.daemon = True
-    thread.start()
-    
-    # Așteaptă thread-ul să termine sau timeout
-    thread.join(timeout)
-    
-    if thread.is_alive():
-        # Timeout - thread-ul încă rulează după timeout
-        print(f"⚠️ Timeout la obținerea întrebărilor după {timeout} secunde")
-        firebase_timeout = True
-        return [], "Timeout la obținerea întrebărilor din Firebase", True
-    
-    if result:
-        # Actualizează cache-ul
-        _questions_cache[show_id] = result
-        _last_cache_update = current_time
-        
-    return result, firebase_error, firebase_timeout
+def get_shows_with_timeout(timeout=LOAD_TIMEOUT):
+    """Obține lista de show-uri (din cache, sau așteptând prima încărcare cel mult timeout)"""
+    lookup = admin_shows.get("shows", timeout)
+    return lookup.value or [], lookup.error, lookup.timed_out
+
+def get_questions_with_timeout(show_id, timeout=LOAD_TIMEOUT):
+    """Obține întrebările pentru un show (din cache, sau așteptând prima încărcare cel mult timeout)"""
+    lookup = admin_questions.get(show_id, timeout)
+    return lookup.value or [], lookup.error, lookup.timed_out
 
 def set_active_question_safe(show_id, question_id, timeout=3):
     """Versiune mai sigură a funcției set_active_question cu timeout și fallback local"""
-    activation_success = [False]  # Folosim o listă pentru a putea modifica din thread
-    activation_error = [None]
-    
-    def activate_question():
-        try:
-            # Încearcă să activeze întrebarea în Firebase
-            result = set_active_question(show_id, question_id)
-            activation_success[0] = result
-        except Exception as e:
-            activation_error[0] = str(e)
-            print(f"🔥 Eroare la set_active_question: {e}")
-    
-    # Pornește un thread pentru operația de activare
-    thread = threading.Thread(target=activate_question)
-    thread.daemon = True
-    thread.start()
+    activation_success = False
+    activation_error = None
     
-    # Așteaptă maxim 'timeout' secunde
-    thread.join(timeout)
-    
-    if thread.is_alive():
-        # Thread-ul încă rulează, scriem în fișierul local și memoria locală
+    try:
+        # Încearcă să activeze întrebarea în Firebase, în pool-ul partajat
+        activation_success = run_with_timeout("firestore", set_active_question, show_id, question_id, timeout=timeout)
+    except TimeoutError:
+        # Scrierea încă rulează, salvăm în starea locală partajată
         save_active_question_local(show_id, question_id)
         return False, f"Timeout la activarea întrebării după {timeout} secunde. Salvată local."
+    except Exception as e:
+        activation_error = str(e)
+        print(f"🔥 Eroare la set_active_question: {e}")
     
-    if not activation_success[0] or activation_error[0]:
+    if not activation_success or activation_error:
         # Firebase a eșuat, salvăm întrebarea local
         save_active_question_local(show_id, question_id)
-        error_msg = activation_error[0] or "Eroare necunoscută"
+        error_msg = activation_error or "Eroare necunoscută"
         return False, f"Eroare Firebase: {error_msg}. Întrebare salvată local."
     
     # Firebase a reușit, sincronizăm și stocarea locală
@@ -179,29 +87,12 @@ def set_active_question_safe(show_id, question_id, timeout=3):
     return True, None
 
 def save_active_question_local(show_id, question_id):
-    """Salvează întrebarea activă în memoria locală și fișier"""
-    global _active_questions_memory
-    
-    # Actualizează memoria
-    _active_questions_memory[show_id] = question_id
-    
-    # Salvează în fișier pentru persistență între request-uri (dar nu între reporniri)
+    """Salvează întrebarea activă în starea partajată de toți workerii"""
+    # Anunță imediat abonații SSE din acest proces
+    publish_active_question(show_id, question_id)
+
     try:
-        # Inițializează fișierul dacă nu există
-        initialize_active_questions_file()
-        
-        # Încearcă să citească conținutul existent
-        try:
-            with open(ACTIVE_QUESTION_FILE, 'r') as f:
-                active_questions = json.load(f)
-        except Exception:
-            active_questions = {}
-        
-        # Actualizează și salvează
-        active_questions[show_id] = question_id
-        with open(ACTIVE_QUESTION_FILE, 'w') as f:
-            json.dump(active_questions, f)
-            
+        shared_state.set_active(show_id, question_id)
         print(f"✅ Întrebare salvată local: {question_id} pentru show: {show_id}")
         return True
     except Exception as e:
@@ -209,26 +100,8 @@ def save_active_question_local(show_id, question_id):
         return False
 
 def get_active_question_local(show_id):
-    """Obține întrebarea activă din memoria locală sau fișier"""
-    global _active_questions_memory
-    
-    # Încearcă întâi din memorie
-    if show_id in _active_questions_memory:
-        return _active_questions_memory[show_id]
-    
-    # Apoi încearcă din fișier dacă există
-    if os.path.exists(ACTIVE_QUESTION_FILE):
-        try:
-            with open(ACTIVE_QUESTION_FILE, 'r') as f:
-                active_questions = json.load(f)
-                # Actualizează memoria cu valorile din fișier
-                _active_questions_memory.update(active_questions)
-                return active_questions.get(show_id)
-        except Exception as e:
-            print(f"❌ Eroare la citirea din fișierul local: {e}")
-    
-    # Returnează q1 pentru a forța afișarea întrebării 1
-    return "q1"
+    """Obține întrebarea activă din starea partajată (q1 dacă nu avem nimic salvat)"""
+    return shared_state.get_active(show_id, "q1")
 
 @admin_bp.route("/admin", methods=["GET", "POST"])
 def admin_panel():
@@ -236,10 +109,6 @@ def admin_panel():
     firebase_error = None
     firebase_timeout = False
     
-    db = init_firebase()
-    if not db:
-        firebase_error = "Nu s-a putut stabili conexiunea cu Firebase"
-    
     selected_show = request.form.get("show_id") if request.method == "POST" else request.args.get("show_id")
     question_id = request.form.get("question_id")
     print(f"🎯 Admin a trimis: show_id={selected_show}, question_id={question_id}")
@@ -256,47 +125,44 @@ def admin_panel():
             
         return redirect(url_for("admin.admin_panel", show_id=selected_show))
     
-    # Obține show-uri din Firebase cu timeout
-    shows, shows_error, shows_timeout = get_shows_with_timeout()
-    if shows_error:
-        firebase_error = shows_error
-    if shows_timeout:
-        firebase_timeout = True
-    
+    # Show-urile și întrebările se cer în paralel; din cache răspunsul e imediat,
+    # iar prima încărcare așteaptă cel mult LOAD_TIMEOUT pentru amândouă
+    shows_lookup, questions_lookup = admin_shows.lookup("shows"), None
+    if selected_show:
+        questions_lookup = admin_questions.lookup(selected_show)
+    resolve_all([shows_lookup, questions_lookup], LOAD_TIMEOUT)
+
+    for lookup in (shows_lookup, questions_lookup):
+        if lookup is None:
+            continue
+        if lookup.error and lookup.value is None:
+            firebase_error = lookup.error
+        if lookup.timed_out:
+            firebase_timeout = True
+
     # Dacă nu am obținut show-uri, folosim datele statice
+    shows = shows_lookup.value
     if not shows:
         print("⚠️ Folosind lista de show-uri statice")
         shows = FALLBACK_SHOWS
-    
-    # Obține întrebări pentru show-ul selectat
+
+    # Dacă nu am obținut întrebări, folosim datele statice
     questions = []
     if selected_show:
-        if firebase_timeout:
-            # Dacă am avut timeout la show-uri, folosim direct datele statice
-            questions = FALLBACK_QUESTIONS.get(selected_show, [])
+        questions = questions_lookup.value
+        if not questions:
             print(f"⚠️ Folosind întrebări statice pentru {selected_show}")
-        else:
-            # Altfel încercăm să obținem întrebările din Firebase
-            questions, questions_error, questions_timeout = get_questions_with_timeout(selected_show)
-            
-            if questions_error:
-                firebase_error = questions_error
-            if questions_timeout:
-                firebase_timeout = True
-                
-            # Dacă nu am obținut întrebări, folosim datele statice
-            if not questions:
-                print(f"⚠️ Folosind întrebări statice pentru {selected_show}")
-                questions = FALLBACK_QUESTIONS.get(selected_show, [])
-    
+            questions = FALLBACK_QUESTIONS.get(selected_show, [])
+
     # Obține întrebarea activă pentru show-ul selectat (din memorie sau local)
     active_question_id = None
     if selected_show:
         active_question_id = get_active_question_local(selected_show)
     
-    # Calculează timpul total de procesare
+    # Calculează timpul total de procesare (histograma per rută e în /metrics)
     processing_time = time.time() - start_time
-    print(f"⏱️ Timp total procesare admin: {processing_time:.2f} secunde")
+    log_sampled("admin_panel", show_id=selected_show, elapsed_ms=round(processing_time * 1000, 1),
+                firebase_error=firebase_error)
     
     return render_template(
         "admin_simple.html",
@@ -308,3 +174,60 @@ def admin_panel():
         active_question_id=active_question_id,
         processing_time=f"{processing_time:.2f}"
     )
+
+@admin_bp.route("/admin/cache/invalidate", methods=["POST"])
+def invalidate_cache():
+    """Golește cache-urile de quiz ca următoarea cerere să citească datele proaspete"""
+    invalidate_quiz_cache()
+    question_index.invalidate()
+    admin_shows.invalidate()
+    admin_questions.invalidate()
+    print("🧹 Cache-urile de quiz au fost invalidate")
+
+    if request.form.get("show_id"):
+        return redirect(url_for("admin.admin_panel", show_id=request.form.get("show_id")))
+    return jsonify({"status": "ok"})
+
+@admin_bp.route("/admin/timeline/<show_id>", methods=["GET", "PUT", "DELETE"])
+def timeline_events(show_id):
+    """Timeline-ul show-ului: PUT încarcă evenimentele {"events": [{"timecode", "question_id" | "scene"}]}"""
+    if not is_valid_show_id(show_id):
+        return jsonify({"error": "Show inexistent"}), 404
+    timeline.ensure_scheduler()
+    if request.method == "PUT":
+        try:
+            return jsonify(timeline.upload(show_id, (request.get_json(silent=True) or {}).get("events") or []))
+        except (ValueError, TypeError, AttributeError) as e:
+            return jsonify({"error": str(e)}), 400
+    if request.method == "DELETE":
+        timeline.remove(show_id)
+        return jsonify({"status": "ok"})
+
+    status = timeline.status(show_id)
+    if status is None:
+        return jsonify({"error": f"Show-ul {show_id} nu are timeline"}), 404
+    return jsonify(status)
+
+@admin_bp.route("/admin/timeline/<show_id>/<action>", methods=["POST"])
+def timeline_control(show_id, action):
+    """start (start_at, offset), pause, resume și shift (seconds) pentru emisiunea în curs"""
+    if not is_valid_show_id(show_id):
+        return jsonify({"error": "Show inexistent"}), 404
+    timeline.ensure_scheduler()
+    body = request.get_json(silent=True) or {}
+    actions = {
+        "start": lambda: timeline.start(show_id, body.get("start_at"), body.get("offset", 0)),
+        "pause": lambda: timeline.pause(show_id),
+        "resume": lambda: timeline.resume(show_id),
+        "shift": lambda: timeline.shift(show_id, body.get("seconds", 0)),
+    }
+    if action not in actions:
+        return jsonify({"error": f"Acțiune necunoscută: {action}"}), 404
+    try:
+        status = actions[action]()
+    except KeyError:
+        return jsonify({"error": f"Show-ul {show_id} nu are timeline"}), 404
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    print(f"🎬 Timeline {show_id}: {action}")
+    return jsonify(status)
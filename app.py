@@ -1,33 +1,56 @@
-from flask import Flask
-from flask_cors import CORS
-from routes.ai_routes import ai_bp
-from routes.quiz_routes import quiz_bp
-from routes.scene_routes import scene_bp
-from admin_simplified import admin_bp   
-from firebase_diagnostic import firebase_diagnostic_bp   
+import time
+from services import startup
+
+with startup.stage("import_flask"):
+    from flask import Flask, Response, jsonify
+    from flask_cors import CORS
+
+with startup.stage("import_blueprints"):
+    from routes.ai_routes import ai_bp
+    from routes.quiz_routes import quiz_bp
+    from routes.scene_routes import scene_bp
+    from admin_simplified import admin_bp
+    from firebase_diagnostic import firebase_diagnostic_bp
+    from routes.health_routes import health_bp
+    from services import metrics, timeline
 
 def create_app():
-    # Codul existent...
-    
-    # Adaugă noul blueprint
-    app.register_blueprint(firebase_diagnostic_bp)
-    
-    # Restul codului existent...
-def create_app():
-    app = Flask(__name__)
-    CORS(app)
+    with startup.stage("create_app"):
+        app = Flask(__name__)
+        CORS(app)
+
+        # Înregistrăm toate blueprints
+        app.register_blueprint(ai_bp, url_prefix='/api/ai')
+        app.register_blueprint(quiz_bp, url_prefix='/api/quiz')
+        app.register_blueprint(scene_bp, url_prefix='/api/scene')
+        app.register_blueprint(admin_bp)
+        app.register_blueprint(firebase_diagnostic_bp)
+        app.register_blueprint(health_bp)
+        metrics.init_app(app)
 
-    # Înregistrăm toate blueprints
-    app.register_blueprint(ai_bp, url_prefix='/api/ai')
-    app.register_blueprint(quiz_bp, url_prefix='/api/quiz')
-    app.register_blueprint(scene_bp, url_prefix='/api/scene')
-    app.register_blueprint(admin_bp)
-    app.register_blueprint(firebase_diagnostic_bp)
+    first_request_seen = [False]
+
+    @app.before_request
+    def record_first_request():
+        if not first_request_seen[0]:
+            first_request_seen[0] = True
+            startup.record_stage("until_first_request", time.time() - startup.PROCESS_START)
+            # Fără gunicorn (flask run) planificatorul pornește la prima cerere
+            timeline.ensure_scheduler()
 
     @app.route('/')
     def index():
         return {'status': 'SyncPlay backend running 🎬'}
 
+    @app.route('/diagnostic/startup')
+    def startup_diagnostic():
+        return jsonify(startup.startup_report())
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        body, content_type = metrics.render()
+        return Response(body, content_type=content_type)
+
     return app
 
 if __name__ == '__main__':
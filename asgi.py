@@ -0,0 +1,26 @@
+from services import startup
+
+# Modul de servire asyncio (SYNCPLAY_SERVER_MODE=asgi în gunicorn.conf.py).
+# Endpoint-urile AI, quiz și scenă care așteaptă după rețea rulează nativ pe
+# bucla asyncio (routes/async_routes.py); restul aplicației Flask (admin,
+# diagnostic, răspunsuri, clasament) este servită neschimbată prin WsgiToAsgi.
+
+with startup.stage("import_asgi"):
+    from asgiref.wsgi import WsgiToAsgi
+    from starlette.applications import Starlette
+    from starlette.middleware import Middleware
+    from starlette.middleware.cors import CORSMiddleware
+    from starlette.routing import Mount
+    from app import create_app
+    from routes import async_routes
+
+def create_asgi_app():
+    flask_app = create_app()
+    with startup.stage("create_asgi_app"):
+        return Starlette(
+            routes=[*async_routes.routes, Mount("/", app=WsgiToAsgi(flask_app))],
+            # Aceleași reguli CORS ca flask_cors cu setările implicite
+            middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])]
+        )
+
+app = create_asgi_app()
@@ -0,0 +1,336 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+# Înlocuitori în proces pentru Firestore și genai.GenerativeModel, folosiți
+# de benchmark. Fiecare operație trece printr-un FaultInjector, așa că
+# latența și rata de eșec se pot schimba în timpul unui scenariu (brownout,
+# încetinirea Gemini) fără să repornim aplicația.
+
+
+class InjectedFailure(Exception):
+    """Eroarea ridicată de fake-uri când FaultInjector decide un eșec"""
+
+
+class FailedPrecondition(Exception):
+    """Ca la Firestore: documentul s-a schimbat (sau există deja) față de precondiția scrierii"""
+
+
+class FakeWriteOption:
+    def __init__(self, last_update_time=None):
+        self.last_update_time = last_update_time
+
+
+class FaultInjector:
+    """Latență (cu jitter) și rată de eșec, modificabile din alt thread"""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    def configure(self, latency=None, jitter=None, failure_rate=None):
+        if latency is not None:
+            self.latency = latency
+        if jitter is not None:
+            self.jitter = jitter
+        if failure_rate is not None:
+            self.failure_rate = failure_rate
+
+    def _plan(self, operation):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.failure_rate
+        return delay, fail
+
+    def apply(self, operation):
+        delay, fail = self._plan(operation)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise InjectedFailure(f"eșec injectat în {operation}")
+
+    async def apply_async(self, operation):
+        delay, fail = self._plan(operation)
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            raise InjectedFailure(f"eșec injectat în {operation}")
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, doc_id, data, reference=None, update_time=None):
+        self.id = doc_id
+        self.reference = reference
+        self.update_time = update_time
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeWatch:
+    def __init__(self, store, path, callback):
+        self.store = store
+        self.path = path
+        self.callback = callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+        self.store._remove_watch(self)
+
+
+class FakeDocumentReference:
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+        self.id = path[-1]
+
+    def collection(self, name):
+        return FakeCollectionReference(self.store, self.path + (name,))
+
+    def get(self):
+        self.store.faults.apply("get")
+        data, update_time = self.store._read_versioned(self.path)
+        return FakeDocumentSnapshot(self.id, data, self, update_time)
+
+    def set(self, data, merge=False):
+        self.store.faults.apply("set")
+        self.store._write(self.path, data, merge)
+
+    def on_snapshot(self, callback):
+        self.store.faults.apply("listen")
+        return self.store._add_watch(self.path, callback)
+
+
+class FakeCollectionReference:
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+
+    def document(self, doc_id):
+        return FakeDocumentReference(self.store, self.path + (doc_id,))
+
+    def stream(self):
+        self.store.faults.apply("stream")
+        return iter(self.store._children(self.path))
+
+    def list_documents(self):
+        # Ca la Firestore, și documentele care au doar sub-colecții
+        depth = len(self.path) + 1
+        with self.store._lock:
+            paths = {p[:depth] for p in self.store._docs if len(p) >= depth and p[:len(self.path)] == self.path}
+        return [FakeDocumentReference(self.store, p) for p in sorted(paths)]
+
+
+class FakeWriteBatch:
+    def __init__(self, store):
+        self.store = store
+        self._writes = []
+
+    def set(self, ref, data, merge=False):
+        self._writes.append((ref.path, data, merge, None))
+
+    def create(self, ref, data):
+        self._writes.append((ref.path, data, False, "missing"))
+
+    def update(self, ref, data, option=None):
+        self._writes.append((ref.path, data, True, option or "exists"))
+
+    def delete(self, ref, option=None):
+        self._writes.append((ref.path, None, False, option))
+
+    def commit(self):
+        self.store.faults.apply("commit")
+        writes, self._writes = self._writes, []
+        self.store._commit(writes)
+
+
+class FakeBulkWriter:
+    """BulkWriter care scrie imediat și raportează fiecare rezultat prin callback-uri"""
+
+    def __init__(self, store):
+        self.store = store
+        self._on_result = None
+        self._on_error = None
+
+    def on_write_result(self, callback):
+        self._on_result = callback
+
+    def on_write_error(self, callback):
+        self._on_error = callback
+
+    def set(self, ref, data, merge=False):
+        self.store._write(ref.path, data, merge)
+        if self._on_result is not None:
+            self._on_result(ref, None, self)
+
+    def close(self):
+        pass
+
+
+class FakeFirestore:
+    """Subsetul din firestore.Client folosit de aplicație, ținut în memorie"""
+
+    def __init__(self, faults=None):
+        self.faults = faults or FaultInjector()
+        self._docs = {}
+        self._update_times = {}
+        self._clock = 0
+        self._watches = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollectionReference(self, (name,))
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def bulk_writer(self, options=None):
+        return FakeBulkWriter(self)
+
+    def get_all(self, refs):
+        self.faults.apply("get_all")
+        for ref in refs:
+            data, update_time = self._read_versioned(ref.path)
+            yield FakeDocumentSnapshot(ref.id, data, ref, update_time)
+
+    def write_option(self, last_update_time=None):
+        return FakeWriteOption(last_update_time)
+
+    def _read(self, path):
+        return self._read_versioned(path)[0]
+
+    def _read_versioned(self, path):
+        with self._lock:
+            data = self._docs.get(path)
+            return (dict(data) if data is not None else None), self._update_times.get(path)
+
+    def _write(self, path, data, merge):
+        self._commit([(path, data, merge, None)])
+
+    def _commit(self, writes):
+        """Aplică scrierile atomic; o precondiție încălcată nu aplică niciuna"""
+        with self._lock:
+            for path, _, _, precondition in writes:
+                if precondition == "missing" and path in self._docs:
+                    raise FailedPrecondition(f"{'/'.join(path)} există deja")
+                if precondition == "exists" and path not in self._docs:
+                    raise FailedPrecondition(f"{'/'.join(path)} nu există")
+                if isinstance(precondition, FakeWriteOption) and \
+                        self._update_times.get(path) != precondition.last_update_time:
+                    raise FailedPrecondition(f"{'/'.join(path)} s-a schimbat")
+            watches = []
+            for path, data, merge, _ in writes:
+                self._clock += 1
+                if data is None:
+                    self._docs.pop(path, None)
+                    self._update_times.pop(path, None)
+                    continue
+                if merge and path in self._docs:
+                    self._docs[path] = {**self._docs[path], **data}
+                else:
+                    self._docs[path] = dict(data)
+                self._update_times[path] = self._clock
+                watches.extend(self._watches.get(path, ()))
+        for watch in watches:
+            self._notify(watch)
+
+    def _children(self, path):
+        depth = len(path) + 1
+        with self._lock:
+            return [FakeDocumentSnapshot(p[-1], dict(d), FakeDocumentReference(self, p), self._update_times.get(p))
+                    for p, d in self._docs.items() if len(p) == depth and p[:-1] == path]
+
+    def _add_watch(self, path, callback):
+        watch = FakeWatch(self, path, callback)
+        with self._lock:
+            self._watches.setdefault(path, []).append(watch)
+        self._notify(watch)
+        return watch
+
+    def _remove_watch(self, watch):
+        with self._lock:
+            watches = self._watches.get(watch.path, [])
+            if watch in watches:
+                watches.remove(watch)
+
+    def _notify(self, watch):
+        # Ca la Firestore, snapshot-urile sosesc pe un thread de fundal
+        def deliver():
+            if watch.is_active:
+                snapshot = FakeDocumentSnapshot(watch.path[-1], self._read(watch.path))
+                watch.callback([snapshot], [], time.time())
+        threading.Thread(target=deliver, daemon=True).start()
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Înlocuitor pentru genai.GenerativeModel: generate_content(_async), cu sau fără stream"""
+
+    def __init__(self, faults=None, chunks=4, answer="Răspuns de test de la co-prezentatorul AI."):
+        self.faults = faults or FaultInjector()
+        self.chunks = chunks
+        self.answer = answer
+
+    def _parts(self):
+        size = max(1, len(self.answer) // self.chunks)
+        return [self.answer[i:i + size] for i in range(0, len(self.answer), size)]
+
+    def _stream(self):
+        parts = self._parts()
+        for part in parts:
+            time.sleep(self.faults.latency / len(parts))
+            yield FakeChunk(part)
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            self.faults.apply("stream_start")
+            return self._stream()
+        self.faults.apply("generate")
+        return FakeChunk(self.answer)
+
+    async def generate_content_async(self, prompt, stream=False):
+        if stream:
+            await self.faults.apply_async("stream_start")
+            return FakeAsyncStream(self._parts(), self.faults.latency)
+        await self.faults.apply_async("generate")
+        return FakeChunk(self.answer)
+
+
+class FakeAsyncStream:
+    def __init__(self, parts, latency):
+        self.parts = parts
+        self.latency = latency
+
+    async def __aiter__(self):
+        for part in self.parts:
+            await asyncio.sleep(self.latency / len(self.parts))
+            yield FakeChunk(part)
+
+
+def install(firestore, model):
+    """Pune fake-urile în locul clienților reali, în procesul curent"""
+    import firebase_utils
+    from services import gemini_service
+
+    firebase_utils.firebase_app = firestore
+    firebase_utils.db = firestore
+    firebase_utils._firebase_pid = os.getpid()
+    gemini_service.model = model
+
@@ -0,0 +1,490 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+from bench.fakes import FaultInjector, FakeFirestore, FakeGenerativeModel, install
+
+# Benchmark de încărcare pentru endpoint-urile SyncPlay, cu Firestore și
+# Gemini înlocuite de fake-uri în proces (bench/fakes.py).
+#
+#   python -m bench.run                          # toate scenariile, modul wsgi
+#   python -m bench.run --mode asgi -s steady_poll --output rezultate.json
+#   python -m bench.run --compare baseline.json  # cod de ieșire 1 la regresii
+#
+# Fiecare scenariu are faze de încărcare în buclă închisă (N clienți care
+# trimit cerere după cerere) și acțiuni între faze (activarea unei întrebări,
+# schimbarea latenței fake-urilor). Rezultatul este JSON: p50/p95/p99,
+# throughput și coduri de status per endpoint și fază, plus RSS-ul procesului.
+
+SHOW_ID = "detectivul_din_canapea"
+DEFAULT_DURATION = 10       # secunde per scenariu
+DEFAULT_CLIENTS = 32
+FIRESTORE_LATENCY = 0.02    # latența "sănătoasă" a fake-ului Firestore
+GEMINI_LATENCY = 0.5        # latența "sănătoasă" a fake-ului Gemini
+MIN_COMPARE_MS = 1.0        # sub acest p95 diferențele sunt zgomot
+
+
+class Phase:
+    """Încărcare în buclă închisă: `clients` clienți, `duration` secunde, cereri din `mix`"""
+
+    def __init__(self, name, duration, clients, mix):
+        self.name = name
+        self.duration = duration
+        self.clients = clients
+        self.mix = mix
+
+
+class Send:
+    """O cerere unică între faze (ex. adminul activează o întrebare)"""
+
+    def __init__(self, label, method, path, **kwargs):
+        self.label = label
+        self.method = method
+        self.path = path
+        self.kwargs = kwargs
+
+
+class Configure:
+    """Schimbă fake-urile între faze (latență, rată de eșec)"""
+
+    def __init__(self, name, apply):
+        self.name = name
+        self.apply = apply
+
+
+class Recorder:
+    """Latențele și codurile de status per endpoint pentru o fază"""
+
+    def __init__(self):
+        self.samples = {}
+        self.statuses = {}
+        self._lock = threading.Lock()
+
+    def record(self, label, seconds, status):
+        with self._lock:
+            self.samples.setdefault(label, []).append(seconds)
+            counts = self.statuses.setdefault(label, {})
+            key = str(status) if status is not None else "exception"
+            counts[key] = counts.get(key, 0) + 1
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    # Rangul cel mai apropiat: cea mai mică valoare care acoperă fracțiunea cerută
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(recorder, elapsed):
+    endpoints = {}
+    total = 0
+    for label, samples in sorted(recorder.samples.items()):
+        values = sorted(samples)
+        statuses = recorder.statuses[label]
+        errors = sum(n for status, n in statuses.items() if status == "exception" or int(status) >= 500)
+        total += len(values)
+        endpoints[label] = {
+            "count": len(values),
+            "errors": errors,
+            "status": statuses,
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+            "throughput_rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        }
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def rss_mb():
+    """RSS-ul curent (Linux) sau maximul procesului dacă /proc nu există"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux raportează în KiB, macOS în octeți
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+
+# --- Amestecurile de cereri -------------------------------------------------
+
+def load_questions():
+    with open(os.path.join("data", "quiz.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def poll_mix():
+    return [
+        (5, lambda rng: ("GET /api/quiz/current", "GET", "/api/quiz/current", {})),
+        (3, lambda rng: ("GET /api/quiz/current_question", "GET", f"/api/quiz/current_question/{SHOW_ID}", {})),
+        (2, lambda rng: ("GET /api/scene/exclusive", "GET", "/api/scene/exclusive", {})),
+    ]
+
+
+def spike_mix(question):
+    def answer(rng):
+        return ("POST /api/quiz/answer", "POST", f"/api/quiz/answer/{SHOW_ID}", {"json": {
+            "user_id": f"spectator-{rng.randrange(1_000_000)}",
+            "question_id": question["id"],
+            "answer": rng.choice(question["options"]),
+        }})
+
+    return [
+        (5, lambda rng: ("GET /api/quiz/current_question", "GET", f"/api/quiz/current_question/{SHOW_ID}", {})),
+        (4, answer),
+        (1, lambda rng: ("GET /api/quiz/current", "GET", "/api/quiz/current", {})),
+    ]
+
+
+def brownout_mix():
+    return poll_mix() + [
+        (1, lambda rng: ("GET /admin", "GET", f"/admin?show_id={SHOW_ID}", {})),
+    ]
+
+
+POPULAR_QUESTIONS = [f"Cine e suspectul numărul {i}?" for i in range(20)]
+
+
+def ai_mix():
+    def ask(rng):
+        if rng.random() < 0.7:
+            question = rng.choice(POPULAR_QUESTIONS)
+        else:
+            question = f"Întrebare unică {rng.randrange(1_000_000_000)}?"
+        return ("POST /api/ai/ask", "POST", "/api/ai/ask", {
+            "json": {"question": question, "show_id": SHOW_ID},
+            "headers": {"X-Client-Id": f"client-{rng.randrange(500)}"},
+        })
+
+    return [
+        (7, ask),
+        (3, lambda rng: ("GET /api/quiz/current", "GET", "/api/quiz/current", {})),
+    ]
+
+
+# --- Scenariile -------------------------------------------------------------
+
+def scenario_steady_poll(env, duration, clients):
+    return [Phase("poll", duration, clients, poll_mix())]
+
+
+def scenario_launch_spike(env, duration, clients):
+    question = env.questions[1] if len(env.questions) > 1 else env.questions[0]
+    return [
+        Phase("before", duration / 3, max(1, clients // 4), poll_mix()),
+        Send("POST /admin", "POST", "/admin", data={"show_id": SHOW_ID, "question_id": question["id"]}),
+        Phase("spike", duration * 2 / 3, clients * 2, spike_mix(question)),
+    ]
+
+
+def scenario_firestore_brownout(env, duration, clients):
+    return [
+        Phase("healthy", duration / 3, clients, brownout_mix()),
+        Configure("start_brownout", lambda: env.firestore.faults.configure(latency=1.5, failure_rate=0.3)),
+        Send("POST /admin/cache/invalidate", "POST", "/admin/cache/invalidate"),
+        Phase("brownout", duration / 3, clients, brownout_mix()),
+        Configure("end_brownout", lambda: env.firestore.faults.configure(latency=FIRESTORE_LATENCY, failure_rate=0)),
+        Phase("recovery", duration / 3, clients, brownout_mix()),
+    ]
+
+
+def scenario_gemini_slowdown(env, duration, clients):
+    return [
+        Phase("normal", duration / 2, clients, ai_mix()),
+        Configure("start_slowdown", lambda: env.gemini.faults.configure(latency=5.0)),
+        Phase("slow", duration / 2, clients, ai_mix()),
+    ]
+
+
+SCENARIOS = {
+    "steady_poll": scenario_steady_poll,
+    "launch_spike": scenario_launch_spike,
+    "firestore_brownout": scenario_firestore_brownout,
+    "gemini_slowdown": scenario_gemini_slowdown,
+}
+
+
+class Environment:
+    """Fake-urile unui scenariu, cu date inițiale ca în producție"""
+
+    def __init__(self, seed):
+        self.questions = load_questions()
+        self.firestore = FakeFirestore(FaultInjector(latency=FIRESTORE_LATENCY, jitter=FIRESTORE_LATENCY / 2, seed=seed))
+        self.gemini = FakeGenerativeModel(FaultInjector(latency=GEMINI_LATENCY, jitter=GEMINI_LATENCY / 5, seed=seed))
+
+        show = self.firestore.collection("shows").document(SHOW_ID)
+        # Datele inițiale nu trec prin latența injectată
+        self.firestore._write(show.path, {"title": "Detectivul din canapea"}, False)
+        for q in self.questions:
+            doc = show.collection("questions").document(q["id"])
+            self.firestore._write(doc.path, {"text": q["question"], "options": q["options"], "correct": q["correct"]}, False)
+        status = show.collection("metadata").document("status")
+        self.firestore._write(status.path, {"current_question_id": self.questions[0]["id"]}, False)
+
+
+def reset_app_state():
+    """Cache-urile din proces nu trebuie să treacă dintr-un scenariu în altul"""
+    from services import question_listener
+    from services.gemini_cache import answer_cache
+    from services.response_cache import clear_snapshots
+
+    question_listener.stop_all()
+    answer_cache.clear()
+    clear_snapshots()
+
+
+# --- Driverele --------------------------------------------------------------
+
+class WsgiDriver:
+    """Aplicația Flask, apelată din thread-uri (ca un worker gthread/gevent)"""
+
+    mode = "wsgi"
+
+    def __init__(self):
+        from app import create_app
+        self.app = create_app()
+        self._local = threading.local()
+
+    def send(self, method, path, **kwargs):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, **kwargs)
+        response.get_data()
+        status = response.status_code
+        response.close()
+        return status
+
+    def run_phase(self, phase, recorder, rng_seed):
+        deadline = time.perf_counter() + phase.duration
+
+        def client_loop(index):
+            rng = random.Random(rng_seed + index)
+            weights = [w for w, _ in phase.mix]
+            factories = [f for _, f in phase.mix]
+            while time.perf_counter() < deadline:
+                label, method, path, kwargs = rng.choices(factories, weights)[0](rng)
+                start = time.perf_counter()
+                try:
+                    status = self.send(method, path, **kwargs)
+                except Exception:
+                    status = None
+                recorder.record(label, time.perf_counter() - start, status)
+
+        threads = [threading.Thread(target=client_loop, args=(i,), daemon=True) for i in range(phase.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run(self, steps, env, seed):
+        install(env.firestore, env.gemini)
+        self.send("POST", "/admin/cache/invalidate")
+        return [run_step(step, seed + i, self.run_phase, self.send) for i, step in enumerate(steps)]
+
+
+class AsgiDriver:
+    """asgi:app (rutele async + Flask prin WsgiToAsgi), apelată din bucla asyncio"""
+
+    mode = "asgi"
+
+    def __init__(self):
+        import asgi
+        self.app = asgi.app
+
+    def run(self, steps, env, seed):
+        return asyncio.run(self._run(steps, env, seed))
+
+    async def _run(self, steps, env, seed):
+        import httpx
+
+        install(env.firestore, env.gemini)
+        transport = httpx.ASGITransport(app=self.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            async def send(method, path, **kwargs):
+                response = await client.request(method, path, **kwargs)
+                return response.status_code
+
+            async def run_phase(phase, recorder, rng_seed):
+                deadline = time.perf_counter() + phase.duration
+
+                async def client_loop(index):
+                    rng = random.Random(rng_seed + index)
+                    weights = [w for w, _ in phase.mix]
+                    factories = [f for _, f in phase.mix]
+                    while time.perf_counter() < deadline:
+                        label, method, path, kwargs = rng.choices(factories, weights)[0](rng)
+                        start = time.perf_counter()
+                        try:
+                            status = await send(method, path, **kwargs)
+                        except Exception:
+                            status = None
+                        recorder.record(label, time.perf_counter() - start, status)
+
+                await asyncio.gather(*(client_loop(i) for i in range(phase.clients)))
+
+            await send("POST", "/admin/cache/invalidate")
+            results = []
+            for i, step in enumerate(steps):
+                results.append(await run_step_async(step, seed + i, run_phase, send))
+            return results
+
+
+def run_step(step, seed, run_phase, send):
+    if isinstance(step, Phase):
+        recorder = Recorder()
+        start = time.perf_counter()
+        run_phase(step, recorder, seed * 1000)
+        return step.name, summarize(recorder, time.perf_counter() - start)
+    if isinstance(step, Send):
+        start = time.perf_counter()
+        status = send(step.method, step.path, **step.kwargs)
+        return step.label, {"status": status, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+    step.apply()
+    return step.name, {"configured": True}
+
+
+async def run_step_async(step, seed, run_phase, send):
+    if isinstance(step, Phase):
+        recorder = Recorder()
+        start = time.perf_counter()
+        await run_phase(step, recorder, seed * 1000)
+        return step.name, summarize(recorder, time.perf_counter() - start)
+    if isinstance(step, Send):
+        start = time.perf_counter()
+        status = await send(step.method, step.path, **step.kwargs)
+        return step.label, {"status": status, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+    step.apply()
+    return step.name, {"configured": True}
+
+
+# --- Raportul și comparația -------------------------------------------------
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def quiet(verbose):
+    """Log-urile aplicației merg în /dev/null: nu încetinesc terminalul și nu strică JSON-ul de pe stdout"""
+    if verbose:
+        return contextlib.redirect_stdout(sys.stderr)
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def run_benchmark(mode, scenario_names, duration, clients, seed, verbose=False):
+    with quiet(verbose):
+        driver = AsgiDriver() if mode == "asgi" else WsgiDriver()
+    report = {
+        "meta": {
+            "mode": mode,
+            "duration_s": duration,
+            "clients": clients,
+            "seed": seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "git_revision": git_revision(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "scenarios": {},
+    }
+
+    for name in scenario_names:
+        env = Environment(seed)
+        reset_app_state()
+        steps = SCENARIOS[name](env, duration, clients)
+        rss_before = rss_mb()
+        print(f"▶️ {name} ({mode}, {clients} clienți, {duration}s)", file=sys.stderr)
+
+        with quiet(verbose):
+            results = driver.run(steps, env, seed)
+
+        report["scenarios"][name] = {
+            "steps": {label: result for label, result in results},
+            "rss_mb": {"before": rss_before, "after": rss_mb(), "peak": peak_rss_mb()},
+            "firestore_calls": dict(env.firestore.faults.calls),
+            "gemini_calls": dict(env.gemini.faults.calls),
+        }
+    return report
+
+
+def compare(report, baseline, threshold):
+    """Lista regresiilor p95 (raport curent / baseline > threshold)"""
+    regressions = []
+    for scenario, data in report["scenarios"].items():
+        base_steps = baseline.get("scenarios", {}).get(scenario, {}).get("steps", {})
+        for step, result in data["steps"].items():
+            for label, current in result.get("endpoints", {}).items():
+                previous = base_steps.get(step, {}).get("endpoints", {}).get(label)
+                if previous is None or previous["p95_ms"] < MIN_COMPARE_MS:
+                    continue
+                ratio = current["p95_ms"] / previous["p95_ms"]
+                line = (f"{scenario}/{step} {label}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms "
+                        f"(x{ratio:.2f}), rps {previous['throughput_rps']} -> {current['throughput_rps']}")
+                print(("❌ " if ratio > threshold else "   ") + line, file=sys.stderr)
+                if ratio > threshold:
+                    regressions.append(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de latență pentru SyncPlay, cu backend-uri false")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenariul de rulat (repetabil); implicit toate")
+    parser.add_argument("--mode", choices=["wsgi", "asgi"], default="wsgi")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="secunde per scenariu")
+    parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS, help="clienți concurenți")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="fișierul JSON cu rezultatele (implicit stdout)")
+    parser.add_argument("--compare", help="raport JSON anterior cu care comparăm p95")
+    parser.add_argument("--threshold", type=float, default=1.2, help="raportul p95 peste care e regresie")
+    parser.add_argument("--verbose", action="store_true", help="păstrează log-urile aplicației")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.mode, args.scenario or list(SCENARIOS), args.duration,
+                           args.clients, args.seed, args.verbose)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regresii peste x{args.threshold}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
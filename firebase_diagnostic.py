@@ -2,13 +2,17 @@ from flask import Blueprint, jsonify
 import os
 import json
 import time
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_utils import breaker_status
+from services.swr_cache import StaleWhileRevalidateCache
 
 firebase_diagnostic_bp = Blueprint("firebase_diagnostic", __name__)
 
-@firebase_diagnostic_bp.route("/diagnostic/firebase", methods=["GET"])
-def diagnose_firebase():
+# Diagnosticul complet (credențiale, colecții, întrebări) rulează în fundal,
+# cel mult o dată pe DIAGNOSTIC_INTERVAL; cererile primesc ultimul rezultat.
+# Pentru load balancer și monitorizare există /healthz și /readyz.
+DIAGNOSTIC_INTERVAL = 60
+
+def run_diagnostic(_key=None):
     result = {
         "status": "running",
         "timestamp": time.time(),
@@ -25,7 +29,7 @@ def diagnose_firebase():
         
         if not firebase_creds:
             result["status"] = "error"
-            return jsonify(result)
+            return result
             
     except Exception as e:
         result["steps"]["env_var"] = {
@@ -33,7 +37,7 @@ def diagnose_firebase():
             "message": str(e)
         }
         result["status"] = "error"
-        return jsonify(result)
+        return result
     
     # Pas 2: Verifică parsarea JSON-ului
     try:
@@ -49,10 +53,13 @@ def diagnose_firebase():
             "message": str(e)
         }
         result["status"] = "error"
-        return jsonify(result)
+        return result
     
     # Pas 3: Încearcă să inițializeze Firebase
     try:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
         start_time = time.time()
         cred = credentials.Certificate(creds_json)
         
@@ -82,7 +89,7 @@ def diagnose_firebase():
             "message": str(e)
         }
         result["status"] = "error"
-        return jsonify(result)
+        return result
     
     # Pas 4: Testează accesul la Firestore
     try:
@@ -99,7 +106,7 @@ def diagnose_firebase():
             "message": str(e)
         }
         result["status"] = "error"
-        return jsonify(result)
+        return result
     
     # Pas 5: Listează colecțiile
     try:
@@ -174,4 +181,21 @@ def diagnose_firebase():
     if result["status"] == "running":
         result["status"] = "success"  # Totul a mers bine
         
+    return result
+
+_diagnostic_cache = StaleWhileRevalidateCache("firebase_diagnostic", run_diagnostic, DIAGNOSTIC_INTERVAL,
+                                              proactive=False)
+
+@firebase_diagnostic_bp.route("/diagnostic/firebase", methods=["GET"])
+def diagnose_firebase():
+    lookup = _diagnostic_cache.lookup("deep").resolve(0)
+    if lookup.value is None:
+        if lookup.timed_out:
+            # Primul diagnostic abia a pornit
+            return jsonify({"status": "running", "circuit_breakers": breaker_status()}), 202, {"Retry-After": "5"}
+        return jsonify({"status": "error", "message": lookup.error, "circuit_breakers": breaker_status()}), 503
+
+    result = dict(lookup.value)
+    result["age_seconds"] = round(time.time() - result["timestamp"], 1)
+    result["circuit_breakers"] = breaker_status()
     return jsonify(result)
@@ -1,16 +1,203 @@
+import logging
 import os
 import json
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
+from services import metrics, shared_state
+from services.executor import on_abandon
+from services.logs import log_debug, log_event
 
+# firebase_admin (și gRPC în spate) se importă abia la prima utilizare,
+# iar clientul se recreează dacă procesul a fost fork-uit după inițializare.
 firebase_app = None
 db = None
+_firebase_pid = None
+_init_lock = threading.Lock()
+
+# Circuit breaker per tip de operație Firestore. Când prea multe dintre
+# ultimele apeluri eșuează sau sunt lente, circuitul se deschide și apelurile
+# cad imediat pe fallback, în loc să aștepte fiecare timeout-ul. După
+# BREAKER_OPEN_SECONDS lăsăm să treacă câteva probe (half-open): dacă reușesc
+# închidem circuitul, dacă nu, îl redeschidem.
+BREAKER_WINDOW = 20             # ultimele apeluri luate în calcul per operație
+BREAKER_MIN_CALLS = 5           # sub atâtea apeluri nu deschidem circuitul
+BREAKER_FAILURE_RATE = 0.5      # fracțiunea de apeluri eșuate sau lente care îl deschide
+BREAKER_SLOW_CALL = 1.0         # secunde după care un apel reușit contează ca lent
+# primul snapshot al unui listener vine după handshake-ul gRPC, deci are altă limită
+BREAKER_SLOW_CALLS = {"listen": 5.0}
+BREAKER_OPEN_SECONDS = 10       # cât stă deschis înainte de probe
+BREAKER_HALF_OPEN_PROBES = 2    # probe simultane și reușite necesare pentru închidere
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Circuitul operației e deschis: apelul nu a fost făcut, folosim fallback-ul"""
+
+
+class CircuitBreaker:
+    """Starea circuitului pentru o singură operație Firestore (per proces)"""
+
+    def __init__(self, operation, slow_call=BREAKER_SLOW_CALL):
+        self.operation = operation
+        self.slow_call = slow_call
+        self.state = CLOSED
+        self.opened_at = 0
+        self.half_open_at = 0
+        self.outcomes = deque(maxlen=BREAKER_WINDOW)   # True = eșuat sau lent
+        self.probes = 0
+        self.probe_successes = 0
+        self.rejected = 0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True dacă apelul poate pleca; în half-open rezervă una dintre probe"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < BREAKER_OPEN_SECONDS:
+                    self.rejected += 1
+                    return False
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self.probes >= BREAKER_HALF_OPEN_PROBES:
+                    # O probă care nu se mai întoarce contează ca eșec
+                    if time.monotonic() - self.half_open_at > BREAKER_OPEN_SECONDS:
+                        self._open()
+                    self.rejected += 1
+                    return False
+                self.probes += 1
+            return True
+
+    def record(self, ok, elapsed):
+        bad = not ok or elapsed > self.slow_call
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probes = max(self.probes - 1, 0)
+                if bad:
+                    self._open()
+                else:
+                    self.probe_successes += 1
+                    if self.probe_successes >= BREAKER_HALF_OPEN_PROBES:
+                        self.outcomes.clear()
+                        self._set_state(CLOSED)
+                return
+            if self.state == OPEN:
+                return
+            self.outcomes.append(bad)
+            if len(self.outcomes) >= BREAKER_MIN_CALLS and sum(self.outcomes) / len(self.outcomes) >= BREAKER_FAILURE_RATE:
+                self._open()
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._set_state(OPEN)
+
+    def _set_state(self, state):
+        if state != self.state:
+            log_event("circuit_state", logging.WARNING if state == OPEN else logging.INFO,
+                      operation=self.operation, previous=self.state, state=state)
+        self.state = state
+        if state == HALF_OPEN:
+            self.half_open_at = time.monotonic()
+        self.probes = 0
+        self.probe_successes = 0
+        metrics.circuit_state.labels(self.operation).set(_STATE_VALUES[state])
+
+    @property
+    def closed(self):
+        return self.state == CLOSED
+
+    def status(self):
+        with self._lock:
+            calls = len(self.outcomes)
+            return {
+                "state": self.state,
+                "failure_rate": round(sum(self.outcomes) / calls, 2) if calls else 0.0,
+                "window_calls": calls,
+                "open_for_seconds": round(time.monotonic() - self.opened_at, 1) if self.state != CLOSED else None,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(operation):
+    breaker = _breakers.get(operation)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(
+                operation, CircuitBreaker(operation, BREAKER_SLOW_CALLS.get(operation, BREAKER_SLOW_CALL)))
+    return breaker
+
+
+class _BreakerCall:
+    """Rezultatul unui apel, trecut în circuit o singură dată: la întoarcere sau la abandon"""
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+        self.start = time.perf_counter()
+        self._recorded = False
+        self._lock = threading.Lock()
+
+    def record(self, ok):
+        with self._lock:
+            if self._recorded:
+                return
+            self._recorded = True
+        self.breaker.record(ok, time.perf_counter() - self.start)
+
+
+@contextmanager
+def firestore_call(operation):
+    """Apel Firestore prin circuitul operației; ridică CircuitOpenError dacă e deschis"""
+    breaker = get_breaker(operation)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuitul Firestore pentru {operation} este deschis")
+    call = _BreakerCall(breaker)
+    # Apelantul care a renunțat după timeout numără apelul ca eșuat imediat,
+    # chiar dacă el rămâne blocat în thread-ul din pool
+    cancel = on_abandon(lambda: call.record(False))
+    ok = False
+    try:
+        with metrics.backend_call("firestore", operation):
+            yield
+        ok = True
+    finally:
+        cancel()
+        call.record(ok)
+
+
+def breaker_status():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.operation: b.status() for b in breakers}
 
 def init_firebase():
-    global firebase_app, db
-    if not firebase_app:
+    global firebase_app, db, _firebase_pid
+    if firebase_app and _firebase_pid == os.getpid():
+        return db
+
+    with _init_lock:
+        if firebase_app and _firebase_pid == os.getpid():
+            return db
         try:
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+
+            if firebase_app:
+                # Clientul a fost creat în procesul părinte: nu refolosim canalul gRPC
+                print("🔄 Fork detectat, re-inițializăm Firebase")
+                firebase_admin.delete_app(firebase_app)
+                firebase_app = None
+                db = None
+
             print("🔄 Inițializare Firebase...")
             start_time = time.time()
             
@@ -23,20 +210,22 @@ def init_firebase():
             })
             
             db = firestore.client()
+            _firebase_pid = os.getpid()
             
             # Măsoară timpul de inițializare
-            print(f"✅ Firebase inițializat în {time.time() - start_time:.2f} secunde")
+            elapsed = time.time() - start_time
+            print(f"✅ Firebase inițializat în {elapsed:.2f} secunde")
+            from services.startup import record_stage
+            record_stage("firebase_client", elapsed)
             return db
         except Exception as e:
             print(f"🔥 Eroare la inițializarea Firebase: {str(e)}")
             return None
-    return db
 
 def get_shows(max_timeout=5):
     """Obține lista de show-uri cu timeout limitat"""
     try:
         start_time = time.time()
-        print("🔄 Obținere shows...")
         
         db = init_firebase()
         if not db:
@@ -44,42 +233,59 @@ def get_shows(max_timeout=5):
             
         # Setează un timeout pentru operațiune
         shows_ref = db.collection('shows')
-        docs = list(shows_ref.stream())
+        with firestore_call("get_shows"):
+            docs = list(shows_ref.stream())
         
         # Verifică dacă a durat prea mult
         elapsed = time.time() - start_time
-        print(f"✅ Shows obținute în {elapsed:.2f} secunde")
+        log_debug("firestore_get_shows", count=len(docs), elapsed_ms=round(elapsed * 1000, 1))
         
         if elapsed > max_timeout:
-            print(f"⚠️ Obținerea shows a durat prea mult: {elapsed:.2f} secunde")
+            log_event("firestore_slow", logging.WARNING, operation="get_shows", elapsed_ms=round(elapsed * 1000, 1))
             
         return [doc.id for doc in docs]
+    except CircuitOpenError:
+        return []
     except Exception as e:
         print(f"🔥 Eroare la get_shows: {e}")
         return []
 
+def load_show_ids():
+    """Id-urile tuturor show-urilor din Firestore, inclusiv cele care au doar sub-colecții; ridică excepția la eșec"""
+    db = init_firebase()
+    if not db:
+        raise RuntimeError("Firebase nu este inițializat")
+    with firestore_call("list_shows"):
+        return [ref.id for ref in db.collection('shows').list_documents()]
+
+def load_questions_for_show(show_id, max_timeout=5):
+    """Întrebările show-ului; ridică excepția dacă citirea eșuează (o listă goală = show fără întrebări)"""
+    start_time = time.time()
+
+    db = init_firebase()
+    if not db:
+        raise RuntimeError("Firebase nu este inițializat")
+
+    questions_ref = db.collection('shows').document(show_id).collection('questions')
+    with firestore_call("get_questions"):
+        docs = list(questions_ref.stream())
+
+    # Verifică dacă a durat prea mult
+    elapsed = time.time() - start_time
+    log_debug("firestore_get_questions", show_id=show_id, count=len(docs), elapsed_ms=round(elapsed * 1000, 1))
+
+    if elapsed > max_timeout:
+        log_event("firestore_slow", logging.WARNING, operation="get_questions", show_id=show_id,
+                  elapsed_ms=round(elapsed * 1000, 1))
+
+    return [{**q.to_dict(), 'id': q.id} for q in docs]
+
 def get_questions_for_show(show_id, max_timeout=5):
-    """Obține întrebările pentru un show cu timeout limitat"""
+    """Obține întrebările pentru un show cu timeout limitat ([] la orice eroare)"""
     try:
-        start_time = time.time()
-        print(f"🔄 Obținere întrebări pentru {show_id}...")
-        
-        db = init_firebase()
-        if not db:
-            return []
-            
-        # Setează un timeout pentru operațiune
-        questions_ref = db.collection('shows').document(show_id).collection('questions')
-        docs = list(questions_ref.stream())
-        
-        # Verifică dacă a durat prea mult
-        elapsed = time.time() - start_time
-        print(f"✅ Întrebări obținute în {elapsed:.2f} secunde")
-        
-        if elapsed > max_timeout:
-            print(f"⚠️ Obținerea întrebărilor a durat prea mult: {elapsed:.2f} secunde")
-            
-        return [{**q.to_dict(), 'id': q.id} for q in docs]
+        return load_questions_for_show(show_id, max_timeout)
+    except CircuitOpenError:
+        return []
     except Exception as e:
         print(f"🔥 Eroare la get_questions: {e}")
         return []
@@ -91,17 +297,19 @@ def set_active_question(show_id, question_id):
             return False
             
         metadata_ref = db.collection('shows').document(show_id).collection('metadata').document('status')
-        metadata_ref.set({'current_question_id': question_id})
+        with firestore_call("set_active_question"):
+            metadata_ref.set({'current_question_id': question_id})
 
-        # 🔁 Salvăm și local în active_questions.json
+        # 🔁 Salvăm și în starea partajată de workeri (doar show-ul acesta)
         try:
-            with open("active_questions.json", "w", encoding="utf-8") as f:
-                json.dump({show_id: question_id}, f, ensure_ascii=False, indent=2)
-            print(f"✅ Întrebarea activă a fost salvată și local în active_questions.json")
+            shared_state.set_active(show_id, question_id)
         except Exception as e:
             print(f"⚠️ Eroare la salvarea locală a întrebării active: {e}")
 
         return True
+    except CircuitOpenError as e:
+        print(f"⚠️ {e}")
+        return False
     except Exception as e:
         print(f"🔥 Eroare la set_active_question: {e}")
         return False
@@ -0,0 +1,76 @@
+import glob
+import os
+import tempfile
+
+# Configurație gunicorn pentru SyncPlay.
+# SYNCPLAY_SERVER_MODE alege modul de servire:
+#   gevent (implicit) - aplicația Flask pe workeri gevent: conexiunile SSE
+#                       inactive nu mai țin ocupat câte un thread de sistem
+#   sync              - aplicația Flask pe workeri sync, pentru comparație
+#   asgi              - asgi:app pe workeri uvicorn: rutele AI/quiz/scenă
+#                       rulează pe asyncio, restul prin puntea WSGI
+# PORT și WEB_CONCURRENCY sunt citite automat de gunicorn pe Heroku.
+
+SERVER_MODE = os.getenv("SYNCPLAY_SERVER_MODE", "gevent")
+
+if SERVER_MODE == "asgi":
+    worker_class = "uvicorn.workers.UvicornWorker"
+    wsgi_app = "asgi:app"
+else:
+    worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync" if SERVER_MODE == "sync" else "gevent")
+    wsgi_app = "app:create_app()"
+
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "10000"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+
+# Cu GUNICORN_PRELOAD=1 aplicația se importă o singură dată în master, apoi
+# se face fork. Clienții Firebase/Gemini și thread-urile de fundal sunt
+# creați leneș în fiecare worker, deci nu se moștenesc canale gRPC.
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+
+if preload_app and worker_class == "gevent":
+    # Importul aplicației are loc înainte de patch-ul făcut de worker
+    from gevent import monkey
+    monkey.patch_all()
+
+
+# Metricile Prometheus ale tuturor workerilor sunt scrise în același director
+# și adunate la /metrics. Trebuie setat înainte ca aplicația să fie importată.
+# Directorul temporar e creat doar când nu a fost configurat unul.
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="syncplay-metrics-")
+
+
+def on_starting(server):
+    # Valorile rămase de la o pornire anterioară ar fi adunate la cele noi
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    # Gauge-urile "livesum" ale worker-ului oprit nu mai trebuie numărate
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # gRPC (Firestore) trebuie să coopereze cu bucla gevent a worker-ului
+    if worker_class == "gevent":
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
+
+    # Fiecare worker își pregătește cache-urile înaintea evenimentelor din
+    # timeline; lansările le face doar worker-ul care ține lacătul
+    from services import timeline
+    timeline.ensure_scheduler()
+
+
+def worker_exit(server, worker):
+    # Scriem în Firestore răspunsurile rămase în buffer înainte de oprire
+    import sys
+    answer_ingest = sys.modules.get("services.answer_ingest")
+    if answer_ingest is not None:
+        answer_ingest.shutdown()
@@ -1,26 +1,16 @@
-import os
-import json
-from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
+from question_bank import connect, import_questions
 
-load_dotenv()
+# Întrebarea de test pentru show-ul implicit; pentru un sezon întreg folosește
+# python question_bank.py import <fișier> (JSON, NDJSON sau CSV)
+QUESTIONS = [
+    {
+        "show_id": "detectivul_din_canapea",
+        "id": "q1",
+        "text": "Cine a furat mingea?",
+        "options": ["Câinele", "Pisica", "Vecinul", "Poștașul"],
+        "correct": "Pisica"
+    }
+]
 
-service_account = json.loads(os.getenv("FIREBASE_SERVICE_ACCOUNT_SYNCPLAY"))
-cred = credentials.Certificate(service_account)
-firebase_admin.initialize_app(cred)
-db = firestore.client()
-
-question = {
-    "text": "Cine a furat mingea?",
-    "options": ["Câinele", "Pisica", "Vecinul", "Poștașul"],
-    "correct": "Pisica"
-}
-
-db.collection("shows") \
-  .document("detectivul_din_canapea") \
-  .collection("questions") \
-  .document("q1") \
-  .set(question)
-
-print("✅ Întrebare adăugată.")
+stats = import_questions(connect(), enumerate(QUESTIONS, 1))
+print(f"✅ Întrebări adăugate: {stats.queued}, neschimbate: {stats.unchanged}")
@@ -0,0 +1,319 @@
+"""Import/export în masă pentru banca de întrebări din Firestore.
+
+    python question_bank.py import data/quiz.json --show detectivul_din_canapea
+    python question_bank.py import sezon.csv
+    python question_bank.py export --show master_chef --output master_chef.ndjson
+
+Formatele de intrare: JSON (lista din quiz.json sau {show_id: [întrebări]}),
+NDJSON (o întrebare pe linie) și CSV (coloanele show_id, id, question/text,
+options separate prin "|", correct). Scrierile merg prin BulkWriter, în
+paralel și cu creștere treptată a ritmului; întrebările identice cu cele din
+Firestore sunt sărite. Cu FIRESTORE_EMULATOR_HOST setat se folosește emulatorul.
+
+Exportul scrie timestamp-urile ca {"__timestamp__": "<ISO 8601>"}, iar importul
+JSON/NDJSON le reface, așa că un export re-importat nu mai schimbă nimic.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+CHUNK_SIZE = 300             # întrebări comparate cu Firestore dintr-o singură citire
+INITIAL_OPS_PER_SECOND = 500 # ritmul de pornire al BulkWriter (regula 500/50/5)
+MAX_OPS_PER_SECOND = 5000
+MAX_WRITE_ATTEMPTS = 5
+PROGRESS_INTERVAL = 2        # secunde între rapoartele de progres
+
+FORMATS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+TIMESTAMP_KEY = "__timestamp__"
+
+
+def connect():
+    """Clientul Firestore: emulatorul dacă e configurat, altfel contul de serviciu al aplicației"""
+    if os.getenv("FIRESTORE_EMULATOR_HOST"):
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud import firestore
+        project = os.getenv("GOOGLE_CLOUD_PROJECT", "syncplay-local")
+        print(f"🧪 Emulator Firestore la {os.getenv('FIRESTORE_EMULATOR_HOST')} (proiect {project})")
+        return firestore.Client(project=project, credentials=AnonymousCredentials())
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    from firebase_utils import init_firebase
+    db = init_firebase()
+    if db is None:
+        raise SystemExit("❌ Nu s-a putut inițializa Firebase (FIREBASE_SERVICE_ACCOUNT_SYNCPLAY)")
+    return db
+
+
+def detect_format(path, explicit=None):
+    if explicit:
+        return explicit
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise SystemExit(f"❌ Nu recunosc formatul lui {path}; folosește --format")
+    return fmt
+
+
+def encode_value(value):
+    """default= pentru json.dumps: timestamp-urile Firestore rămân timestamp-uri la re-import"""
+    if isinstance(value, datetime):
+        return {TIMESTAMP_KEY: value.isoformat()}
+    return str(value)
+
+
+def decode_object(obj):
+    """object_hook pentru json.load: reface timestamp-urile scrise de encode_value"""
+    if len(obj) == 1 and TIMESTAMP_KEY in obj:
+        return datetime.fromisoformat(obj[TIMESTAMP_KEY])
+    return obj
+
+
+def read_records(stream, fmt):
+    """(poziție, înregistrare) pentru fiecare întrebare; NDJSON și CSV sunt citite linie cu linie"""
+    if fmt == "ndjson":
+        for line_no, line in enumerate(stream, 1):
+            if line.strip():
+                yield line_no, json.loads(line, object_hook=decode_object)
+    elif fmt == "csv":
+        for row_no, row in enumerate(csv.DictReader(stream), 2):
+            yield row_no, row
+    else:
+        data = json.load(stream, object_hook=decode_object)
+        if isinstance(data, dict):
+            # {show_id: [întrebări]}
+            for show_id, questions in data.items():
+                for i, record in enumerate(questions, 1):
+                    yield f"{show_id}[{i}]", {"show_id": show_id, **record}
+        else:
+            for i, record in enumerate(data, 1):
+                yield i, record
+
+
+def normalize(record, default_show=None):
+    """(show_id, id, document) în forma din Firestore: text, options, correct (+ alte câmpuri)"""
+    show_id = record.get("show_id") or default_show
+    question_id = record.get("id")
+    text = record.get("text") or record.get("question")
+    if not show_id or not question_id or not text:
+        raise ValueError("lipsește show_id, id sau textul întrebării")
+
+    options = record.get("options") or []
+    if isinstance(options, str):
+        options = [o.strip() for o in options.split("|") if o.strip()]
+
+    document = {k: v for k, v in record.items() if k not in ("show_id", "id", "question") and v not in (None, "")}
+    document["text"] = text
+    document["options"] = list(options)
+    document["correct"] = record.get("correct")
+    return str(show_id), str(question_id), document
+
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ImportStats:
+    def __init__(self):
+        self.started = time.time()
+        self.read = 0
+        self.invalid = 0
+        self.unchanged = 0
+        self.queued = 0
+        self.written = 0
+        self.failed = 0
+        self.shows_created = 0
+        self._last_report = self.started
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        # Apelat din thread-urile BulkWriter
+        with self._lock:
+            setattr(self, key, getattr(self, key) + 1)
+
+    def rate(self):
+        return self.written / max(time.time() - self.started, 1e-6)
+
+    def report(self, force=False):
+        now = time.time()
+        if not force and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        print(f"📦 {self.read} citite, {self.queued} de scris, {self.written} scrise, "
+              f"{self.unchanged} neschimbate, {self.failed} eșuate, {self.rate():.0f} scrieri/s")
+
+    def summary(self):
+        elapsed = time.time() - self.started
+        return {
+            "read": self.read,
+            "invalid": self.invalid,
+            "unchanged": self.unchanged,
+            "written": self.written,
+            "failed": self.failed,
+            "shows_created": self.shows_created,
+            "elapsed_seconds": round(elapsed, 2),
+            "writes_per_second": round(self.written / max(elapsed, 1e-6), 1),
+        }
+
+
+def make_writer(db, stats, initial_ops, max_ops):
+    from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions, SendMode
+
+    writer = db.bulk_writer(BulkWriterOptions(
+        initial_ops_per_second=initial_ops,
+        max_ops_per_second=max_ops,
+        mode=SendMode.parallel
+    ))
+
+    def on_result(reference, result, bulk_writer):
+        stats.count("written")
+
+    def on_error(failure, bulk_writer):
+        # True = BulkWriter reîncearcă (cu backoff); după MAX_WRITE_ATTEMPTS renunțăm
+        if failure.attempts < MAX_WRITE_ATTEMPTS:
+            return True
+        stats.count("failed")
+        print(f"❌ {failure.operation.reference.path}: {failure.message}")
+        return False
+
+    writer.on_write_result(on_result)
+    writer.on_write_error(on_error)
+    return writer
+
+
+def import_questions(db, records, default_show=None, dry_run=False,
+                     initial_ops=INITIAL_OPS_PER_SECOND, max_ops=MAX_OPS_PER_SECOND, chunk_size=CHUNK_SIZE):
+    """Scrie întrebările care diferă de cele din Firestore; întoarce statisticile"""
+    stats = ImportStats()
+    writer = None if dry_run else make_writer(db, stats, initial_ops, max_ops)
+    known_shows = set()
+
+    def valid_records():
+        for position, record in records:
+            stats.read += 1
+            try:
+                yield normalize(record, default_show)
+            except (ValueError, AttributeError) as e:
+                stats.invalid += 1
+                print(f"⚠️ Înregistrarea {position} ignorată: {e}")
+
+    try:
+        for chunk in chunked(valid_records(), chunk_size):
+            shows = db.collection("shows")
+            refs = {}
+            for show_id, question_id, document in chunk:
+                refs[(show_id, question_id)] = shows.document(show_id).collection("questions").document(question_id)
+            new_shows = {show_id for show_id, _, _ in chunk} - known_shows
+            show_refs = [shows.document(show_id) for show_id in new_shows]
+
+            # O singură citire pentru tot chunk-ul, doar documentele de care avem nevoie
+            existing = {snap.reference.path: snap for snap in db.get_all(list(refs.values()) + show_refs)}
+
+            for ref in show_refs:
+                snap = existing.get(ref.path)
+                if snap is None or not snap.exists:
+                    stats.shows_created += 1
+                    if writer is not None:
+                        writer.set(ref, {"title": ref.id.replace("_", " ").title()}, merge=True)
+            known_shows |= new_shows
+
+            for show_id, question_id, document in chunk:
+                ref = refs[(show_id, question_id)]
+                snap = existing.get(ref.path)
+                if snap is not None and snap.exists and snap.to_dict() == document:
+                    stats.unchanged += 1
+                    continue
+                stats.queued += 1
+                if writer is not None:
+                    writer.set(ref, document)
+            stats.report()
+    finally:
+        if writer is not None:
+            writer.close()
+    if dry_run:
+        stats.written = stats.queued
+    stats.report(force=True)
+    return stats
+
+
+def export_questions(db, out, show_ids=None):
+    """Scrie întrebările ca NDJSON, pagină cu pagină, fără să țină colecțiile în memorie"""
+    shows = db.collection("shows")
+    if not show_ids:
+        # list_documents găsește și show-urile care au doar sub-colecții
+        show_ids = (ref.id for ref in shows.list_documents())
+    count = 0
+    for show_id in show_ids:
+        for snap in shows.document(show_id).collection("questions").stream():
+            out.write(json.dumps({"show_id": show_id, "id": snap.id, **snap.to_dict()},
+                                 ensure_ascii=False, default=encode_value) + "\n")
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import/export în masă pentru întrebările din Firestore")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="Încarcă întrebări din JSON, NDJSON sau CSV")
+    importer.add_argument("path", help="fișierul de intrare ('-' pentru stdin)")
+    importer.add_argument("--format", choices=sorted(set(FORMATS.values())))
+    importer.add_argument("--show", help="show_id pentru înregistrările care nu îl au (ex. quiz.json)")
+    importer.add_argument("--dry-run", action="store_true", help="doar compară, nu scrie nimic")
+    importer.add_argument("--initial-ops", type=int, default=INITIAL_OPS_PER_SECOND)
+    importer.add_argument("--max-ops", type=int, default=MAX_OPS_PER_SECOND)
+    importer.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    exporter = commands.add_parser("export", help="Scrie întrebările ca NDJSON")
+    exporter.add_argument("--show", action="append", help="doar acest show (se poate repeta)")
+    exporter.add_argument("--output", default="-", help="fișierul de ieșire ('-' pentru stdout)")
+
+    args = parser.parse_args(argv)
+    # Mesajele de conectare merg pe stderr: la export, stdout e fișierul NDJSON
+    with redirect_stdout(sys.stderr):
+        db = connect()
+
+    if args.command == "import":
+        if args.path == "-":
+            if not args.format:
+                raise SystemExit("❌ Pentru stdin trebuie dat --format")
+            stream = sys.stdin
+        else:
+            stream = open(args.path, encoding="utf-8", newline="")
+        with stream:
+            stats = import_questions(
+                db, read_records(stream, detect_format(args.path, args.format)),
+                default_show=args.show, dry_run=args.dry_run,
+                initial_ops=args.initial_ops, max_ops=args.max_ops, chunk_size=args.chunk_size
+            )
+        print(json.dumps(stats.summary(), ensure_ascii=False))
+        return 1 if stats.failed else 0
+
+    start = time.time()
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count = export_questions(db, out, args.show)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"✅ {count} întrebări exportate în {time.time() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
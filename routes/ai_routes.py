@@ -1,19 +1,130 @@
-from flask import Blueprint, request, jsonify
-from services.gemini_service import ask_gemini
+from flask import Blueprint, Response, request, jsonify
+import json
+import time
+from services.gemini_service import cached_answer, answer_question, stream_answer, in_flight_stats
+from services.gemini_cache import answer_cache
+from services.executor import PoolSaturatedError
+from services.admission import ai_admission, AdmissionRejected
+from services.show_ids import is_valid_show_id
 
 ai_bp = Blueprint('ai_bp', __name__)
 
+def resolve_client_id(headers, remote_addr):
+    """Identificatorul clientului pentru fairness: header-ul aplicației sau IP-ul"""
+    explicit = headers.get('X-Client-Id')
+    if explicit:
+        return explicit[:128]
+    forwarded = headers.get('X-Forwarded-For', '')
+    return forwarded.split(',')[0].strip() or remote_addr or 'anonim'
+
+def client_id():
+    return resolve_client_id(request.headers, request.remote_addr)
+
+def parse_ask(data):
+    """(întrebare, show_id, eroare) din corpul unei cereri AI"""
+    if not isinstance(data, dict):
+        data = {}
+    question = data.get('question', '')
+    show_id = data.get('show_id')
+    if not isinstance(question, str) or not question.strip():
+        return None, None, 'Missing question'
+    if show_id is not None and not is_valid_show_id(show_id):
+        return None, None, 'Invalid show_id'
+    return question, show_id, None
+
+def rejected_response(error):
+    response = jsonify({'error': error.reason})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status
+
 @ai_bp.route('/ask', methods=['POST'])
 def ask():
-    data = request.get_json()
-    user_question = data.get('question', '')
+    user_question, show_id, error = parse_ask(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
 
-    if not user_question:
-        return jsonify({'error': 'Missing question'}), 400
+    # Răspunsurile din cache nu ocupă deloc pool-ul Gemini
+    answer = cached_answer(user_question, show_id)
+    if answer is not None:
+        return jsonify({'response': answer, 'cached': True})
 
     try:
-        answer = ask_gemini(user_question)
+        answer = answer_question(user_question, show_id, client_id=client_id())
         return jsonify({'response': answer})
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    except TimeoutError:
+        return jsonify({'error': 'Gemini timeout'}), 504
+    except PoolSaturatedError:
+        return jsonify({'error': 'Too many AI requests'}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+@ai_bp.route('/ask/stream', methods=['POST'])
+def ask_stream():
+    """Răspunsul Gemini trimis bucată cu bucată (SSE), cu un eveniment final de sumar"""
+    user_question, show_id, error = parse_ask(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+
+    cached = cached_answer(user_question, show_id)
+
+    # Stream-urile noi ocupă un loc de admisie până la final
+    requester = client_id()
+    admitted = [False]
+    if cached is None:
+        try:
+            ai_admission.acquire(requester)
+            admitted[0] = True
+        except AdmissionRejected as e:
+            return rejected_response(e)
+
+    def release():
+        if admitted[0]:
+            admitted[0] = False
+            ai_admission.release(requester)
+
+    def generate():
+        start_time = time.time()
+        chunks = 0
+        chars = 0
+        source = iter([cached]) if cached is not None else stream_answer(user_question, show_id)
+        try:
+            for text in source:
+                chunks += 1
+                chars += len(text)
+                yield sse_event("chunk", {"text": text})
+            yield sse_event("done", {
+                "chunks": chunks,
+                "chars": chars,
+                "cached": cached is not None,
+                "elapsed_ms": round((time.time() - start_time) * 1000)
+            })
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+        finally:
+            # Clientul s-a deconectat sau am terminat: închidem și stream-ul Gemini
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+            release()
+
+    response = Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    # Eliberăm locul și dacă clientul pleacă înainte de primul octet
+    response.call_on_close(release)
+    return response
+
+@ai_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        **answer_cache.snapshot(),
+        "single_flight": in_flight_stats(),
+        "admission": ai_admission.snapshot()
+    })
+
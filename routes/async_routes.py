@@ -0,0 +1,244 @@
+import asyncio
+import time
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from services import question_listener, question_events, question_index, metrics, health
+from services.response_cache import get_snapshot, negotiate
+from services.gemini_service import cached_answer, answer_question_async, stream_answer_async
+from services.admission import ai_admission, AdmissionRejected
+from services.show_ids import is_valid_show_id
+from routes.ai_routes import resolve_client_id, sse_event, parse_ask
+from routes import quiz_routes, scene_routes
+
+# Variantele asyncio ale endpoint-urilor AI, quiz și scenă (modul ASGI).
+# Întoarc aceleași răspunsuri ca rutele Flask, dar așteptarea după Gemini,
+# Firestore și abonații SSE nu ține ocupat niciun thread. Ce nu e încă în
+# memorie (sursele întrebărilor, listener-ul la prima cerere) se citește în thread-uri,
+# cu același client Firestore sincron: aceleași circuit breakere și cache-uri ca în Flask.
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def client_id(request):
+    return resolve_client_id(request.headers, request.client.host if request.client else None)
+
+
+def rejected_response(error):
+    return JSONResponse({'error': error.reason}, status_code=error.status,
+                        headers={'Retry-After': str(error.retry_after)})
+
+
+def snapshot_response(request, snapshot):
+    status, body, headers = negotiate(
+        snapshot,
+        request.headers.get("Accept-Encoding"),
+        request.headers.get("If-None-Match")
+    )
+    if status == 304:
+        return Response(status_code=304, headers=headers)
+    return Response(body, status_code=status, headers=headers, media_type="application/json")
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return {}
+
+
+async def show_questions(show_id):
+    """Setul show-ului din index fără thread; altfel re-verificarea surselor într-un thread"""
+    cached = question_index.peek_question_set(show_id)
+    if cached is not None:
+        return cached
+    return await asyncio.to_thread(quiz_routes.get_show_questions, show_id)
+
+
+async def active_question_id(show_id):
+    question_id = question_listener.peek_active_question(show_id)
+    if question_id is not None:
+        return question_id
+    # Listener-ul nu e pornit încă sau e deconectat: calea sincronă, într-un thread
+    return await asyncio.to_thread(quiz_routes.get_active_question_live, show_id)
+
+
+async def ask(request):
+    user_question, show_id, error = parse_ask(await read_json(request))
+    if error:
+        return JSONResponse({'error': error}, status_code=400)
+
+    answer = cached_answer(user_question, show_id)
+    if answer is not None:
+        return JSONResponse({'response': answer, 'cached': True})
+
+    try:
+        answer = await answer_question_async(user_question, show_id, client_id=client_id(request))
+        return JSONResponse({'response': answer})
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    except TimeoutError:
+        return JSONResponse({'error': 'Gemini timeout'}, status_code=504)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def ask_stream(request):
+    user_question, show_id, error = parse_ask(await read_json(request))
+    if error:
+        return JSONResponse({'error': error}, status_code=400)
+
+    cached = cached_answer(user_question, show_id)
+
+    requester = client_id(request)
+    admitted = [False]
+    if cached is None:
+        try:
+            await ai_admission.acquire_async(requester)
+            admitted[0] = True
+        except AdmissionRejected as e:
+            return rejected_response(e)
+
+    def release():
+        if admitted[0]:
+            admitted[0] = False
+            ai_admission.release(requester)
+
+    async def cached_source():
+        yield cached
+
+    async def generate():
+        start_time = time.time()
+        chunks = 0
+        chars = 0
+        source = cached_source() if cached is not None else stream_answer_async(user_question, show_id)
+        try:
+            async for text in source:
+                chunks += 1
+                chars += len(text)
+                yield sse_event("chunk", {"text": text})
+            yield sse_event("done", {
+                "chunks": chunks,
+                "chars": chars,
+                "cached": cached is not None,
+                "elapsed_ms": round((time.time() - start_time) * 1000)
+            })
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+        finally:
+            # Clientul s-a deconectat sau am terminat: închidem și stream-ul Gemini
+            await source.aclose()
+            release()
+
+    # BackgroundTask eliberează locul și când stream-ul nu apucă să pornească
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers=SSE_HEADERS, background=BackgroundTask(release))
+
+
+async def current_quiz(request):
+    show_id = request.path_params.get("show_id") or request.query_params.get("show_id") or quiz_routes.DEFAULT_SHOW_ID
+    questions = await show_questions(show_id)
+    question_id = await active_question_id(show_id)
+    return snapshot_response(request, quiz_routes.current_quiz_snapshot(show_id, questions, question_id))
+
+
+async def question_changes(request):
+    show_id = request.path_params["show_id"]
+    try:
+        since = int(request.query_params.get("since", 0))
+    except ValueError:
+        since = 0
+    questions = await show_questions(show_id)
+    question_id = await active_question_id(show_id)
+    return snapshot_response(request, quiz_routes.question_changes_snapshot(show_id, questions, since, question_id))
+
+
+async def current_question(request):
+    show_id = request.path_params["show_id"]
+    question_id = await active_question_id(show_id)
+    active_question = (await show_questions(show_id)).get(question_id)
+    if not active_question:
+        return JSONResponse({"error": "Întrebare activă nu a fost găsită"}, status_code=404)
+
+    payload = quiz_routes.current_question_payload(show_id, active_question, quiz_routes.get_show_title(show_id))
+    return JSONResponse(payload)
+
+
+async def stream_questions(request):
+    show_id = request.path_params["show_id"]
+    if question_events.current(show_id) is None:
+        question_id = await active_question_id(show_id)
+        await asyncio.to_thread(quiz_routes.publish_active_question, show_id, question_id)
+
+    try:
+        last_version = int(request.headers.get("Last-Event-ID", 0))
+    except ValueError:
+        last_version = 0
+
+    return StreamingResponse(question_events.stream_async(show_id, last_version),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def healthz(request):
+    return JSONResponse(health.liveness())
+
+
+async def readyz(request):
+    # Fără așteptarea primei runde: bucla nu se blochează nici măcar la pornire
+    ready, report = health.readiness(wait=0)
+    return JSONResponse(report, status_code=200 if ready else 503)
+
+
+async def exclusive_scene(request):
+    scene_data = scene_routes.peek_scene_data()
+    if scene_data is None:
+        scene_data = await asyncio.to_thread(scene_routes.get_scene_data_with_timeout)
+    snapshot = get_snapshot(("scene_exclusive",), scene_data, lambda: scene_data)
+    return snapshot_response(request, snapshot)
+
+
+def checked_show(handler):
+    """404 pentru un show_id (din cale sau query string) care nu arată ca un id real"""
+    async def wrapper(request):
+        for show_id in (request.path_params.get("show_id"), request.query_params.get("show_id")):
+            if show_id is not None and not is_valid_show_id(show_id):
+                return JSONResponse({"error": "Show inexistent"}, status_code=404)
+        return await handler(request)
+    return wrapper
+
+
+def timed(rule, handler):
+    """Aceleași metrici ca rutele Flask; `rule` e în forma Flask ca seriile să coincidă între moduri"""
+    async def wrapper(request):
+        start = time.perf_counter()
+        metrics.http_in_flight.inc()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.http_in_flight.dec()
+            metrics.observe_request(rule, request.method, status, time.perf_counter() - start)
+    return wrapper
+
+
+routes = [
+    Route("/api/ai/ask", timed("/api/ai/ask", ask), methods=["POST"]),
+    Route("/api/ai/ask/stream", timed("/api/ai/ask/stream", ask_stream), methods=["POST"]),
+    Route("/api/quiz/current", timed("/api/quiz/current", checked_show(current_quiz)), methods=["GET"]),
+    Route("/api/quiz/current/{show_id}",
+          timed("/api/quiz/current/<show_id>", checked_show(current_quiz)), methods=["GET"]),
+    Route("/api/quiz/changes/{show_id}",
+          timed("/api/quiz/changes/<show_id>", checked_show(question_changes)), methods=["GET"]),
+    Route("/api/quiz/current_question/{show_id}",
+          timed("/api/quiz/current_question/<show_id>", checked_show(current_question)), methods=["GET"]),
+    Route("/api/quiz/stream/{show_id}",
+          timed("/api/quiz/stream/<show_id>", checked_show(stream_questions)), methods=["GET"]),
+    Route("/healthz", timed("/healthz", healthz), methods=["GET"]),
+    Route("/readyz", timed("/readyz", readyz), methods=["GET"]),
+    Route("/api/scene/exclusive", timed("/api/scene/exclusive", exclusive_scene), methods=["GET"]),
+]
@@ -0,0 +1,15 @@
+from flask import Blueprint, jsonify
+from services import health
+
+health_bp = Blueprint('health_bp', __name__)
+
+@health_bp.route('/healthz')
+def healthz():
+    """Liveness: procesul răspunde (nu atinge nicio dependență)"""
+    return jsonify(health.liveness())
+
+@health_bp.route('/readyz')
+def readyz():
+    """Readiness din ultimele rezultate ale prober-ului; 503 dacă lipsește o dependență obligatorie"""
+    ready, report = health.readiness()
+    return jsonify(report), 200 if ready else 503
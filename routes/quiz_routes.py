@@ -1,73 +1,69 @@
-from flask import Blueprint, jsonify
-from services.data_loader import load_quiz_data
-import threading
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from services.data_loader import load_quiz_data, peek_quiz_data
 import time
 import os
-import json
 import random
-from firebase_utils import init_firebase
+from firebase_utils import init_firebase, firestore_call
+from services import question_listener, question_events, question_index, answer_ingest, vote_tally, leaderboard, shared_state
+from services.response_cache import get_snapshot, snapshot_response
+from services.show_ids import is_valid_show_id, UnknownShow
+from services.swr_cache import StaleWhileRevalidateCache
+from services.executor import run_with_timeout, pool_stats, PoolSaturatedError
+from services.logs import log_sampled
 
 quiz_bp = Blueprint('quiz_bp', __name__)
 
-# Fișier local pentru a citi întrebarea activă
-ACTIVE_QUESTION_FILE = "active_questions.json"
+# Show-ul servit de /current când clientul nu cere altul (aplicațiile vechi)
+DEFAULT_SHOW_ID = os.getenv("DEFAULT_SHOW_ID", "detectivul_din_canapea")
 
-# Întrebare activă în memorie, pentru când fișierul este șters între reporniri
-_active_questions = {
-    "detectivul_din_canapea": "q1"  # Valoare hardcodată pentru a asigura afișarea
-}
+# Întrebarea afișată când nu avem nimic salvat pentru show
+DEFAULT_QUESTION_ID = "q1"
 
-# Cache pentru quiz-uri
+# Ultimele quiz-uri bune, pentru când citirea eșuează sau expiră
+# (cache-ul propriu-zis, invalidat la schimbarea fișierului, e în data_loader)
 _quiz_data_cache = None
 _last_cache_update = 0
-CACHE_TIMEOUT = 300  # 5 minute
-
-# Inițializează fișierul active_questions.json la pornire
-def initialize_active_questions_file():
-    """Creează fișierul active_questions.json dacă nu există"""
-    if not os.path.exists(ACTIVE_QUESTION_FILE):
-        try:
-            with open(ACTIVE_QUESTION_FILE, 'w') as f:
-                json.dump(_active_questions, f)
-            print(f"✅ Fișierul {ACTIVE_QUESTION_FILE} creat cu succes")
-        except Exception as e:
-            print(f"❌ Eroare la crearea fișierului {ACTIVE_QUESTION_FILE}: {e}")
-
-# Inițializează fișierul la import
-initialize_active_questions_file()
+
+# Date statice de fallback când nu putem citi quiz.json
+FALLBACK_QUIZ = [
+    {
+        "question": "Care este capitala Franței?",
+        "options": ["Paris", "Berlin", "Madrid", "Roma"],
+        "correct": "Paris",
+        "id": "q1"
+    },
+    {
+        "question": "Ce simbol are fluorul?",
+        "options": ["Fl", "F", "Fr", "Fe"],
+        "correct": "F",
+        "id": "q2"
+    },
+    {
+        "question": "Câte continente are planeta Pământ?",
+        "options": ["5", "6", "7", "8"],
+        "correct": "7",
+        "id": "q3"
+    }
+]
 
 def get_quiz_data_with_timeout(timeout=2):
     """Obține datele quiz cu timeout și caching"""
     global _quiz_data_cache, _last_cache_update
 
-    # Verifică cache-ul întâi
+    # Verifică cache-ul întâi: conținutul validat recent nu mai atinge discul
     current_time = time.time()
-    # 💣 Dezactivăm complet cache-ul pentru debugging live (temporar sau permanent)
-    _quiz_data_cache = None
-    _last_cache_update = 0
-
-    result = None
-    timeout_occurred = False
-
-    def fetch_data():
-        nonlocal result
-        try:
-            result = load_quiz_data()
-        except Exception as e:
-            print(f"❌ Eroare la încărcarea quiz-urilor: {e}")
-            result = None
-
-    # Pornește thread-ul pentru a încărca datele
-    thread = threading.Thread(target=fetch_data)
-    thread.daemon = True
-    thread.start()
+    cached = peek_quiz_data()
+    if cached is not None:
+        return cached
 
-    # Așteaptă thread-ul cu timeout
-    thread.join(timeout)
-
-    if thread.is_alive():
-        timeout_occurred = True
-        print(f"⚠️ Timeout la încărcarea quiz-urilor după {timeout} secunde")
+    try:
+        # Citirea rulează în pool-ul partajat pentru disc, cu timeout
+        result = run_with_timeout("disk", load_quiz_data, timeout=timeout)
+    except (TimeoutError, PoolSaturatedError) as e:
+        if isinstance(e, TimeoutError):
+            print(f"⚠️ Timeout la încărcarea quiz-urilor după {timeout} secunde")
+        else:
+            print(f"⚠️ {e}, nu încărcăm quiz-urile acum")
 
         # Returnează cache-ul vechi dacă există
         if _quiz_data_cache is not None:
@@ -75,26 +71,10 @@ def get_quiz_data_with_timeout(timeout=2):
             return _quiz_data_cache
 
         # Altfel returnează date statice de fallback
-        return [
-            {
-                "question": "Care este capitala Franței?",
-                "options": ["Paris", "Berlin", "Madrid", "Roma"],
-                "correct": "Paris",
-                "id": "q1"
-            },
-            {
-                "question": "Ce simbol are fluorul?",
-                "options": ["Fl", "F", "Fr", "Fe"],
-                "correct": "F",
-                "id": "q2"
-            },
-            {
-                "question": "Câte continente are planeta Pământ?",
-                "options": ["5", "6", "7", "8"],
-                "correct": "7",
-                "id": "q3"
-            }
-        ]
+        return FALLBACK_QUIZ
+    except Exception as e:
+        print(f"❌ Eroare la încărcarea quiz-urilor: {e}")
+        result = None
 
     # Verifică rezultatul și actualizează cache-ul dacă este valid
     if result is not None and not isinstance(result, dict) and "error" not in result:
@@ -106,51 +86,12 @@ def get_quiz_data_with_timeout(timeout=2):
         print("⚠️ Eroare la obținerea quiz-urilor, folosim cache-ul vechi")
         return _quiz_data_cache
 
-    return [
-        {
-            "question": "Care este capitala Franței?",
-            "options": ["Paris", "Berlin", "Madrid", "Roma"],
-            "correct": "Paris",
-            "id": "q1"
-        },
-        {
-            "question": "Ce simbol are fluorul?",
-            "options": ["Fl", "F", "Fr", "Fe"],
-            "correct": "F",
-            "id": "q2"
-        },
-        {
-            "question": "Câte continente are planeta Pământ?",
-            "options": ["5", "6", "7", "8"],
-            "correct": "7",
-            "id": "q3"
-        }
-    ]
+    return FALLBACK_QUIZ
 
 def save_active_question_local(show_id, question_id):
-    """Salvează întrebarea activă în fișier și memoria locală"""
-    global _active_questions
-
-    # Actualizează dicționarul în memorie
-    _active_questions[show_id] = question_id
-
-    # Salvează și în fișier pentru persistență între cereri
+    """Salvează întrebarea activă în starea partajată de toți workerii"""
     try:
-        # Asigură-te că fișierul există înainte de a-l citi
-        initialize_active_questions_file()
-
-        # Încearcă să citești conținutul existent dacă există
-        try:
-            with open(ACTIVE_QUESTION_FILE, 'r') as f:
-                active_questions = json.load(f)
-        except Exception:
-            active_questions = {}
-
-        # Actualizează și salvează înapoi
-        active_questions[show_id] = question_id
-        with open(ACTIVE_QUESTION_FILE, 'w') as f:
-            json.dump(active_questions, f)
-
+        shared_state.set_active(show_id, question_id)
         print(f"✅ Întrebare salvată: {question_id} pentru show: {show_id}")
         return True
     except Exception as e:
@@ -158,159 +99,302 @@ def save_active_question_local(show_id, question_id):
         return False
 
 def get_active_question_live(show_id):
-    """Obține întrebarea activă din Firebase metadata/status"""
-    try:
-        db = init_firebase()
-        if not db:
-            print("⚠️ Firebase indisponibil, fallback pe local")
-            return get_active_question_local(show_id)
-
-        doc_ref = db.collection('shows').document(show_id).collection('metadata').document('status')
-        doc = doc_ref.get()
-        if doc.exists:
-            data = doc.to_dict()
-            return data.get("current_question_id", "q1")
-        else:
-            print("⚠️ Documentul status nu există")
-    except Exception as e:
-        print(f"🔥 Eroare la citirea întrebării active din Firebase: {e}")
+    """Obține întrebarea activă din listener-ul Firestore ținut în memorie"""
+    question_id = question_listener.get_active_question(show_id)
+    if question_id is not None:
+        return question_id
 
+    # Listener-ul nu e conectat sau valoarea e veche: cădem pe local
     return get_active_question_local(show_id)
 
 def get_active_question_local(show_id):
-    """Obține întrebarea activă din fișierul local"""
-    try:
-        with open(ACTIVE_QUESTION_FILE, 'r') as f:
-            active_questions = json.load(f)
-            return active_questions.get(show_id, "q1")
-    except Exception as e:
-        print(f"⚠️ Eroare la citirea fișierului local: {e}")
-        return _active_questions.get(show_id, "q1")
-
-def reorder_questions_with_active_first(questions, active_id):
-    """Reordonează întrebările pentru a pune întrebarea activă prima"""
-    if not active_id:
-        print("⚠️ Nu există întrebare activă, nu reordonăm")
-        return questions
-
-    print(f"🔍 Căutăm întrebarea activă cu ID: {active_id} în {len(questions)} întrebări")
-
-    # Logăm toate ID-urile pentru a vedea ce avem
-    question_ids = []
-    for q in questions:
-        q_id = q.get("id", "MISSING_ID")
-        question_ids.append(q_id)
-
-    print(f"📋 ID-uri disponibile: {question_ids}")
-
-    active_question = None
-    other_questions = []
-
-    for q in questions:
-        # Verificăm fiecare întrebare pentru potrivire ID
-        q_id = q.get("id", "MISSING_ID")
-        if q_id == active_id:
-            print(f"✅ Am găsit întrebarea activă: {q_id}")
-            active_question = q
-        else:
-            other_questions.append(q)
-
-    if active_question:
-        print(f"✅ Punem întrebarea activă ({active_id}) prima în listă")
-        return [active_question] + other_questions
-    else:
-        print(f"❌ Întrebarea activă cu ID {active_id} nu a fost găsită în lista de întrebări!")
+    """Obține întrebarea activă din starea partajată (citire din memorie)"""
+    return shared_state.get_active(show_id, DEFAULT_QUESTION_ID)
+
+def get_show_questions(show_id):
+    """Întrebările show-ului din indexul per show (fișier propriu, Firestore sau quiz.json)"""
+    return question_index.get_question_set(show_id, get_quiz_data_with_timeout)
+
+def load_show_title(show_id):
+    """Titlul emisiunii din Firestore (formatat din show_id dacă documentul nu are unul)"""
+    fallback = show_id.replace("_", " ").title()
+    db = init_firebase()
+    if db is None:
+        raise RuntimeError("Firebase indisponibil")
+    with firestore_call("get_show"):
+        doc = db.collection("shows").document(show_id).get()
+    return (doc.to_dict() or {}).get("title", fallback) if doc.exists else fallback
 
-    return questions
+# Titlurile se schimbă rar: se citesc în fundal, cererile doar din memorie
+SHOW_TITLE_TTL = 600
+show_titles = StaleWhileRevalidateCache("show_titles", load_show_title, SHOW_TITLE_TTL)
 
 def get_show_title(show_id):
-    """Obține titlul emisiunii din Firebase (fallback: formatat din show_id)"""
-    try:
-        db = init_firebase()
-        doc = db.collection("shows").document(show_id).get()
-        if doc.exists:
-            return doc.to_dict().get("title", show_id.replace("_", " ").title())
-    except Exception as e:
-        print(f"⚠️ Eroare la citirea titlului pentru {show_id}: {e}")
-    return show_id.replace("_", " ").title()
+    """Titlul emisiunii din cache; până la prima încărcare, formatat din show_id"""
+    return show_titles.lookup(show_id).value or show_id.replace("_", " ").title()
+
+def publish_active_question(show_id, question_id):
+    """Trimite noua întrebare activă către toți abonații SSE ai show-ului"""
+    latest = question_events.current_payload(show_id)
+    if latest is not None and latest.get("question_id") == question_id:
+        return
+
+    question = get_show_questions(show_id).get(question_id) if question_id else None
+
+    question_events.publish(show_id, {
+        "show_id": show_id,
+        "question_id": question_id,
+        "question": question
+    })
+
+def record_active_question(show_id, question_id):
+    """Schimbările văzute de listener intră și în starea partajată (versiunea show-ului)"""
+    if question_id is not None:
+        shared_state.set_active(show_id, question_id)
+
+# Listener-ul Firestore ne anunță orice schimbare făcută din orice proces
+question_listener.add_change_callback(publish_active_question)
+question_listener.add_change_callback(record_active_question)
+answer_ingest.add_written_callback(leaderboard.score_written_answer)
+answer_ingest.add_written_callback(vote_tally.record_written_vote)
+
+@quiz_bp.before_request
+def reject_invalid_show_id():
+    """show_id din URL sau query string trebuie să arate ca un id de show real"""
+    for show_id in ((request.view_args or {}).get("show_id"), request.args.get("show_id")):
+        if show_id is not None and not is_valid_show_id(show_id):
+            return jsonify({"error": "Show inexistent"}), 404
+
+@quiz_bp.errorhandler(UnknownShow)
+def unknown_show(e):
+    return jsonify({"error": "Show inexistent"}), 404
 
 @quiz_bp.route('/debug', methods=['GET'])
 def debug_quiz():
     """Endpoint de debug pentru a inspecta toate datele relevante"""
-    all_questions = get_quiz_data_with_timeout()
-    active_question_id = get_active_question_live("detectivul_din_canapea")
-
-    # Verifică dacă întrebarea activă există în lista de întrebări
-    active_found = False
-    question_ids = []
-
-    for q in all_questions:
-        q_id = q.get("id", "MISSING_ID")
-        question_ids.append(q_id)
-        if q_id == active_question_id:
-            active_found = True
+    show_id = request.args.get("show_id", DEFAULT_SHOW_ID)
+    questions = get_show_questions(show_id)
+    active_question_id = get_active_question_live(show_id)
 
     # Returnează toate informațiile pentru debugging
     debug_info = {
+        "show_id": show_id,
         "active_question_id": active_question_id,
-        "active_found_in_questions": active_found,
-        "question_ids": question_ids,
-        "questions_count": len(all_questions),
-        "active_questions_file_exists": os.path.exists(ACTIVE_QUESTION_FILE),
-        "active_questions_in_memory": _active_questions
+        "active_found_in_questions": questions.get(active_question_id) is not None,
+        "question_ids": questions.ids(),
+        "questions_count": len(questions),
+        "question_source": questions.source,
+        "question_index": question_index.index_status(),
+        "active_questions_shared": shared_state.active_snapshot(),
+        "shared_state": shared_state.store_status(),
+        "listeners": question_listener.listener_status(),
+        "executor_pools": pool_stats(),
+        "answer_buffer": answer_ingest.answer_buffer.snapshot()
     }
 
-    # Adaugă conținutul fișierului active_questions.json dacă există
-    if os.path.exists(ACTIVE_QUESTION_FILE):
-        try:
-            with open(ACTIVE_QUESTION_FILE, 'r') as f:
-                debug_info["active_questions_file_content"] = json.load(f)
-        except Exception as e:
-            debug_info["active_questions_file_error"] = str(e)
-
     return jsonify(debug_info)
 
+def current_quiz_snapshot(show_id, questions, active_question_id):
+    """Lista de întrebări cu cea activă prima, serializată o singură dată per combinație"""
+    # Serializăm doar când se schimbă întrebarea activă sau setul show-ului;
+    # restul cererilor primesc aceiași octeți (sau 304 pe ETag)
+    return get_snapshot(("quiz_current", show_id, active_question_id), questions,
+                        lambda: questions.active_first(active_question_id))
+
+def active_first(questions, active_question_id):
+    """Lista cu întrebarea activă prima (pentru liste care nu sunt un QuestionSet)"""
+    active = [q for q in questions if q.get("id") == active_question_id]
+    return active + [q for q in questions if q.get("id") != active_question_id]
+
+def current_question_payload(show_id, active_question, show_title):
+    """Corpul răspunsului pentru /current_question"""
+    return {
+        "show_id": show_id,
+        "show_title": show_title,
+        "question": active_question["question"],
+        "options": active_question["options"],
+        "correct": active_question["correct"],
+        "id": active_question["id"]
+    }
+
+def question_changes_snapshot(show_id, questions, since, active_question_id):
+    """Doar ce s-a schimbat după versiunea since; lista completă dacă clientul e prea în urmă"""
+    version, delta = shared_state.show_changes(show_id, since)
+    if delta is None:
+        # Lista completă e cea a versiunii anunțate, din starea partajată; setul
+        # local (de exemplu rezerva quiz.json a unui worker) merge doar cu versiunea 0
+        version, stored = shared_state.show_questions(show_id)
+        if stored is None:
+            return get_snapshot(("quiz_changes", show_id, "full", 0, active_question_id), questions, lambda: {
+                "show_id": show_id,
+                "version": 0,
+                "full": True,
+                "active_question_id": active_question_id,
+                "questions": questions.active_first(active_question_id)
+            })
+        return get_snapshot(("quiz_changes", show_id, "full", version, active_question_id), stored, lambda: {
+            "show_id": show_id,
+            "version": version,
+            "full": True,
+            "active_question_id": active_question_id,
+            "questions": active_first(list(stored.values()), active_question_id)
+        })
+
+    def render():
+        payload = {
+            "show_id": show_id,
+            "version": version,
+            "full": False,
+            "edited": delta["edited"],
+            "removed": delta["removed"]
+        }
+        if "active" in delta:
+            payload["active_question_id"] = delta["active"]
+        return payload
+    # Clienții la zi cer toți același since; delta se serializează o dată per versiune
+    return get_snapshot(("quiz_changes", show_id, since, version), questions, render)
+
 @quiz_bp.route('/current', methods=['GET'])
-def get_current_quiz():
+@quiz_bp.route('/current/<show_id>', methods=['GET'])
+def get_current_quiz(show_id=None):
     start_time = time.time()
+    show_id = show_id or request.args.get("show_id") or DEFAULT_SHOW_ID
 
-    # Obține quiz-urile cu timeout și caching
-    all_questions = get_quiz_data_with_timeout()
+    # Întrebările show-ului, din indexul per show
+    questions = get_show_questions(show_id)
 
     # Verifică dacă există o întrebare activă
-    active_question_id = get_active_question_live("detectivul_din_canapea")
-    print(f"🔍 Întrebare activă: {active_question_id}")
+    active_question_id = get_active_question_live(show_id)
 
-    # Reordonează întrebările pentru a pune întrebarea activă prima
-    if active_question_id:
-        all_questions = reorder_questions_with_active_first(all_questions, active_question_id)
+    snapshot = current_quiz_snapshot(show_id, questions, active_question_id)
 
-    # Calculează timpul de procesare
+    # Calculează timpul de procesare (histograma per rută e în /metrics)
     processing_time = time.time() - start_time
-    print(f"⏱️ Timp procesare quiz: {processing_time:.2f} secunde")
+    log_sampled("quiz_current", show_id=show_id, active_question_id=active_question_id,
+                elapsed_ms=round(processing_time * 1000, 2))
 
     # Returnează lista completă de întrebări, cu cea activă prima
-    return jsonify(all_questions)
+    return snapshot_response(snapshot)
+
+@quiz_bp.route("/changes/<show_id>")
+def get_question_changes(show_id):
+    """Sincronizare incrementală: întrebarea activă nouă, întrebările editate și cele șterse"""
+    since = request.args.get("since", 0, type=int)
+    questions = get_show_questions(show_id)
+    active_question_id = get_active_question_live(show_id)
+    return snapshot_response(question_changes_snapshot(show_id, questions, since, active_question_id))
 
 @quiz_bp.route("/current_question/<show_id>")
 def get_current_question(show_id):
     # Citim întrebarea activă
     active_question_id = get_active_question_live(show_id)
 
-    # Încărcăm toate întrebările
-    questions = get_quiz_data_with_timeout()
+    # Căutare directă în indexul show-ului
+    active_question = get_show_questions(show_id).get(active_question_id)
+
+    if not active_question:
+        return jsonify({"error": "Întrebare activă nu a fost găsită"}), 404
+
+    return jsonify(current_question_payload(show_id, active_question, get_show_title(show_id)))
+
+@quiz_bp.route("/stream/<show_id>")
+def stream_questions(show_id):
+    """Server-Sent Events: împinge întrebarea activă în momentul în care se schimbă"""
+    if question_events.current(show_id) is None:
+        publish_active_question(show_id, get_active_question_live(show_id))
 
-    # Căutăm întrebarea activă în listă
-    active_question = next((q for q in questions if q["id"] == active_question_id), None)
+    try:
+        last_version = int(request.headers.get("Last-Event-ID", 0))
+    except ValueError:
+        last_version = 0
+
+    return Response(
+        stream_with_context(question_events.stream(show_id, last_version)),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
 
+# Limite simple pentru id-ul trimis de aplicație (devine parte din id-ul documentului)
+MAX_USER_ID_LENGTH = 128
+
+@quiz_bp.route("/answer/<show_id>", methods=["POST"])
+def submit_answer(show_id):
+    """Primește răspunsul unui spectator și îl confirmă imediat (scrierea e în fundal)"""
+    data = request.get_json(silent=True) or {}
+    user_id = str(data.get("user_id", "")).strip()
+    answer = data.get("answer")
+    question_id = data.get("question_id")
+
+    if not user_id or len(user_id) > MAX_USER_ID_LENGTH or "/" in user_id:
+        return jsonify({"error": "user_id lipsă sau invalid"}), 400
+    if not answer:
+        return jsonify({"error": "Lipsește răspunsul"}), 400
+
+    # Validăm față de întrebarea activă din memorie, fără apeluri de rețea
+    active_question_id = get_active_question_live(show_id)
+    if question_id and question_id != active_question_id:
+        return jsonify({"error": "Întrebarea nu mai este activă", "active_question_id": active_question_id}), 409
+
+    active_question = get_show_questions(show_id).get(active_question_id)
     if not active_question:
         return jsonify({"error": "Întrebare activă nu a fost găsită"}), 404
+    if answer not in active_question.get("options", ()):
+        return jsonify({"error": "Răspuns invalid"}), 400
+
+    correct = answer == active_question.get("correct")
+    if not answer_ingest.submit_answer(show_id, active_question_id, user_id, answer, correct):
+        # Buffer-ul e plin: clientul să reîncerce puțin mai târziu
+        response = jsonify({"error": "Prea multe răspunsuri, reîncearcă"})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+
+    # Punctele și votul se numără după ce răspunsul e scris (o singură dată, la orice worker)
+    return jsonify({"status": "accepted", "question_id": active_question_id}), 202
+
+@quiz_bp.route("/leaderboard/<show_id>")
+def get_leaderboard(show_id):
+    """Top-K pentru show și, opțional, rangul unui utilizator (?user_id=)"""
+    try:
+        limit = min(int(request.args.get("limit", leaderboard.DEFAULT_TOP)), leaderboard.MAX_TOP)
+    except ValueError:
+        limit = leaderboard.DEFAULT_TOP
+
+    board = leaderboard.get_show_leaderboard(show_id).board
+    result = {
+        "show_id": show_id,
+        "participants": len(board),
+        "top": board.top(max(limit, 1))
+    }
+
+    user_id = request.args.get("user_id")
+    if user_id:
+        position = board.rank(user_id)
+        result["user"] = {"user_id": user_id, "rank": position[0], "score": position[1]} if position else None
+
+    return jsonify(result)
+
+@quiz_bp.route("/tally/<show_id>")
+def get_tally(show_id):
+    """Voturile live pentru întrebarea activă (sau ?question_id=), citite din memorie"""
+    active_question_id = get_active_question_live(show_id)
+    question_id = request.args.get("question_id") or active_question_id
+    question = get_show_questions(show_id).get(question_id)
+    if not question:
+        return jsonify({"error": "Întrebare inexistentă"}), 404
+
+    # Doar întrebarea activă pornește o numărătoare nouă; pentru celelalte
+    # răspundem din ce numărăm deja (întrebările recente), fără citiri Firestore
+    counts, total = vote_tally.read_tally(show_id, question_id, track=question_id == active_question_id)
+
+    # Opțiunile fără voturi apar cu 0, în ordinea din întrebare
+    counts = {option: counts.get(option, 0) for option in question.get("options", ())}
 
     return jsonify({
         "show_id": show_id,
-        "show_title": get_show_title(show_id),
-        "question": active_question["question"],
-        "options": active_question["options"],
-        "correct": active_question["correct"],
-        "id": active_question["id"]
+        "question_id": question_id,
+        "counts": counts,
+        "total": total
     })
@@ -1,8 +1,11 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint
 import json
 import os
-import threading
 import time
+from services.response_cache import get_snapshot, snapshot_response
+from services.executor import run_with_timeout, PoolSaturatedError
+from services import metrics
+from services.logs import log_sampled
 
 scene_bp = Blueprint('scene_bp', __name__)
 
@@ -11,6 +14,28 @@ _scene_data_cache = None
 _last_cache_update = 0
 CACHE_TIMEOUT = 300  # 5 minute
 
+# Date statice de fallback când nu putem citi scenes.json
+FALLBACK_SCENE = {
+    "title": "Backstage Exclusive",
+    "description": "Acces VIP la o scenă never publicată. Doar pentru tine.",
+    "video_url": "https://example.com/exclusive-scene.mp4"
+}
+
+def load_scene():
+    """Citește prima scenă din data/scenes.json"""
+    path = os.path.join('data', 'scenes.json')
+    with metrics.backend_call("disk", "scenes_json"):
+        with open(path, 'r', encoding='utf-8') as f:
+            scenes = json.load(f)
+    return scenes[0] if scenes else None
+
+def peek_scene_data():
+    """Scena din cache dacă e încă validă, fără să atingă discul"""
+    if _scene_data_cache is not None and (time.time() - _last_cache_update) < CACHE_TIMEOUT:
+        metrics.cache_hit("scene")
+        return _scene_data_cache
+    return None
+
 def get_scene_data_with_timeout(timeout=2):
     """Obține datele de scenă cu timeout și caching"""
     global _scene_data_cache, _last_cache_update
@@ -18,34 +43,18 @@ def get_scene_data_with_timeout(timeout=2):
     # Verifică cache-ul întâi
     current_time = time.time()
     if _scene_data_cache is not None and (current_time - _last_cache_update) < CACHE_TIMEOUT:
-        print("💾 Folosind date scenă din cache")
+        metrics.cache_hit("scene")
         return _scene_data_cache
-    
-    result = None
-    timeout_occurred = False
-    
-    def fetch_data():
-        nonlocal result
-        try:
-            path = os.path.join('data', 'scenes.json')
-            with open(path, 'r', encoding='utf-8') as f:
-                scenes = json.load(f)
-            result = scenes[0] if scenes else None
-        except Exception as e:
-            print(f"❌ Eroare la încărcarea scenelor: {e}")
-            result = None
-    
-    # Pornește thread-ul pentru a încărca datele
-    thread = threading.Thread(target=fetch_data)
-    thread.daemon = True
-    thread.start()
-    
-    # Așteaptă thread-ul cu timeout
-    thread.join(timeout)
-    
-    if thread.is_alive():
-        timeout_occurred = True
-        print(f"⚠️ Timeout la încărcarea scenelor după {timeout} secunde")
+
+    metrics.cache_miss("scene")
+    try:
+        # Citirea rulează în pool-ul partajat pentru disc, cu timeout
+        result = run_with_timeout("disk", load_scene, timeout=timeout)
+    except (TimeoutError, PoolSaturatedError) as e:
+        if isinstance(e, TimeoutError):
+            print(f"⚠️ Timeout la încărcarea scenelor după {timeout} secunde")
+        else:
+            print(f"⚠️ {e}, nu încărcăm scenele acum")
         
         # Returnează cache-ul vechi dacă există
         if _scene_data_cache is not None:
@@ -53,11 +62,10 @@ def get_scene_data_with_timeout(timeout=2):
             return _scene_data_cache
         
         # Altfel returnează date statice de fallback
-        return {
-            "title": "Backstage Exclusive",
-            "description": "Acces VIP la o scenă never publicată. Doar pentru tine.",
-            "video_url": "https://example.com/exclusive-scene.mp4"
-        }
+        return FALLBACK_SCENE
+    except Exception as e:
+        print(f"❌ Eroare la încărcarea scenelor: {e}")
+        result = None
     
     # Verifică rezultatul și actualizează cache-ul dacă este valid
     if result is not None:
@@ -71,11 +79,7 @@ def get_scene_data_with_timeout(timeout=2):
         return _scene_data_cache
     
     # Ultimul resort - date statice
-    return {
-        "title": "Backstage Exclusive",
-        "description": "Acces VIP la o scenă never publicată. Doar pentru tine.",
-        "video_url": "https://example.com/exclusive-scene.mp4"
-    }
+    return FALLBACK_SCENE
 
 @scene_bp.route('/exclusive', methods=['GET'])
 def get_exclusive_scene():
@@ -84,8 +88,10 @@ def get_exclusive_scene():
     # Obține scenele cu timeout și caching
     scene_data = get_scene_data_with_timeout()
     
-    # Calculează timpul de procesare
+    # Calculează timpul de procesare (histograma per rută e în /metrics)
     processing_time = time.time() - start_time
-    print(f"⏱️ Timp procesare scenă: {processing_time:.2f} secunde")
+    log_sampled("scene_exclusive", elapsed_ms=round(processing_time * 1000, 2))
     
-    return jsonify(scene_data)
+    # Scena din cache este serializată o singură dată
+    snapshot = get_snapshot(("scene_exclusive",), scene_data, lambda: scene_data)
+    return snapshot_response(snapshot)
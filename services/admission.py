@@ -0,0 +1,258 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# Controlul admisiei pentru traficul AI.
+# Un token bucket limitează ritmul apelurilor la cota Gemini (împărțită la
+# numărul de workeri), un plafon de concurență împiedică /api/ai/ask să
+# ocupe toți workerii, iar cererile care nu pot fi servite la timp sunt
+# refuzate imediat (429/503 cu Retry-After) în loc să aștepte degeaba.
+# Coada de așteptare e servită round-robin pe client, ca un singur client
+# zgomotos să nu-i blocheze pe ceilalți. Cererile din modul ASGI așteaptă în
+# aceeași coadă, dar pe un future asyncio, fără să țină ocupat vreun thread.
+
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "600"))
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+AI_RATE = GEMINI_RPM / 60 / WORKERS                       # apeluri pe secundă per worker
+AI_BURST = int(os.getenv("AI_BURST", str(max(1, int(AI_RATE * 2)))))
+AI_MAX_CONCURRENT = int(os.getenv("AI_MAX_CONCURRENT", "16"))
+AI_MAX_QUEUE = int(os.getenv("AI_MAX_QUEUE", "64"))
+AI_MAX_WAIT = float(os.getenv("AI_MAX_WAIT", "5"))        # secunde, termenul limită în coadă
+AI_MAX_PER_CLIENT = int(os.getenv("AI_MAX_PER_CLIENT", "4"))
+
+
+class AdmissionRejected(Exception):
+    """Cererea a fost refuzată; status și retry_after merg direct în răspunsul HTTP"""
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until_token(self):
+        self._refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+
+class _AsyncTicket:
+    """Locul din coadă al unei cereri asyncio; admiterea se decide sub lacătul controller-ului"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.admitted = False
+        self.retry = None          # timer-ul pentru următorul token, dacă e programat
+
+    def wake(self):
+        # Rulează în bucla cererii
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdmissionController:
+    """Token bucket + plafon de concurență + coadă mărginită cu fairness per client"""
+
+    def __init__(self, rate=AI_RATE, burst=AI_BURST, max_concurrent=AI_MAX_CONCURRENT,
+                 max_queue=AI_MAX_QUEUE, max_wait=AI_MAX_WAIT, max_per_client=AI_MAX_PER_CLIENT):
+        self.bucket = TokenBucket(rate, burst)
+        self.rate = rate
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_per_client = max_per_client
+        self.active = 0
+        self._per_client = {}
+        self._queues = OrderedDict()   # client -> deque de cereri în așteptare (ordinea = rândul)
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self.stats = {"admitted": 0, "rejected_client": 0, "rejected_queue": 0, "shed_deadline": 0}
+
+    def _estimated_wait(self):
+        # Fiecare cerere din fața noastră consumă un token
+        self.bucket.time_until_token()
+        return max(0, self._waiting + 1 - self.bucket.tokens) / self.rate
+
+    def _is_next(self, client_id, ticket):
+        if not self._queues:
+            return False
+        first_client = next(iter(self._queues))
+        return first_client == client_id and self._queues[client_id][0] is ticket
+
+    def _dequeue(self, client_id, ticket, rotate=True):
+        queue = self._queues[client_id]
+        queue.remove(ticket)
+        self._waiting -= 1
+        if queue:
+            # Clientul admis trece la coada rotației ca să le vină rândul și altora
+            if rotate:
+                self._queues.move_to_end(client_id)
+        else:
+            del self._queues[client_id]
+
+    def _release_client(self, client_id):
+        count = self._per_client.get(client_id, 0) - 1
+        if count > 0:
+            self._per_client[client_id] = count
+        else:
+            self._per_client.pop(client_id, None)
+
+    def _enqueue(self, client_id, ticket, max_wait):
+        """Verifică limitele și pune tichetul la rând (apelat sub lock)"""
+        if self._per_client.get(client_id, 0) >= self.max_per_client:
+            self.stats["rejected_client"] += 1
+            raise AdmissionRejected(429, 1, "Prea multe cereri AI de la același client")
+
+        estimate = self._estimated_wait()
+        if self._waiting >= self.max_queue or estimate > max_wait:
+            self.stats["rejected_queue"] += 1
+            raise AdmissionRejected(503, estimate, "Coada AI este plină")
+
+        self._queues.setdefault(client_id, deque()).append(ticket)
+        self._waiting += 1
+        self._per_client[client_id] = self._per_client.get(client_id, 0) + 1
+
+    def _admit(self, client_id, ticket):
+        self.bucket.take()
+        self._dequeue(client_id, ticket)
+        self.active += 1
+        self.stats["admitted"] += 1
+
+    def _abandon(self, client_id, ticket):
+        """Tichetul renunță la loc (termen expirat, anulare, eroare)"""
+        if ticket in self._queues.get(client_id, ()):
+            self._dequeue(client_id, ticket, rotate=False)
+        self._release_client(client_id)
+        self._changed()
+
+    def _changed(self):
+        """Starea s-a schimbat: thread-urile verifică din nou, iar tichetele asyncio sunt admise aici"""
+        self._condition.notify_all()
+        while self._queues and self.active < self.max_concurrent:
+            client_id = next(iter(self._queues))
+            ticket = self._queues[client_id][0]
+            if not isinstance(ticket, _AsyncTicket):
+                return
+            token_wait = self.bucket.time_until_token()
+            if token_wait > 0:
+                if ticket.retry is None:
+                    ticket.retry = True
+                    ticket.loop.call_soon_threadsafe(self._schedule_retry, ticket, token_wait)
+                return
+            self._admit(client_id, ticket)
+            ticket.admitted = True
+            ticket.loop.call_soon_threadsafe(ticket.wake)
+            # Următorul din rând poate fi un thread
+            self._condition.notify_all()
+
+    def _schedule_retry(self, ticket, delay):
+        ticket.retry = ticket.loop.call_later(delay, self._retry, ticket)
+
+    def _retry(self, ticket):
+        with self._condition:
+            ticket.retry = None
+            self._changed()
+
+    def acquire(self, client_id, max_wait=None):
+        """Blochează până la admitere sau ridică AdmissionRejected"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        with self._condition:
+            ticket = object()
+            self._enqueue(client_id, ticket, max_wait)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    remaining = deadline - now
+                    wait = remaining
+                    if self._is_next(client_id, ticket) and self.active < self.max_concurrent:
+                        token_wait = self.bucket.time_until_token()
+                        if token_wait == 0:
+                            self._admit(client_id, ticket)
+                            self._changed()
+                            return
+                        wait = min(wait, token_wait)
+                    if remaining <= 0:
+                        self.stats["shed_deadline"] += 1
+                        raise AdmissionRejected(503, self._estimated_wait(), "Termenul de așteptare a expirat")
+                    self._condition.wait(wait)
+            except BaseException:
+                self._abandon(client_id, ticket)
+                raise
+
+    async def acquire_async(self, client_id, max_wait=None):
+        """acquire() pentru bucla asyncio: așteaptă pe un future, nu într-un thread"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        ticket = _AsyncTicket(asyncio.get_running_loop())
+        with self._condition:
+            self._enqueue(client_id, ticket, max_wait)
+            self._changed()
+
+        try:
+            await asyncio.wait_for(ticket.future, max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._condition:
+                # Admiterea poate veni chiar între expirare și lacăt
+                if not ticket.admitted:
+                    self._abandon(client_id, ticket)
+                    if isinstance(e, asyncio.CancelledError):
+                        raise
+                    self.stats["shed_deadline"] += 1
+                    raise AdmissionRejected(503, self._estimated_wait(), "Termenul de așteptare a expirat")
+            if isinstance(e, asyncio.CancelledError):
+                self.release(client_id)
+                raise
+        finally:
+            if isinstance(ticket.retry, asyncio.TimerHandle):
+                ticket.retry.cancel()
+
+    def release(self, client_id):
+        with self._condition:
+            self.active -= 1
+            self._release_client(client_id)
+            self._changed()
+
+    @contextmanager
+    def admit(self, client_id, max_wait=None):
+        self.acquire(client_id, max_wait)
+        try:
+            yield
+        finally:
+            self.release(client_id)
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                **self.stats,
+                "active": self.active,
+                "waiting": self._waiting,
+                "rate_per_second": round(self.rate, 3),
+                "max_concurrent": self.max_concurrent,
+            }
+
+
+ai_admission = AdmissionController()
@@ -0,0 +1,190 @@
+import atexit
+import collections
+import os
+import threading
+import time
+from firebase_utils import init_firebase
+
+# Ingestie write-behind pentru răspunsurile publicului.
+# Cererea HTTP doar pune răspunsul în buffer și confirmă imediat; un thread
+# de fundal scrie în Firestore cu WriteBatch (maxim 500 de operații) când
+# se strâng destule răspunsuri sau a trecut intervalul de flush.
+# Id-ul documentului este determinist (întrebare + utilizator) și se scrie cu
+# create: primul răspuns al utilizatorului rămâne, re-trimiterile (la orice
+# worker, și după un restart) sunt ignorate. Doar răspunsurile scrise acum
+# pentru prima dată ajung la callback-uri (clasamentul), deci punctele nu se
+# acordă de două ori.
+
+BATCH_SIZE = 500          # limita Firestore pentru un WriteBatch
+FLUSH_INTERVAL = 0.5      # secunde între flush-uri când traficul e mic
+MAX_BUFFERED = 50000      # peste atât refuzăm (backpressure)
+RETRY_MIN_DELAY = 0.5
+RETRY_MAX_DELAY = 10
+SHUTDOWN_TIMEOUT = 10     # cât încercăm să golim buffer-ul la oprire
+
+
+class AnswerBuffer:
+    """Buffer în memorie golit periodic în Firestore cu scrieri în batch"""
+
+    def __init__(self, db_factory=init_firebase, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, max_buffered=MAX_BUFFERED):
+        self.db_factory = db_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._pending = collections.deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._retry_delay = RETRY_MIN_DELAY
+        self.stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "duplicates": 0,
+        }
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, show_id, doc_id, data):
+        """Pune un răspuns în buffer; False dacă buffer-ul e plin"""
+        self._ensure_thread()
+        with self._condition:
+            if len(self._pending) >= self.max_buffered:
+                self.stats["rejected"] += 1
+                return False
+            self._pending.append((show_id, doc_id, data))
+            self.stats["accepted"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+        return True
+
+    def _ensure_thread(self):
+        # Thread-ul de flush pornește la prima utilizare, în procesul curent
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+        with self._condition:
+            if self._thread is None or self._pid != pid or not self._thread.is_alive():
+                self._pid = pid
+                self._thread = threading.Thread(target=self._run, name="answer-flusher")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _take_batch(self):
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popleft())
+        return batch
+
+    def _run(self):
+        while not self._stopping:
+            with self._condition:
+                if len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                batch = self._take_batch()
+            if batch and not self._write(batch):
+                time.sleep(self._retry_delay)
+                self._retry_delay = min(self._retry_delay * 2, RETRY_MAX_DELAY)
+
+    def _write(self, items):
+        """Scrie un batch; la eșec îl pune înapoi în fața cozii"""
+        try:
+            db = self.db_factory()
+            if not db:
+                raise RuntimeError("Firebase indisponibil")
+            refs = {}
+            for show_id, doc_id, data in items:
+                ref = db.collection('shows').document(show_id).collection('answers').document(doc_id)
+                # În același batch contează doar primul răspuns
+                refs.setdefault(ref.path, (ref, (show_id, doc_id, data)))
+            existing = {snap.reference.path for snap in db.get_all([ref for ref, _ in refs.values()]) if snap.exists}
+            new = [(ref, item) for path, (ref, item) in refs.items() if path not in existing]
+            if new:
+                batch = db.batch()
+                for ref, (_, _, data) in new:
+                    # Dacă alt worker a scris între timp, create eșuează și batch-ul se reia
+                    batch.create(ref, data)
+                batch.commit()
+        except Exception as e:
+            print(f"🔥 Eroare la scrierea a {len(items)} răspunsuri: {e}")
+            with self._condition:
+                self._pending.extendleft(reversed(items))
+                self.stats["failed_batches"] += 1
+            return False
+
+        with self._condition:
+            self.stats["written"] += len(new)
+            self.stats["duplicates"] += len(items) - len(new)
+            self.stats["batches"] += 1
+        self._retry_delay = RETRY_MIN_DELAY
+        for _, item in new:
+            for callback in list(_written_callbacks):
+                try:
+                    callback(*item)
+                except Exception as e:
+                    print(f"❌ Eroare în callback-ul pentru răspunsul {item[1]}: {e}")
+        return True
+
+    def flush(self, timeout=SHUTDOWN_TIMEOUT):
+        """Golește sincron buffer-ul; returnează câte răspunsuri au rămas nescrise"""
+        deadline = time.time() + timeout
+        while self._pending and time.time() < deadline:
+            with self._condition:
+                batch = self._take_batch()
+            if batch and not self._write(batch):
+                time.sleep(min(self._retry_delay, max(0, deadline - time.time())))
+        return len(self._pending)
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        self._stopping = True
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval * 2)
+        remaining = self.flush(timeout)
+        if remaining:
+            print(f"⚠️ {remaining} răspunsuri nu au putut fi scrise la oprire")
+        return remaining
+
+    def snapshot(self):
+        with self._condition:
+            return {**self.stats, "buffered": len(self._pending)}
+
+
+_written_callbacks = []
+
+answer_buffer = AnswerBuffer()
+
+
+def add_written_callback(callback):
+    """Înregistrează callback(show_id, doc_id, data), apelat o singură dată per răspuns scris"""
+    if callback not in _written_callbacks:
+        _written_callbacks.append(callback)
+
+
+def answer_doc_id(question_id, user_id):
+    """Un singur document per utilizator și întrebare (primul răspuns rămâne)"""
+    return f"{question_id}_{user_id}"
+
+
+def submit_answer(show_id, question_id, user_id, answer, correct=None):
+    return answer_buffer.submit(show_id, answer_doc_id(question_id, user_id), {
+        "user_id": user_id,
+        "question_id": question_id,
+        "answer": answer,
+        "correct": correct,
+        "received_at": time.time()
+    })
+
+
+def shutdown():
+    return answer_buffer.shutdown()
+
+
+# La oprirea worker-ului încercăm să scriem tot ce a rămas în buffer
+atexit.register(shutdown)
@@ -1,11 +1,115 @@
 import json
 import os
+import threading
+import time
+from services import metrics
+
+QUIZ_DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'quiz.json')
+
+# Cât timp avem încredere în conținutul din memorie fără să mai facem stat()
+CHECK_INTERVAL = 1.0
+
+
+class FrozenDict(dict):
+    """dict care nu mai poate fi modificat după construire"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Datele din cache sunt read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def freeze(value):
+    """Transformă recursiv JSON-ul parsat în structuri imutabile partajabile"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class FileCache:
+    """Conținutul parsat al unui fișier JSON, re-parsat doar când fișierul se schimbă"""
+
+    def __init__(self, path, check_interval=CHECK_INTERVAL, name=None):
+        self.path = path
+        self.name = name or os.path.basename(path)
+        self.check_interval = check_interval
+        self.value = None
+        self.version = 0
+        self._signature = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def peek(self):
+        """Valoarea din memorie dacă a fost validată recent, altfel None (fără I/O)"""
+        if self.value is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return self.value
+        return None
+
+    def get(self):
+        """Valoarea curentă; face stat() și re-parsează doar la schimbarea fișierului"""
+        value = self.peek()
+        if value is not None:
+            metrics.cache_hit(self.name)
+            return value
+
+        with self._lock:
+            st = os.stat(self.path)
+            # inode + mtime + dimensiune prind și înlocuirile atomice (rename)
+            signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if signature != self._signature or self.value is None:
+                metrics.cache_miss(self.name)
+                try:
+                    with metrics.backend_call("disk", self.name):
+                        with open(self.path, 'r', encoding='utf-8') as f:
+                            parsed = json.load(f)
+                except ValueError:
+                    # Fișier scris pe jumătate: păstrăm ultima versiune bună
+                    if self.value is None:
+                        raise
+                    print(f"⚠️ {self.path} invalid, păstrăm versiunea din cache")
+                    return self.value
+                self.value = freeze(parsed)
+                self.version += 1
+                self._signature = signature
+                print(f"📥 {os.path.basename(self.path)} re-încărcat (versiunea {self.version})")
+            else:
+                # Fișierul nu s-a schimbat: doar un stat(), fără parsare
+                metrics.cache_hit(self.name)
+            self._checked_at = time.monotonic()
+            return self.value
+
+    def invalidate(self):
+        """Forțează re-citirea fișierului la următorul acces"""
+        with self._lock:
+            self._signature = None
+            self._checked_at = 0
+
+
+_quiz_cache = FileCache(QUIZ_DATA_PATH, name="quiz_json")
+
 
 def load_quiz_data():
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'quiz.json')
     try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return _quiz_cache.get()
     except Exception as e:
         return {'error': f'Could not load quiz data: {str(e)}'}
 
+
+def peek_quiz_data():
+    """Quiz-urile din memorie, fără I/O, sau None dacă trebuie re-validate"""
+    value = _quiz_cache.peek()
+    if value is not None:
+        metrics.cache_hit(_quiz_cache.name)
+    return value
+
+
+def quiz_data_version():
+    return _quiz_cache.version
+
+
+def invalidate_quiz_cache():
+    """Hook pentru admin: următoarea cerere re-citește quiz.json"""
+    _quiz_cache.invalidate()
@@ -0,0 +1,218 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services import metrics
+
+# Pool-uri de thread-uri partajate pentru operațiile cu timeout.
+# În loc să pornim un thread nou la fiecare cerere (și să-l abandonăm la
+# timeout), fiecare backend are un pool mărginit cu o coadă limitată.
+# Când coada e plină cererea e refuzată imediat, iar munca abandonată
+# după timeout este numărată ca să se vadă în diagnostic. Codul care rulează
+# în pool poate afla de abandon prin on_abandon() (circuitul Firestore
+# numără astfel apelul blocat ca eșec fără să aștepte să se întoarcă).
+
+# backend -> (thread-uri, locuri în coadă)
+POOL_LIMITS = {
+    "disk": (4, 32),
+    "firestore": (8, 64),
+    "gemini": (8, 32),
+}
+
+
+class PoolSaturatedError(Exception):
+    """Pool-ul backend-ului are coada plină; cererea nu a fost pornită"""
+
+
+_current = threading.local()
+
+
+class _Task:
+    """Un apel din pool; cel care așteaptă rezultatul îl poate declara abandonat"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.abandoned = False
+        self.callbacks = []
+
+    def abandon(self):
+        with self.lock:
+            if self.abandoned:
+                return
+            self.abandoned = True
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Eroare în callback-ul de abandon: {e}")
+
+
+def _run_task(task, fn, args, kwargs):
+    _current.task = task
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _current.task = None
+
+
+def on_abandon(callback):
+    """Din codul care rulează în pool: callback() e apelat dacă apelantul renunță după timeout.
+
+    Întoarce funcția care anulează abonarea (de apelat când munca s-a terminat).
+    """
+    task = getattr(_current, "task", None)
+    if task is None:
+        return lambda: None
+    with task.lock:
+        if task.abandoned:
+            return lambda: None
+        task.callbacks.append(callback)
+
+    def cancel():
+        with task.lock:
+            if callback in task.callbacks:
+                task.callbacks.remove(callback)
+    return cancel
+
+
+class BoundedExecutor:
+    """ThreadPoolExecutor cu coadă mărginită și contabilizarea timeout-urilor"""
+
+    def __init__(self, name, max_workers, max_queue):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "cancelled": 0,
+            "abandoned": 0,
+        }
+        self.abandoned_running = 0
+        self.in_flight = 0
+
+    def _get_executor(self):
+        # Pool-ul se creează la prima utilizare și din nou după fork
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-pool"
+                    )
+                    self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+                    self._pid = pid
+                    self.in_flight = 0
+                    self.abandoned_running = 0
+        return self._executor
+
+    def _count(self, key, delta=1):
+        with self._stats_lock:
+            self.stats[key] += delta
+
+    def submit(self, fn, *args, **kwargs):
+        """Pornește fn în pool; ridică PoolSaturatedError dacă nu mai e loc"""
+        executor = self._get_executor()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self._count("rejected")
+            metrics.pool_rejections_total.labels(self.name).inc()
+            raise PoolSaturatedError(f"Pool-ul {self.name} este plin")
+
+        task = _Task()
+        try:
+            future = executor.submit(_run_task, task, fn, args, kwargs)
+        except Exception:
+            slots.release()
+            raise
+        future.task = task
+
+        with self._stats_lock:
+            self.stats["submitted"] += 1
+            self.in_flight += 1
+        metrics.pool_in_flight.labels(self.name).inc()
+        future.add_done_callback(lambda f: self._on_done(f, slots))
+        return future
+
+    def _on_done(self, future, slots):
+        slots.release()
+        metrics.pool_in_flight.labels(self.name).dec()
+        with self._stats_lock:
+            self.in_flight -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.stats["failed"] += 1
+            else:
+                self.stats["completed"] += 1
+
+    def run(self, fn, *args, timeout=2, **kwargs):
+        """Rulează fn cu termen limită; ridică TimeoutError dacă nu termină la timp"""
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            self._count("timed_out")
+            metrics.timeouts_total.labels(self.name, getattr(fn, "__name__", "call")).inc()
+            if future.cancel():
+                # Nu pornise încă: doar l-am scos din coadă
+                self._count("cancelled")
+            else:
+                # Rulează deja; îl lăsăm să termine, dar îl contabilizăm
+                with self._stats_lock:
+                    self.stats["abandoned"] += 1
+                    self.abandoned_running += 1
+                future.add_done_callback(self._on_abandoned_done)
+                future.task.abandon()
+            raise
+
+    def _on_abandoned_done(self, future):
+        with self._stats_lock:
+            self.abandoned_running -= 1
+
+    def snapshot(self):
+        with self._stats_lock:
+            return {
+                **self.stats,
+                "in_flight": self.in_flight,
+                "abandoned_running": self.abandoned_running,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(backend):
+    pool = _pools.get(backend)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(backend)
+            if pool is None:
+                max_workers, max_queue = POOL_LIMITS[backend]
+                pool = BoundedExecutor(backend, max_workers, max_queue)
+                _pools[backend] = pool
+    return pool
+
+
+def run_with_timeout(backend, fn, *args, timeout=2, **kwargs):
+    """Rulează fn în pool-ul backend-ului cu timeout strict"""
+    return get_pool(backend).run(fn, *args, timeout=timeout, **kwargs)
+
+
+def pool_stats():
+    """Statistici pentru toate pool-urile create în acest proces"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.snapshot() for pool in pools}
@@ -0,0 +1,153 @@
+import random
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+
+# Cache semantic pentru răspunsurile Gemini.
+# Întrebările sunt normalizate (litere mici, fără diacritice, fără
+# punctuație, spații compactate), apoi căutate întâi exact și apoi
+# aproximativ, cu MinHash pe trigrame de caractere și LSH pe benzi.
+# Cache-ul este separat pe show, are TTL și evacuare LRU.
+
+TTL = 300                 # secunde cât rămâne valid un răspuns
+MAX_ENTRIES = 5000
+NUM_HASHES = 32
+BANDS = 8                 # 8 benzi x 4 rânduri
+SHINGLE_SIZE = 3
+NEAR_THRESHOLD = 0.8      # similaritatea Jaccard estimată minimă pentru un hit aproximativ
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240501)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+_ROWS = NUM_HASHES // BANDS
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_question(text):
+    """Forma canonică a unei întrebări: 'Cine e detectivul?' == 'cine e  DETECTIVUL'"""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    # ș, ş, ț, ţ, ă, â, î devin s, s, t, t, a, a, i
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def minhash_signature(normalized):
+    if len(normalized) <= SHINGLE_SIZE:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+class SemanticCache:
+    """LRU cu TTL, căutare exactă și aproximativă (MinHash + LSH), per show"""
+
+    def __init__(self, ttl=TTL, max_entries=MAX_ENTRIES, threshold=NEAR_THRESHOLD):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries = OrderedDict()   # (scope, normalizat) -> (răspuns, expiră_la, semnătură)
+        self._bands = {}                # (scope, bandă, valori) -> set de chei
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits_exact": 0,
+            "hits_near": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def _band_keys(self, scope, signature):
+        return [(scope, b, signature[b * _ROWS:(b + 1) * _ROWS]) for b in range(BANDS)]
+
+    def _remove(self, key):
+        _, _, signature = self._entries.pop(key)
+        for band_key in self._band_keys(key[0], signature):
+            keys = self._bands.get(band_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._bands[band_key]
+
+    def get(self, question, scope=None):
+        """Răspunsul din cache pentru întrebare (sau una aproape identică) ori None"""
+        normalized = normalize_question(question)
+        if not normalized:
+            # Doar semne sau emoji: toate ar avea aceeași cheie
+            return None
+        key = (scope, normalized)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits_exact"] += 1
+                    return entry[0]
+                self._remove(key)
+                self.stats["expirations"] += 1
+
+        signature = minhash_signature(normalized)
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(scope, signature):
+                candidates.update(self._bands.get(band_key, ()))
+
+            best_key, best_score = None, 0
+            for candidate in candidates:
+                entry = self._entries.get(candidate)
+                if entry is None:
+                    continue
+                if entry[1] <= now:
+                    self._remove(candidate)
+                    self.stats["expirations"] += 1
+                    continue
+                score = sum(1 for x, y in zip(signature, entry[2]) if x == y) / NUM_HASHES
+                if score > best_score:
+                    best_key, best_score = candidate, score
+
+            if best_key is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_key)
+                self.stats["hits_near"] += 1
+                return self._entries[best_key][0]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, question, answer, scope=None):
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        key = (scope, normalized)
+        signature = minhash_signature(normalized)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (answer, time.time() + self.ttl, signature)
+            for band_key in self._band_keys(scope, signature):
+                self._bands.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def snapshot(self):
+        with self._lock:
+            hits = self.stats["hits_exact"] + self.stats["hits_near"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+answer_cache = SemanticCache()
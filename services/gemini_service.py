@@ -1,18 +1,278 @@
+import asyncio
 import os
-import google.generativeai as genai
+import threading
+import time
+from services.gemini_cache import answer_cache, normalize_question
+from services.single_flight import SingleFlight
+from services.executor import run_with_timeout
+from services import gemini_batcher
+from services.admission import ai_admission
+from services.startup import record_stage
+from services import metrics
 
-# Configurează cheia API
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Modelul se construiește la prima utilizare, în procesul care îl folosește:
+# canalele gRPC nu trebuie moștenite peste fork (gunicorn --preload).
+# Un model fals poate fi pus direct în `model`; acela nu este reconstruit.
+model = None
+_model_pid = None
+_model_lock = threading.Lock()
 
-model = genai.GenerativeModel("gemini-1.5-pro")
+def get_model():
+    """Modelul Gemini, construit leneș și din nou după fork"""
+    global model, _model_pid
+    if model is not None and (_model_pid is None or _model_pid == os.getpid()):
+        return model
+    with _model_lock:
+        if model is None or (_model_pid is not None and _model_pid != os.getpid()):
+            start = time.perf_counter()
+            import google.generativeai as genai
 
-def ask_gemini(question: str) -> str:
-    prompt = f"""
+            # Configurează cheia API
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            model = genai.GenerativeModel("gemini-1.5-pro")
+            _model_pid = os.getpid()
+            record_stage("gemini_client", time.perf_counter() - start)
+    return model
+
+# Cât așteptăm răspunsul Gemini înainte să renunțăm
+GEMINI_TIMEOUT = 20
+
+# Întrebările identice care sosesc simultan împart un singur apel Gemini
+_in_flight = SingleFlight()
+
+def build_prompt(question: str) -> str:
+    return f"""
 Ești un co-prezentator AI pentru o emisiune TV live. Răspunde pe scurt, prietenos, cu un strop de umor, dar la obiect.
 
 Întrebarea publicului: {question}
 Răspuns:
 """
-    response = model.generate_content(prompt)
-    return response.text.strip()
 
+def cached_answer(question: str, show_id: str = None):
+    """Răspunsul din cache pentru o întrebare (aproape) identică din același show"""
+    answer = answer_cache.get(question, scope=show_id)
+    if answer is not None:
+        metrics.cache_hit("gemini_answer")
+    else:
+        metrics.cache_miss("gemini_answer")
+    return answer
+
+def _call_model(prompt: str) -> str:
+    metrics.gemini_in_flight.inc()
+    try:
+        with metrics.backend_call("gemini", "generate"):
+            return get_model().generate_content(prompt).text
+    finally:
+        metrics.gemini_in_flight.dec()
+
+def _answer_single(question: str) -> str:
+    return _call_model(build_prompt(question)).strip()
+
+# Opțional (GEMINI_BATCH_ENABLED=1): întrebările apropiate în timp pleacă într-un singur apel.
+# Admisia se face per apel real către Gemini: un batch consumă un singur loc din cotă
+BATCH_CLIENT = "gemini-batch"
+_batcher = gemini_batcher.QuestionBatcher(_call_model, _answer_single,
+                                          admit=lambda: ai_admission.admit(BATCH_CLIENT))
+
+def generate_answer(question: str, show_id: str = None) -> str:
+    """Apelează Gemini și pune răspunsul în cache"""
+    answer = _answer_single(question)
+    answer_cache.put(question, answer, scope=show_id)
+    return answer
+
+def generate_answer_batched(question: str, show_id: str = None, timeout: float = GEMINI_TIMEOUT) -> str:
+    """Ca generate_answer, dar prin micro-batcher"""
+    answer = _batcher.ask(question, timeout=timeout)
+    answer_cache.put(question, answer, scope=show_id)
+    return answer
+
+# google-generativeai (fixat la 0.5.4 în requirements.txt) nu are un API public
+# pentru anularea unui stream: răspunsul ține apelul gRPC în atributul privat
+# _iterator. Dacă o altă versiune a SDK-ului îl redenumește, anunțăm o dată
+# în log în loc să lăsăm stream-urile abandonate să curgă fără să știm.
+_missing_iterator_logged = False
+
+def _stream_iterator(response):
+    """Apelul gRPC din spatele unui răspuns în stream sau None"""
+    global _missing_iterator_logged
+    iterator = getattr(response, "_iterator", None)
+    if iterator is None and not _missing_iterator_logged:
+        _missing_iterator_logged = True
+        print(f"⚠️ {type(response).__name__} nu are _iterator (altă versiune de google-generativeai?); "
+              "stream-urile Gemini abandonate nu pot fi anulate")
+    return iterator
+
+def _cancel_stream(response):
+    """Oprește stream-ul gRPC de dedesubt ca să nu mai plătim tokeni necitiți"""
+    # Un generator obișnuit (ex. modelele false) se închide prin API-ul lui public
+    cancel = getattr(response, "close", None) or getattr(_stream_iterator(response), "cancel", None)
+    if cancel is not None:
+        try:
+            cancel()
+        except Exception as e:
+            print(f"⚠️ Nu am putut anula stream-ul Gemini: {e}")
+
+def stream_answer(question: str, show_id: str = None):
+    """Generator cu bucățile de text pe măsură ce sosesc de la Gemini.
+
+    Următoarea bucată este cerută doar după ce apelantul a consumat-o pe
+    precedenta, deci un client lent frânează natural stream-ul. Dacă
+    generatorul este închis înainte de final, anulăm apelul; răspunsul
+    ajunge în cache doar când stream-ul s-a terminat complet.
+    """
+    response = get_model().generate_content(build_prompt(question), stream=True)
+    parts = []
+    completed = False
+    try:
+        for chunk in response:
+            text = chunk.text
+            if text:
+                parts.append(text)
+                yield text
+        completed = True
+    finally:
+        if not completed:
+            _cancel_stream(response)
+
+    answer = "".join(parts).strip()
+    if answer:
+        answer_cache.put(question, answer, scope=show_id)
+
+def answer_question(question: str, show_id: str = None, timeout: float = GEMINI_TIMEOUT,
+                    client_id: str = None) -> str:
+    """Un singur apel Gemini (în pool-ul gemini) pentru toate cererile identice în zbor.
+
+    Doar apelul real trece prin controlul de admisie; cererile care îl
+    așteaptă nu consumă din cota Gemini. Dacă apelul e refuzat, toate
+    primesc același AdmissionRejected. Cu batching, admisia o face
+    batcher-ul, o dată pentru tot batch-ul.
+    """
+    key = (show_id, normalize_question(question))
+
+    def call():
+        if gemini_batcher.BATCH_ENABLED:
+            # Batcher-ul are propriul pool; nu ocupăm locuri în pool-ul gemini doar ca să așteptăm
+            return generate_answer_batched(question, show_id, timeout + ai_admission.max_wait)
+        with ai_admission.admit(client_id or "anonim"):
+            return run_with_timeout("gemini", generate_answer, question, show_id, timeout=timeout)
+
+    return _in_flight.do(key, call, timeout=timeout + ai_admission.max_wait)
+
+# Varianta asyncio (modul ASGI): aceleași cache, admisie și batcher, dar
+# cererile în zbor așteaptă pe Future-uri asyncio, nu pe thread-uri
+_async_in_flight = {}
+
+async def _call_model_async(prompt: str) -> str:
+    current_model = get_model()
+    if hasattr(current_model, "generate_content_async"):
+        metrics.gemini_in_flight.inc()
+        try:
+            with metrics.backend_call("gemini", "generate"):
+                response = await current_model.generate_content_async(prompt)
+                return response.text
+        finally:
+            metrics.gemini_in_flight.dec()
+    # Modelele fără API async (ex. cele false din teste) rulează într-un thread
+    return await asyncio.to_thread(_call_model, prompt)
+
+async def generate_answer_async(question: str, show_id: str = None) -> str:
+    answer = (await _call_model_async(build_prompt(question))).strip()
+    answer_cache.put(question, answer, scope=show_id)
+    return answer
+
+async def answer_question_async(question: str, show_id: str = None, timeout: float = GEMINI_TIMEOUT,
+                                client_id: str = None) -> str:
+    """Ca answer_question, fără să țină ocupat un thread cât așteptăm Gemini"""
+    loop = asyncio.get_running_loop()
+    key = (id(loop), show_id, normalize_question(question))
+    future = _async_in_flight.get(key)
+    if future is not None:
+        return await asyncio.wait_for(asyncio.shield(future), timeout + ai_admission.max_wait)
+
+    future = _async_in_flight[key] = loop.create_future()
+    requester = client_id or "anonim"
+    try:
+        if gemini_batcher.BATCH_ENABLED:
+            # Admisia o face batcher-ul, per apel real
+            answer = await asyncio.wait_for(asyncio.wrap_future(_batcher.submit(question)),
+                                            timeout + ai_admission.max_wait)
+            answer_cache.put(question, answer, scope=show_id)
+        else:
+            await ai_admission.acquire_async(requester)
+            try:
+                answer = await asyncio.wait_for(generate_answer_async(question, show_id), timeout)
+            finally:
+                ai_admission.release(requester)
+    except asyncio.TimeoutError:
+        error = TimeoutError(f"Gemini nu a răspuns în {timeout} secunde")
+        future.set_exception(error)
+        raise error
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    except BaseException:
+        # Liderul a fost anulat; cei care îl așteptau primesc o eroare, nu anularea lui
+        future.set_exception(RuntimeError("Cererea Gemini a fost anulată"))
+        raise
+    else:
+        future.set_result(answer)
+        return answer
+    finally:
+        _async_in_flight.pop(key, None)
+        # Dacă nu așteaptă nimeni altcineva, asyncio nu trebuie să raporteze excepția ca nepreluată
+        future.exception()
+
+async def _close_stream_async(response):
+    """Oprește stream-ul gRPC aio de dedesubt când clientul pleacă înainte de final"""
+    iterator = _stream_iterator(response)
+    try:
+        if hasattr(iterator, "cancel"):
+            iterator.cancel()
+        elif hasattr(iterator, "aclose"):
+            await iterator.aclose()
+    except Exception as e:
+        print(f"⚠️ Nu am putut anula stream-ul Gemini: {e}")
+
+async def stream_answer_async(question: str, show_id: str = None):
+    """Ca stream_answer, dar un generator asincron; cache-ul se populează doar la final"""
+    current_model = get_model()
+    parts = []
+    completed = False
+
+    if not hasattr(current_model, "generate_content_async"):
+        # Fără API async: fiecare bucată e cerută dintr-un thread
+        chunks = stream_answer(question, show_id)
+        try:
+            while True:
+                text = await asyncio.to_thread(next, chunks, None)
+                if text is None:
+                    break
+                yield text
+        finally:
+            await asyncio.to_thread(chunks.close)
+        return
+
+    response = await current_model.generate_content_async(build_prompt(question), stream=True)
+    try:
+        async for chunk in response:
+            text = chunk.text
+            if text:
+                parts.append(text)
+                yield text
+        completed = True
+    finally:
+        if not completed:
+            await _close_stream_async(response)
+
+    answer = "".join(parts).strip()
+    if answer:
+        answer_cache.put(question, answer, scope=show_id)
+
+def ask_gemini(question: str, show_id: str = None) -> str:
+    cached = cached_answer(question, show_id)
+    if cached is not None:
+        return cached
+    return answer_question(question, show_id)
+
+def in_flight_stats():
+    return {**_in_flight.snapshot(), "async_in_flight": len(_async_in_flight), "batcher": _batcher.snapshot()}
@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+import time
+from services.executor import get_pool, PoolSaturatedError
+from services.logs import log_event
+
+# Starea dependențelor pentru /healthz și /readyz.
+# Un thread de fundal verifică periodic Firestore, Gemini și fișierele de date,
+# fiecare cu bugetul lui de latență; endpoint-urile doar citesc rezultatele din
+# memorie, deci un load balancer le poate lovi oricât de des.
+
+PROBE_INTERVAL = 10       # cât de des se trezește prober-ul
+PROBE_TIMEOUT = 5         # după cât timp o verificare e considerată căzută
+FIRST_ROUND_WAIT = 0.5    # cât așteaptă /readyz primele rezultate după pornire
+
+# dependență -> (backend-ul pool-ului, buget de latență în secunde, interval între verificări)
+DEPENDENCIES = {
+    "data": ("disk", 0.1, PROBE_INTERVAL),
+    "firestore": ("firestore", 1.0, PROBE_INTERVAL),
+    # get_model e doar metadate, dar nu are rost să-l cerem mai des
+    "gemini": ("gemini", 2.0, 60),
+}
+
+# Fără acestea nu putem servi nimic; restul au fallback-uri (stare "degraded")
+REQUIRED = [d.strip() for d in os.getenv("SYNCPLAY_READY_REQUIRES", "data").split(",") if d.strip()]
+
+OK, SLOW, DOWN, UNKNOWN = "ok", "slow", "down", "unknown"
+
+_results = {name: {"status": UNKNOWN} for name in DEPENDENCIES}
+_first_round = threading.Event()
+_prober = None
+_prober_pid = None
+_prober_lock = threading.Lock()
+
+
+def check_data():
+    from services.data_loader import load_quiz_data
+    from routes.scene_routes import load_scene
+    quiz = load_quiz_data()
+    if isinstance(quiz, dict) and "error" in quiz:
+        raise RuntimeError(quiz["error"])
+    if not quiz:
+        raise RuntimeError("quiz.json nu conține întrebări")
+    load_scene()
+
+
+def check_firestore():
+    from firebase_utils import init_firebase, firestore_call
+    db = init_firebase()
+    if db is None:
+        raise RuntimeError("Firebase indisponibil")
+    # O singură citire de document, prin circuitul ei
+    with firestore_call("health"):
+        db.collection("shows").document(os.getenv("DEFAULT_SHOW_ID", "detectivul_din_canapea")).get()
+
+
+def check_gemini():
+    from services.gemini_service import get_model
+    model = get_model()
+    name = getattr(model, "model_name", None)
+    if name is None:
+        return  # model fals (benchmark): nimic de verificat
+    import google.generativeai as genai
+    genai.get_model(name)
+
+
+CHECKS = {
+    "data": check_data,
+    "firestore": check_firestore,
+    "gemini": check_gemini,
+}
+
+
+def _record(name, status, elapsed, error=None):
+    previous = _results[name].get("status")
+    _results[name] = {
+        "status": status,
+        "latency_ms": round(elapsed * 1000, 1) if elapsed is not None else None,
+        "budget_ms": round(DEPENDENCIES[name][1] * 1000),
+        "checked_at": time.time(),
+        "error": error,
+    }
+    if all(_results[r]["status"] != UNKNOWN for r in REQUIRED if r in _results):
+        _first_round.set()
+    if status != previous:
+        log_event("health_status", logging.WARNING if status == DOWN else logging.INFO,
+                  dependency=name, previous=previous, status=status, error=error)
+
+
+def probe_once(names=None):
+    """Pornește verificările în paralel, fiecare în pool-ul backend-ului ei"""
+    started = {}
+    for name in names or DEPENDENCIES:
+        backend = DEPENDENCIES[name][0]
+        try:
+            started[name] = (time.perf_counter(), get_pool(backend).submit(CHECKS[name]))
+        except PoolSaturatedError as e:
+            _record(name, DOWN, None, str(e))
+
+    deadline = time.perf_counter() + PROBE_TIMEOUT
+    for name, (start, future) in started.items():
+        try:
+            future.result(timeout=max(deadline - time.perf_counter(), 0))
+        except TimeoutError:
+            _record(name, DOWN, time.perf_counter() - start, f"fără răspuns în {PROBE_TIMEOUT}s")
+            continue
+        except Exception as e:
+            _record(name, DOWN, time.perf_counter() - start, str(e))
+            continue
+        elapsed = time.perf_counter() - start
+        _record(name, SLOW if elapsed > DEPENDENCIES[name][1] else OK, elapsed)
+
+
+def _probe_forever():
+    last_run = {}
+    while True:
+        now = time.monotonic()
+        due = [name for name, (_, _, interval) in DEPENDENCIES.items()
+               if now - last_run.get(name, -interval) >= interval]
+        for name in due:
+            last_run[name] = now
+        try:
+            probe_once(due)
+        except Exception as e:
+            print(f"❌ Eroare în prober-ul de sănătate: {e}")
+        _first_round.set()
+        time.sleep(PROBE_INTERVAL)
+
+
+def ensure_prober():
+    # Thread-ul se pornește la prima cerere și din nou după fork
+    global _prober, _prober_pid
+    pid = os.getpid()
+    if _prober is not None and _prober_pid == pid:
+        return
+    with _prober_lock:
+        if _prober is None or _prober_pid != pid:
+            _first_round.clear()
+            _prober = threading.Thread(target=_probe_forever, name="health-prober", daemon=True)
+            _prober.start()
+            _prober_pid = pid
+
+
+def liveness():
+    """Procesul răspunde și prober-ul rulează"""
+    ensure_prober()
+    return {"status": "ok", "prober_alive": _prober.is_alive()}
+
+
+def readiness(wait=FIRST_ROUND_WAIT):
+    """(gata, raport) din ultimele rezultate; nu face niciun apel către dependențe"""
+    ensure_prober()
+    if wait and not _first_round.is_set():
+        _first_round.wait(wait)
+
+    now = time.time()
+    dependencies = {}
+    ready = True
+    degraded = False
+    for name, result in _results.items():
+        result = dict(result)
+        # Un rezultat mai vechi de trei intervale nu mai spune nimic
+        interval = DEPENDENCIES[name][2]
+        if result.get("checked_at") and now - result["checked_at"] > 3 * interval:
+            result["status"] = UNKNOWN
+        result["required"] = name in REQUIRED
+        dependencies[name] = result
+        if result["status"] in (DOWN, UNKNOWN):
+            if result["required"]:
+                ready = False
+            else:
+                degraded = True
+        elif result["status"] == SLOW:
+            degraded = True
+
+    status = "not_ready" if not ready else ("degraded" if degraded else "ready")
+    return ready, {"status": status, "dependencies": dependencies}
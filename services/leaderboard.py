@@ -0,0 +1,249 @@
+import bisect
+import os
+import threading
+import time
+import zlib
+from firebase_utils import init_firebase
+from services.vote_tally import shard_id
+
+# Clasament incremental per show.
+# Fiecare răspuns corect adaugă puncte unui utilizator; scorurile sunt ținute
+# în găleți per scor plus un arbore Fenwick peste valorile scorurilor, așa că
+# rangul unui utilizator se află în O(log n), iar top-K se citește direct din
+# gălețile cu scor mare. Punctele acordate de acest worker sunt salvate
+# periodic în Firestore (shows/<id>/leaderboard/<worker>-<găleată>), iar
+# punctele celorlalți workeri sunt citite înapoi și adunate în clasament.
+
+POINTS_PER_CORRECT = 10
+CHECKPOINT_INTERVAL = 10   # secunde între checkpoint-uri
+CHECKPOINT_BUCKETS = 64    # documente per worker, ca să rămânem sub 1 MB/document
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+_boards = {}
+_boards_lock = threading.Lock()
+_sync_thread = None
+_sync_pid = None
+
+
+class FenwickTree:
+    """Numărul de utilizatori per scor, cu sume prefix în O(log n)"""
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def _grow(self, index):
+        size = self.size
+        while size <= index:
+            size *= 2
+        counts = [self.range_count(i) for i in range(self.size)]
+        self.size = size
+        self.tree = [0] * (size + 1)
+        for i, count in enumerate(counts):
+            if count:
+                self.add(i, count)
+
+    def range_count(self, index):
+        return self.prefix(index) - (self.prefix(index - 1) if index > 0 else 0)
+
+    def add(self, index, delta):
+        if index >= self.size:
+            self._grow(index)
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index):
+        """Câți utilizatori au scorul <= index"""
+        i = min(index, self.size - 1) + 1
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class Leaderboard:
+    """Scoruri cu rang în O(log n) și top-K fără sortare la citire"""
+
+    def __init__(self):
+        self.scores = {}
+        self.buckets = {}
+        self.distinct = []
+        self.tree = FenwickTree()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.scores)
+
+    def _remove(self, user_id, score):
+        bucket = self.buckets[score]
+        del bucket[user_id]
+        if not bucket:
+            del self.buckets[score]
+            self.distinct.pop(bisect.bisect_left(self.distinct, score))
+        self.tree.add(score, -1)
+
+    def _insert(self, user_id, score):
+        bucket = self.buckets.get(score)
+        if bucket is None:
+            bucket = self.buckets[score] = {}
+            bisect.insort(self.distinct, score)
+        # dict păstrează ordinea: la egalitate e primul cel care a ajuns întâi la scor
+        bucket[user_id] = None
+        self.tree.add(score, 1)
+
+    def set_score(self, user_id, score):
+        with self.lock:
+            previous = self.scores.get(user_id)
+            if previous == score:
+                return
+            if previous is not None:
+                self._remove(user_id, previous)
+            self.scores[user_id] = score
+            self._insert(user_id, score)
+
+    def rank(self, user_id):
+        """(rang, scor) sau None; rangul = 1 + câți au scor strict mai mare"""
+        with self.lock:
+            score = self.scores.get(user_id)
+            if score is None:
+                return None
+            return 1 + len(self.scores) - self.tree.prefix(score), score
+
+    def top(self, k):
+        result = []
+        with self.lock:
+            for score in reversed(self.distinct):
+                rank = len(result) + 1
+                for user_id in self.buckets[score]:
+                    result.append({"rank": rank, "user_id": user_id, "score": score})
+                    if len(result) >= k:
+                        return result
+        return result
+
+
+class ShowLeaderboard:
+    """Clasamentul unui show: punctele locale, ale celorlalți workeri și totalul"""
+
+    def __init__(self, show_id):
+        self.show_id = show_id
+        self.board = Leaderboard()
+        self.local = {}
+        self.remote = {}
+        self.dirty_buckets = set()
+        self.lock = threading.Lock()
+
+    def award(self, user_id, points):
+        """Adaugă punctele unui răspuns (deja deduplicat de answer_ingest)"""
+        with self.lock:
+            if points:
+                self.local[user_id] = self.local.get(user_id, 0) + points
+                self.dirty_buckets.add(_bucket_of(user_id))
+            # Sub lacăt: două actualizări simultane nu pot scrie un total mai vechi
+            self.board.set_score(user_id, self.local.get(user_id, 0) + self.remote.get(user_id, 0))
+
+    def merge_remote(self, remote):
+        """Aplică doar diferențele față de ultima citire a celorlalți workeri"""
+        with self.lock:
+            changed = {u for u in remote if remote[u] != self.remote.get(u)}
+            changed.update(u for u in self.remote if u not in remote)
+            self.remote = remote
+            for user_id in changed:
+                self.board.set_score(user_id, self.local.get(user_id, 0) + remote.get(user_id, 0))
+
+    def take_dirty(self):
+        with self.lock:
+            dirty = self.dirty_buckets
+            self.dirty_buckets = set()
+            chunks = {b: {} for b in dirty}
+            for user_id, points in self.local.items():
+                bucket = _bucket_of(user_id)
+                if bucket in chunks:
+                    chunks[bucket][user_id] = points
+        return chunks
+
+
+def _bucket_of(user_id):
+    return zlib.crc32(user_id.encode("utf-8")) % CHECKPOINT_BUCKETS
+
+
+def get_show_leaderboard(show_id):
+    board = _boards.get(show_id)
+    if board is None:
+        with _boards_lock:
+            board = _boards.setdefault(show_id, ShowLeaderboard(show_id))
+        _ensure_sync_thread()
+    return board
+
+
+def score_answer(show_id, user_id, correct):
+    """Actualizează clasamentul pentru primul răspuns al utilizatorului la o întrebare"""
+    get_show_leaderboard(show_id).award(user_id, POINTS_PER_CORRECT if correct else 0)
+
+
+def score_written_answer(show_id, doc_id, data):
+    # Apelat de answer_ingest doar pentru răspunsurile scrise prima dată în Firestore
+    score_answer(show_id, data["user_id"], data.get("correct"))
+
+
+def checkpoint(board, db):
+    """Salvează gălețile modificate și citește punctele celorlalți workeri"""
+    own_id = shard_id()
+    collection = db.collection('shows').document(board.show_id).collection('leaderboard')
+
+    chunks = board.take_dirty()
+    if chunks:
+        batch = db.batch()
+        for bucket, scores in chunks.items():
+            batch.set(collection.document(f"{own_id}-{bucket}"), {
+                "shard": own_id,
+                "bucket": bucket,
+                "scores": scores,
+                "updated_at": time.time()
+            })
+        try:
+            batch.commit()
+        except Exception:
+            with board.lock:
+                board.dirty_buckets.update(chunks)
+            raise
+
+    remote = {}
+    for doc in collection.stream():
+        data = doc.to_dict() or {}
+        if data.get("shard") == own_id:
+            continue
+        for user_id, points in (data.get("scores") or {}).items():
+            remote[user_id] = remote.get(user_id, 0) + points
+    board.merge_remote(remote)
+
+
+def _sync_loop(db_factory):
+    while True:
+        time.sleep(CHECKPOINT_INTERVAL)
+        with _boards_lock:
+            boards = list(_boards.values())
+        db = db_factory()
+        if not db:
+            continue
+        for board in boards:
+            try:
+                checkpoint(board, db)
+            except Exception as e:
+                print(f"⚠️ Eroare la checkpoint-ul clasamentului pentru {board.show_id}: {e}")
+
+
+def _ensure_sync_thread(db_factory=init_firebase):
+    global _sync_thread, _sync_pid
+    pid = os.getpid()
+    if _sync_thread is not None and _sync_pid == pid and _sync_thread.is_alive():
+        return
+    with _boards_lock:
+        if _sync_thread is None or _sync_pid != pid or not _sync_thread.is_alive():
+            _sync_pid = pid
+            _sync_thread = threading.Thread(target=_sync_loop, args=(db_factory,), name="leaderboard-sync")
+            _sync_thread.daemon = True
+            _sync_thread.start()
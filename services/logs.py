@@ -0,0 +1,44 @@
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+# Log-uri structurate (o linie JSON per eveniment) pentru căile fierbinți.
+# Evenimentele sub SYNCPLAY_LOG_LEVEL nu costă nimic în afară de o comparație,
+# iar cele de rutină (timpi per cerere) sunt eșantionate cu
+# SYNCPLAY_LOG_SAMPLE_RATE, ca stdout să nu devină el însuși un cost.
+
+LOG_LEVEL = os.getenv("SYNCPLAY_LOG_LEVEL", "INFO").upper()
+SAMPLE_RATE = float(os.getenv("SYNCPLAY_LOG_SAMPLE_RATE", "0.01"))
+
+logger = logging.getLogger("syncplay")
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+
+
+def log_event(event, level=logging.INFO, sample=1.0, **fields):
+    """Scrie evenimentul ca JSON dacă trece de nivel și de eșantionare"""
+    if not logger.isEnabledFor(level):
+        return
+    if sample < 1 and random.random() >= sample:
+        return
+    record = {"ts": round(time.time(), 3), "level": logging.getLevelName(level).lower(), "event": event}
+    record.update(fields)
+    if sample < 1:
+        record["sample"] = sample
+    logger.log(level, json.dumps(record, ensure_ascii=False, default=str))
+
+
+def log_sampled(event, **fields):
+    """Eveniment de rutină pe calea fierbinte: nivel INFO, eșantionat"""
+    log_event(event, logging.INFO, SAMPLE_RATE, **fields)
+
+
+def log_debug(event, **fields):
+    log_event(event, logging.DEBUG, **fields)
@@ -0,0 +1,123 @@
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+
+# Metrici Prometheus expuse pe /metrics.
+# Cu mai mulți workeri gunicorn, PROMETHEUS_MULTIPROC_DIR (setat automat în
+# gunicorn.conf.py) face ca fiecare proces să-și scrie valorile în fișiere
+# mmap din acel director, iar /metrics le adună pe toate.
+
+# Gemini poate dura până la GEMINI_TIMEOUT (20 s), deci găleți mai lungi
+BACKEND_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+
+http_request_seconds = Histogram(
+    "syncplay_http_request_duration_seconds",
+    "Durata cererilor HTTP până la începutul răspunsului",
+    ["route", "method", "status"]
+)
+http_in_flight = Gauge(
+    "syncplay_http_in_flight_requests",
+    "Cereri HTTP în curs",
+    multiprocess_mode="livesum"
+)
+backend_call_seconds = Histogram(
+    "syncplay_backend_call_duration_seconds",
+    "Durata apelurilor către Firestore, disc și Gemini",
+    ["backend", "operation", "outcome"],
+    buckets=BACKEND_BUCKETS
+)
+timeouts_total = Counter(
+    "syncplay_timeouts_total",
+    "Apeluri abandonate după timeout în pool-urile *_with_timeout",
+    ["backend", "operation"]
+)
+pool_rejections_total = Counter(
+    "syncplay_pool_rejections_total",
+    "Apeluri refuzate pentru că pool-ul backend-ului era plin",
+    ["backend"]
+)
+pool_in_flight = Gauge(
+    "syncplay_pool_in_flight",
+    "Apeluri în curs sau în coadă per pool",
+    ["backend"],
+    multiprocess_mode="livesum"
+)
+cache_requests_total = Counter(
+    "syncplay_cache_requests_total",
+    "Căutări în cache-uri, după rezultat (hit/miss)",
+    ["cache", "result"]
+)
+circuit_state = Gauge(
+    "syncplay_firestore_circuit_state",
+    "Starea circuitului per operație Firestore: 0 închis, 1 half-open, 2 deschis",
+    ["operation"],
+    multiprocess_mode="livemax"
+)
+gemini_in_flight = Gauge(
+    "syncplay_gemini_in_flight",
+    "Apeluri Gemini reale în curs (după single-flight și admisie)",
+    multiprocess_mode="livesum"
+)
+
+
+def cache_hit(cache):
+    cache_requests_total.labels(cache, "hit").inc()
+
+
+def cache_miss(cache):
+    cache_requests_total.labels(cache, "miss").inc()
+
+
+@contextmanager
+def backend_call(backend, operation):
+    """Măsoară un apel către backend; eșecurile apar cu outcome="error" """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        backend_call_seconds.labels(backend, operation, outcome).observe(time.perf_counter() - start)
+
+
+def observe_request(route, method, status, seconds):
+    http_request_seconds.labels(route, method, str(status)).observe(seconds)
+
+
+def init_app(app):
+    """Durata și numărul de cereri în curs pentru fiecare rută Flask"""
+    from flask import g, request
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_in_flight = True
+        http_in_flight.inc()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            # Regula rutei, nu calea: /current_question/<show_id> e o singură serie
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            observe_request(route, request.method, response.status_code, time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def finish_request(error=None):
+        if g.pop("metrics_in_flight", False):
+            http_in_flight.dec()
+
+
+def render():
+    """(corp, content-type) pentru /metrics"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
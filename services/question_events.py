@@ -0,0 +1,160 @@
+import asyncio
+import json
+import threading
+
+# Canal de push pentru schimbările de întrebare activă (Server-Sent Events).
+# Fiecare eveniment este serializat o singură dată la publicare; toți abonații
+# unui show așteaptă pe aceeași condiție și scriu exact aceiași octeți.
+# Abonații din modul ASGI așteaptă pe un asyncio.Event per buclă și show,
+# trezit o singură dată per publicare indiferent câți abonați are bucla.
+
+HEARTBEAT_INTERVAL = 15  # secunde între comentariile keep-alive
+RETRY_MS = 3000          # cât așteaptă EventSource înainte de reconectare
+
+
+class ShowChannel:
+    """Ultimul eveniment publicat pentru un show și condiția pe care așteaptă abonații"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.payload = None
+        self.data = None
+        self.subscribers = 0
+        self.loop_events = {}   # buclă asyncio -> Event-ul pe care așteaptă abonații ei
+
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def _get_channel(show_id):
+    channel = _channels.get(show_id)
+    if channel is None:
+        with _channels_lock:
+            channel = _channels.setdefault(show_id, ShowChannel())
+    return channel
+
+
+def _encode_event(version, payload):
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {version}\nevent: question\ndata: {body}\n\n".encode("utf-8")
+
+
+def publish(show_id, payload):
+    """Publică un eveniment nou și trezește toți abonații show-ului"""
+    channel = _get_channel(show_id)
+    with channel.condition:
+        channel.version += 1
+        payload = {**payload, "version": channel.version}
+        channel.payload = payload
+        channel.data = _encode_event(channel.version, payload)
+        channel.condition.notify_all()
+        for loop in list(channel.loop_events):
+            try:
+                loop.call_soon_threadsafe(_wake_loop, channel, loop)
+            except RuntimeError:
+                # Bucla s-a închis între timp
+                channel.loop_events.pop(loop, None)
+        return channel.version
+
+
+def _wake_loop(channel, loop):
+    # Rulează în bucla abonaților; următoarea așteptare primește un Event nou
+    with channel.condition:
+        event = channel.loop_events.pop(loop, None)
+    if event is not None:
+        event.set()
+
+
+def current(show_id):
+    """(versiune, octeți) pentru ultimul eveniment sau None dacă nu s-a publicat nimic"""
+    channel = _channels.get(show_id)
+    if channel is None or channel.data is None:
+        return None
+    return channel.version, channel.data
+
+
+def current_payload(show_id):
+    channel = _channels.get(show_id)
+    return channel.payload if channel is not None else None
+
+
+def wait_for_event(show_id, last_version, timeout=HEARTBEAT_INTERVAL):
+    """Blochează până apare o versiune mai nouă; None la expirarea timeout-ului"""
+    channel = _get_channel(show_id)
+    with channel.condition:
+        if channel.version <= last_version:
+            channel.condition.wait(timeout)
+        if channel.version > last_version and channel.data is not None:
+            return channel.version, channel.data
+    return None
+
+
+def stream(show_id, last_version=0, heartbeat=HEARTBEAT_INTERVAL):
+    """Generator SSE: starea curentă, apoi fiecare schimbare plus heartbeat-uri"""
+    channel = _get_channel(show_id)
+    with channel.condition:
+        channel.subscribers += 1
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode("utf-8")
+
+        latest = current(show_id)
+        if latest is not None and latest[0] != last_version:
+            last_version, data = latest
+            yield data
+        elif latest is not None:
+            last_version = latest[0]
+
+        while True:
+            event = wait_for_event(show_id, last_version, heartbeat)
+            if event is None:
+                yield b": ping\n\n"
+                continue
+            last_version, data = event
+            yield data
+    finally:
+        with channel.condition:
+            channel.subscribers -= 1
+
+
+async def stream_async(show_id, last_version=0, heartbeat=HEARTBEAT_INTERVAL):
+    """Ca stream(), dar pentru bucla asyncio: abonații nu ocupă niciun thread"""
+    channel = _get_channel(show_id)
+    loop = asyncio.get_running_loop()
+    with channel.condition:
+        channel.subscribers += 1
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode("utf-8")
+
+        latest = current(show_id)
+        if latest is not None and latest[0] != last_version:
+            last_version, data = latest
+            yield data
+        elif latest is not None:
+            last_version = latest[0]
+
+        while True:
+            with channel.condition:
+                if channel.version > last_version and channel.data is not None:
+                    event = None
+                    last_version, data = channel.version, channel.data
+                else:
+                    event = channel.loop_events.get(loop)
+                    if event is None:
+                        event = channel.loop_events[loop] = asyncio.Event()
+            if event is None:
+                yield data
+                continue
+            try:
+                await asyncio.wait_for(event.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+    finally:
+        with channel.condition:
+            channel.subscribers -= 1
+
+
+def subscriber_counts():
+    with _channels_lock:
+        return {show_id: channel.subscribers for show_id, channel in _channels.items()}
@@ -0,0 +1,291 @@
+import os
+import threading
+import time
+from firebase_utils import load_questions_for_show, load_show_ids
+from services import metrics, shared_state
+from services.data_loader import FileCache, freeze
+from services.executor import get_pool, run_with_timeout, PoolSaturatedError
+from services.show_ids import is_valid_show_id, UnknownShow
+from services.swr_cache import StaleWhileRevalidateCache
+
+# Întrebările fiecărui show, indexate după id.
+# Sursa unui show, în ordinea priorității:
+#   1. data/shows/<show_id>.json (fișier per show, re-citit doar la schimbare)
+#   2. Firestore: shows/<show_id>/questions (reîmprospătat în fundal)
+#   3. quiz.json global, ca până acum
+# Fiecare cerere citește setul gata construit; sursele sunt re-verificate cel
+# mult o dată pe secundă per show, indiferent câte cereri și câte show-uri.
+#
+# Doar show-urile reale (fișier propriu sau document în colecția shows) au
+# intrare în index; orice alt id din URL primește lista globală, fără citiri
+# din Firestore și fără să ocupe memorie. Intrările sunt cel mult MAX_ENTRIES.
+
+SHOWS_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), '..', 'data', 'shows'))
+RESOLVE_INTERVAL = 1.0      # cât timp servim setul fără să re-verificăm sursele
+REFRESH_INTERVAL = 60       # cât de des re-citim întrebările din Firestore
+RETRY_INTERVAL = 5          # după o citire eșuată reîncercăm mai devreme
+LOAD_TIMEOUT = 2            # prima citire din Firestore pentru un show
+KNOWN_SHOWS_TTL = 60        # cât de des re-citim lista de show-uri din Firestore
+MAX_ENTRIES = int(os.getenv("SYNCPLAY_MAX_INDEXED_SHOWS", "200"))
+
+_entries = {}
+_entries_lock = threading.Lock()
+_global_value = None
+_global_set = None
+
+
+class QuestionSet:
+    """Întrebările unui show: ordinea originală plus index id -> întrebare (read-only)"""
+
+    def __init__(self, show_id, questions, source):
+        self.show_id = show_id
+        self.source = source
+        self.questions = tuple(q for q in questions if q.get("id"))
+        self.by_id = {q["id"]: q for q in self.questions}
+        self.position = {q["id"]: i for i, q in enumerate(self.questions)}
+        self._active_first = {}
+
+    def __len__(self):
+        return len(self.questions)
+
+    def get(self, question_id):
+        return self.by_id.get(question_id)
+
+    def ids(self):
+        return list(self.by_id)
+
+    def active_first(self, question_id):
+        """Lista cu întrebarea activă prima; calculată o singură dată per întrebare"""
+        ordered = self._active_first.get(question_id)
+        if ordered is None:
+            i = self.position.get(question_id)
+            if i is None:
+                ordered = self.questions
+            else:
+                ordered = (self.questions[i],) + self.questions[:i] + self.questions[i + 1:]
+            self._active_first[question_id] = ordered
+        return ordered
+
+
+def from_firestore(doc):
+    """Documentul din shows/<id>/questions în forma din quiz.json"""
+    return {
+        "id": doc["id"],
+        "question": doc.get("question") or doc.get("text", ""),
+        "options": list(doc.get("options") or []),
+        "correct": doc.get("correct"),
+    }
+
+
+def show_file(show_id):
+    """data/shows/<show_id>.json, doar dacă rămâne în SHOWS_DIR (și după symlink-uri)"""
+    path = os.path.realpath(os.path.join(SHOWS_DIR, f"{show_id}.json"))
+    if os.path.dirname(path) != SHOWS_DIR:
+        return None
+    return path
+
+
+class _ShowEntry:
+    def __init__(self, show_id):
+        self.show_id = show_id
+        self.current = None
+        self.resolved_at = 0
+        self.lock = threading.Lock()
+        path = show_file(show_id)
+        self.file_cache = FileCache(path, name="show_json") if path else None
+        self.file_value = None
+        self.file_set = None
+        self.remote_set = None
+        self.remote_loaded_at = None
+        self.remote_failed = False
+        self.refreshing = False
+        self.used_at = time.monotonic()
+        self.fallback_value = None
+        self.fallback_set = None
+
+
+def _load_known_shows(_key):
+    return frozenset(load_show_ids())
+
+
+known_shows = StaleWhileRevalidateCache("known_shows", _load_known_shows, KNOWN_SHOWS_TTL)
+
+
+def is_known_show(show_id, wait=0):
+    """True pentru un show real: fișier în data/shows sau document (ori sub-colecții) în Firestore.
+
+    wait = cât așteptăm prima încărcare a listei din Firestore; după aceea
+    lista e servită din memorie și reîmprospătată în fundal.
+    """
+    if not is_valid_show_id(show_id):
+        return False
+    path = show_file(show_id)
+    if path is not None and os.path.exists(path):
+        return True
+    shows = known_shows.get("shows", wait).value
+    return shows is not None and show_id in shows
+
+
+def _get_entry(show_id):
+    entry = _entries.get(show_id)
+    if entry is None:
+        with _entries_lock:
+            entry = _entries.get(show_id)
+            if entry is None:
+                if len(_entries) >= MAX_ENTRIES:
+                    # Scoatem show-ul citit cel mai de demult
+                    del _entries[min(_entries, key=lambda k: _entries[k].used_at)]
+                entry = _entries[show_id] = _ShowEntry(show_id)
+    return entry
+
+
+def _unknown_show_set(fallback):
+    """Lista globală, comună tuturor id-urilor care nu sunt ale unui show real"""
+    global _global_value, _global_set
+    value = fallback()
+    if value is not _global_value:
+        _global_set = QuestionSet(None, value, "global")
+        _global_value = value
+    return _global_set
+
+
+def _from_file(entry):
+    if entry.file_cache is None or not os.path.exists(entry.file_cache.path):
+        return None
+    try:
+        value = entry.file_cache.get()
+    except Exception as e:
+        print(f"⚠️ Nu am putut citi întrebările din {entry.file_cache.path}: {e}")
+        return entry.file_set
+    if value is not entry.file_value:
+        entry.file_value = value
+        entry.file_set = QuestionSet(entry.show_id, value, "file")
+    return entry.file_set
+
+
+def _load_remote(entry):
+    try:
+        docs = load_questions_for_show(entry.show_id)
+    except Exception:
+        # O citire eșuată (brownout, circuit deschis) nu înseamnă "show fără
+        # întrebări": păstrăm ultimul set bun și reîncercăm curând
+        entry.remote_failed = True
+        entry.remote_loaded_at = time.monotonic()
+        raise
+    entry.remote_set = QuestionSet(entry.show_id, freeze([from_firestore(d) for d in docs]), "firestore") if docs else None
+    entry.remote_failed = False
+    entry.remote_loaded_at = time.monotonic()
+
+
+def _refresh_remote(entry):
+    try:
+        _load_remote(entry)
+        # Următoarea cerere vede imediat setul nou
+        entry.resolved_at = 0
+    except Exception as e:
+        print(f"⚠️ Reîmprospătarea întrebărilor pentru {entry.show_id} a eșuat: {e}")
+    finally:
+        entry.refreshing = False
+
+
+def _from_firestore(entry):
+    if entry.remote_loaded_at is None:
+        # Prima citire: așteptăm puțin, apoi cădem pe quiz.json
+        try:
+            run_with_timeout("firestore", _load_remote, entry, timeout=LOAD_TIMEOUT)
+        except Exception as e:
+            print(f"⚠️ Întrebările pentru {entry.show_id} nu au venit din Firestore: {e}")
+            entry.remote_failed = True
+            entry.remote_loaded_at = time.monotonic()
+    elif time.monotonic() - entry.remote_loaded_at > (RETRY_INTERVAL if entry.remote_failed else REFRESH_INTERVAL) \
+            and not entry.refreshing:
+        entry.refreshing = True
+        try:
+            get_pool("firestore").submit(_refresh_remote, entry)
+        except PoolSaturatedError:
+            entry.refreshing = False
+    return entry.remote_set
+
+
+def _from_fallback(entry, fallback):
+    value = fallback()
+    if value is not entry.fallback_value:
+        entry.fallback_value = value
+        entry.fallback_set = QuestionSet(entry.show_id, value, "global")
+    return entry.fallback_set
+
+
+def _record_changes(question_set):
+    # Editările intră în jurnalul de versiuni al show-ului, comun tuturor workerilor
+    try:
+        shared_state.record_questions(question_set.show_id, question_set.by_id, question_set.source)
+    except Exception as e:
+        print(f"⚠️ Nu am putut nota schimbările întrebărilor pentru {question_set.show_id}: {e}")
+
+
+def peek_question_set(show_id):
+    """Setul din memorie dacă a fost verificat recent, altfel None (fără I/O)"""
+    entry = _entries.get(show_id)
+    if entry is not None and entry.current is not None:
+        now = time.monotonic()
+        if now - entry.resolved_at < RESOLVE_INTERVAL:
+            entry.used_at = now
+            metrics.cache_hit("question_index")
+            return entry.current
+    return None
+
+
+def get_question_set(show_id, fallback):
+    """Întrebările show-ului; fallback() dă lista globală când show-ul nu are întrebări proprii"""
+    current = peek_question_set(show_id)
+    if current is not None:
+        return current
+    if not is_valid_show_id(show_id):
+        raise UnknownShow(show_id)
+
+    entry = _entries.get(show_id)
+    if entry is None:
+        if not is_known_show(show_id, wait=LOAD_TIMEOUT):
+            return _unknown_show_set(fallback)
+        entry = _get_entry(show_id)
+    entry.used_at = time.monotonic()
+    # Cât timp alt thread re-verifică sursele, servim setul vechi; așteptăm
+    # doar dacă nu avem încă niciun set
+    stale = entry.current
+    if not entry.lock.acquire(blocking=stale is None):
+        return stale
+    try:
+        if entry.current is not None and time.monotonic() - entry.resolved_at < RESOLVE_INTERVAL:
+            return entry.current
+        metrics.cache_miss("question_index")
+        question_set = _from_file(entry) or _from_firestore(entry) or _from_fallback(entry, fallback)
+        if question_set is not entry.current:
+            print(f"📚 {show_id}: {len(question_set)} întrebări din sursa '{question_set.source}'")
+            _record_changes(question_set)
+        entry.current = question_set
+        entry.resolved_at = time.monotonic()
+        return question_set
+    finally:
+        entry.lock.release()
+
+
+def invalidate(show_id=None):
+    """Următoarea cerere re-citește sursele (toate show-urile dacă show_id lipsește)"""
+    with _entries_lock:
+        if show_id is None:
+            _entries.clear()
+        else:
+            _entries.pop(show_id, None)
+
+
+def index_status():
+    with _entries_lock:
+        entries = list(_entries.values())
+    return {
+        e.show_id: {
+            "source": e.current.source if e.current is not None else None,
+            "questions": len(e.current) if e.current is not None else 0,
+            "remote_age_seconds": round(time.monotonic() - e.remote_loaded_at, 1) if e.remote_loaded_at else None,
+        }
+        for e in entries
+    }
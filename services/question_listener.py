@@ -0,0 +1,278 @@
+import os
+import threading
+import time
+from firebase_utils import init_firebase, get_breaker, firestore_call
+from services import question_index
+from services.executor import run_with_timeout
+from services.show_ids import is_valid_show_id
+
+# Ascultători Firestore în timp real pentru întrebarea activă a fiecărui show.
+# Fiecare proces ține în memorie ultimul current_question_id primit prin
+# on_snapshot, așa că rutele de quiz nu mai fac niciun apel de rețea.
+
+RECONNECT_MIN_DELAY = 1     # secunde până la prima reconectare
+RECONNECT_MAX_DELAY = 60    # plafonul pentru backoff-ul exponențial
+SUPERVISOR_INTERVAL = 2     # cât de des verificăm dacă stream-urile mai sunt active
+FIRST_SNAPSHOT_WAIT = 0.5   # cât așteaptă prima cerere după primul snapshot
+FIRST_SNAPSHOT_TIMEOUT = 30 # după cât timp fără snapshot considerăm stream-ul blocat
+MAX_LISTENERS = int(os.getenv("SYNCPLAY_MAX_LISTENERS", "50"))   # stream-uri deschise per proces
+LISTENER_IDLE_TIMEOUT = 600 # un listener necitit de atâta timp e închis
+SINGLE_READ_TIMEOUT = 1     # citirea directă pentru show-urile fără listener
+
+_listeners = {}
+_listeners_lock = threading.Lock()
+_change_callbacks = []
+_supervisor = None
+
+
+class ShowListener:
+    """Ține sincronizată întrebarea activă pentru un singur show"""
+
+    def __init__(self, show_id, db_factory=init_firebase):
+        self.show_id = show_id
+        self.db_factory = db_factory
+        self.question_id = None
+        self.connected = False
+        self.last_snapshot = 0
+        self.last_error = None
+        self.reconnects = 0
+        self.retry_delay = RECONNECT_MIN_DELAY
+        self.next_retry = 0
+        self.started_at = 0
+        self.last_used = time.time()
+        self.probing = False
+        self.first_snapshot = threading.Event()
+        self._watch = None
+        self._lock = threading.Lock()
+
+    @property
+    def stale(self):
+        """True dacă valoarea din memorie nu mai este garantată la zi"""
+        if not self.connected or not self.first_snapshot.is_set():
+            return True
+        watch = self._watch
+        return watch is not None and not getattr(watch, "is_active", True)
+
+    def start(self):
+        """Atașează listener-ul Firestore; programează reîncercarea la eșec"""
+        with self._lock:
+            self._close_watch()
+            self.first_snapshot.clear()
+            self.started_at = time.time()
+            # Cu circuitul deschis nici nu încercăm; supervizorul revine după backoff
+            if not get_breaker("listen").allow():
+                self._mark_down("circuitul Firestore este deschis", record=False)
+                return
+            self.probing = True
+            try:
+                db = self.db_factory()
+                if not db:
+                    raise RuntimeError("Firebase indisponibil")
+                doc_ref = db.collection('shows').document(self.show_id).collection('metadata').document('status')
+                self._watch = doc_ref.on_snapshot(self._on_snapshot)
+                self.connected = True
+                self.last_error = None
+                print(f"👂 Listener pornit pentru {self.show_id}")
+            except Exception as e:
+                self._mark_down(e)
+
+    def stop(self):
+        with self._lock:
+            self._close_watch()
+            self.connected = False
+
+    def check(self, now):
+        """Apelat periodic de supervizor: detectează stream-uri moarte și reconectează"""
+        if self.connected and self.stale:
+            if self.first_snapshot.is_set():
+                self._mark_down("stream-ul Firestore s-a închis")
+            elif now - self.started_at > FIRST_SNAPSHOT_TIMEOUT:
+                self._mark_down("niciun snapshot primit")
+        if not self.connected and now >= self.next_retry:
+            self.reconnects += 1
+            self.start()
+
+    def _mark_down(self, reason, record=True):
+        if record:
+            self.probing = False
+            get_breaker("listen").record(False, time.time() - self.started_at)
+        self.connected = False
+        self.last_error = str(reason)
+        self.next_retry = time.time() + self.retry_delay
+        print(f"⚠️ Listener căzut pentru {self.show_id}: {reason}. Reîncercăm în {self.retry_delay}s")
+        self.retry_delay = min(self.retry_delay * 2, RECONNECT_MAX_DELAY)
+
+    def _close_watch(self):
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception:
+                pass
+            self._watch = None
+
+    def _on_snapshot(self, docs, changes, read_time):
+        # Documentul status poate lipsi; atunci lăsăm apelantul să cadă pe local
+        question_id = None
+        for doc in docs:
+            if doc.exists:
+                question_id = (doc.to_dict() or {}).get("current_question_id", "q1")
+
+        if self.probing:
+            self.probing = False
+            get_breaker("listen").record(True, time.time() - self.started_at)
+
+        previous = self.question_id
+        self.question_id = question_id
+        self.last_snapshot = time.time()
+        self.connected = True
+        self.retry_delay = RECONNECT_MIN_DELAY
+        self.first_snapshot.set()
+
+        if question_id != previous:
+            for callback in list(_change_callbacks):
+                try:
+                    callback(self.show_id, question_id)
+                except Exception as e:
+                    print(f"❌ Eroare în callback-ul de schimbare pentru {self.show_id}: {e}")
+
+
+def evict_idle(now):
+    """Închide listener-ii pe care nu i-a mai citit nimeni de LISTENER_IDLE_TIMEOUT"""
+    with _listeners_lock:
+        idle = [l for l in _listeners.values() if now - l.last_used > LISTENER_IDLE_TIMEOUT]
+        for listener in idle:
+            del _listeners[listener.show_id]
+    for listener in idle:
+        listener.stop()
+        print(f"💤 Listener închis pentru {listener.show_id} (necitit de {LISTENER_IDLE_TIMEOUT}s)")
+
+
+def _supervise():
+    while True:
+        time.sleep(SUPERVISOR_INTERVAL)
+        now = time.time()
+        try:
+            evict_idle(now)
+        except Exception as e:
+            print(f"❌ Eroare la închiderea listener-ilor inactivi: {e}")
+        with _listeners_lock:
+            listeners = list(_listeners.values())
+        for listener in listeners:
+            try:
+                listener.check(now)
+            except Exception as e:
+                print(f"❌ Eroare în supervizorul de listeneri: {e}")
+
+
+def _ensure_supervisor():
+    global _supervisor
+    if _supervisor is None or not _supervisor.is_alive():
+        _supervisor = threading.Thread(target=_supervise, name="question-listener-supervisor")
+        _supervisor.daemon = True
+        _supervisor.start()
+
+
+def ensure_listener(show_id, db_factory=init_firebase):
+    """Returnează listener-ul pentru show, pornindu-l la prima utilizare; None dacă nu putem deschide altul"""
+    listener = _listeners.get(show_id)
+    if listener is not None:
+        listener.last_used = time.time()
+        return listener
+    if not is_valid_show_id(show_id):
+        return None
+
+    with _listeners_lock:
+        listener = _listeners.get(show_id)
+        if listener is None:
+            # Fiecare listener e un stream Firestore permanent: nu deschidem oricâte
+            if len(_listeners) >= MAX_LISTENERS:
+                print(f"⚠️ Limita de {MAX_LISTENERS} listeneri atinsă, {show_id} folosește starea locală")
+                return None
+            listener = ShowListener(show_id, db_factory)
+            _listeners[show_id] = listener
+            _ensure_supervisor()
+            start_now = True
+        else:
+            start_now = False
+
+    if start_now:
+        listener.start()
+    return listener
+
+
+def read_active_question(show_id, db_factory=init_firebase):
+    """O singură citire a documentului status, fără listener; None dacă nu reușește"""
+    def read():
+        db = db_factory()
+        if not db:
+            return None
+        doc_ref = db.collection('shows').document(show_id).collection('metadata').document('status')
+        with firestore_call("get_active_question"):
+            doc = doc_ref.get()
+        return (doc.to_dict() or {}).get("current_question_id", "q1") if doc.exists else None
+
+    try:
+        return run_with_timeout("firestore", read, timeout=SINGLE_READ_TIMEOUT)
+    except Exception as e:
+        print(f"⚠️ Citirea întrebării active pentru {show_id} a eșuat: {e}")
+        return None
+
+
+def get_active_question(show_id, wait=FIRST_SNAPSHOT_WAIT, db_factory=init_firebase):
+    """Întrebarea activă din memorie sau None dacă listener-ul nu e de încredere"""
+    if show_id not in _listeners:
+        # Stream-uri permanente doar pentru show-uri reale; un id oarecare
+        # nu ocupă un loc din MAX_LISTENERS, ci face o citire directă
+        if not is_valid_show_id(show_id):
+            return None
+        if not question_index.is_known_show(show_id):
+            return read_active_question(show_id, db_factory)
+    listener = ensure_listener(show_id, db_factory)
+    if listener is None:
+        return None
+    # Cât timp Firestore are probleme nu ținem cererea pe loc după primul snapshot
+    if not listener.first_snapshot.is_set() and listener.connected and wait and get_breaker("listen").closed:
+        listener.first_snapshot.wait(wait)
+    if listener.stale:
+        return None
+    return listener.question_id
+
+
+def peek_active_question(show_id):
+    """Ca get_active_question, dar fără să pornească listener-ul sau să aștepte (pentru bucla asyncio)"""
+    listener = _listeners.get(show_id)
+    if listener is None or listener.stale:
+        return None
+    listener.last_used = time.time()
+    return listener.question_id
+
+
+def add_change_callback(callback):
+    """Înregistrează callback(show_id, question_id) apelat la fiecare schimbare"""
+    if callback not in _change_callbacks:
+        _change_callbacks.append(callback)
+
+
+def listener_status():
+    """Starea tuturor listener-ilor, pentru endpoint-urile de diagnostic"""
+    with _listeners_lock:
+        listeners = list(_listeners.values())
+    return {
+        l.show_id: {
+            "question_id": l.question_id,
+            "connected": l.connected,
+            "stale": l.stale,
+            "last_snapshot": l.last_snapshot,
+            "last_error": l.last_error,
+            "reconnects": l.reconnects,
+        }
+        for l in listeners
+    }
+
+
+def stop_all():
+    with _listeners_lock:
+        listeners = list(_listeners.values())
+        _listeners.clear()
+    for listener in listeners:
+        listener.stop()
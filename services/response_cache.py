@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import json
+import threading
+from flask import Response, request
+from werkzeug.http import parse_accept_header, parse_etags
+from services import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli este opțional; fără el servim doar gzip
+    brotli = None
+
+# Răspunsuri JSON pre-serializate, cu ETag puternic și variante comprimate.
+# Un snapshot este valid cât timp obiectul sursă (lista de întrebări din
+# cache, scena din cache) este exact același obiect; orice re-încărcare
+# produce un obiect nou și deci un snapshot nou.
+
+MIN_COMPRESS_SIZE = 512  # sub această dimensiune compresia nu merită
+MAX_SNAPSHOTS = 256
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+class ResponseSnapshot:
+    """Octeții unui răspuns, randați o singură dată, plus variantele comprimate"""
+
+    def __init__(self, body, source):
+        self.source = source
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.variants = {"identity": body}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body)
+
+    def etag_for(self, encoding):
+        # Fiecare variantă are ETag-ul ei, altfel ETag-ul puternic ar minți
+        return self.etag if encoding == "identity" else f"{self.etag}-{encoding}"
+
+
+def get_snapshot(key, source, render):
+    """Snapshot-ul pentru key; render() este apelat doar dacă sursa s-a schimbat"""
+    snapshot = _snapshots.get(key)
+    if snapshot is not None and snapshot.source is source:
+        metrics.cache_hit("response_snapshot")
+        return snapshot
+
+    metrics.cache_miss("response_snapshot")
+
+    # Aceeași formă ca jsonify (ASCII, chei sortate), dar fără context Flask
+    body = json.dumps(render(), ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode("utf-8") + b"\n"
+    snapshot = ResponseSnapshot(body, source)
+    with _snapshots_lock:
+        if len(_snapshots) >= MAX_SNAPSHOTS and key not in _snapshots:
+            _snapshots.pop(next(iter(_snapshots)))
+        _snapshots[key] = snapshot
+    return snapshot
+
+
+def negotiate(snapshot, accept_encoding=None, if_none_match=None):
+    """(status, corp, headere) pentru snapshot, independent de framework (Flask sau ASGI)"""
+    accepted = parse_accept_header(accept_encoding)
+    encoding = "identity"
+    for candidate in ("br", "gzip"):
+        if candidate in snapshot.variants and accepted[candidate] > 0:
+            encoding = candidate
+            break
+    etag = snapshot.etag_for(encoding)
+    headers = {"ETag": f'"{etag}"', "Vary": "Accept-Encoding"}
+
+    if if_none_match:
+        client_etags = parse_etags(if_none_match)
+        for variant in snapshot.variants:
+            if client_etags.contains(snapshot.etag_for(variant)):
+                return 304, b"", headers
+
+    headers["Cache-Control"] = "no-cache"
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return 200, snapshot.variants[encoding], headers
+
+
+def snapshot_response(snapshot):
+    """Răspunsul Flask pentru snapshot, cu 304 pe If-None-Match"""
+    status, body, headers = negotiate(
+        snapshot,
+        request.headers.get("Accept-Encoding"),
+        request.headers.get("If-None-Match")
+    )
+    if status == 304:
+        return Response(status=304, headers=headers)
+    return Response(body, status=status, headers=headers, mimetype="application/json")
+
+
+def clear_snapshots():
+    with _snapshots_lock:
+        _snapshots.clear()
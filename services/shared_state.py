@@ -0,0 +1,410 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from services.show_ids import is_valid_show_id
+
+try:
+    import fcntl
+except ImportError:  # fără fcntl (Windows) rămâne doar backend-ul din memorie
+    fcntl = None
+
+# Stare partajată între workerii gunicorn de pe aceeași mașină.
+# Starea principală este un obiect JSON mic: {"active": {show_id: question_id},
+# "slots": {show_id: {slot, ultima activitate}}, "timelines": ...}, ținut
+# într-un fișier mapat în memorie. Fiecare scriere e atomică (flock exclusiv,
+# apoi payload și antet) și crește un contor de versiune. O citire compară
+# doar versiunea din antet cu ultima văzută; JSON-ul se parsează din nou numai
+# după o schimbare, deci o citire obișnuită e un acces la memorie.
+#
+# Versiunea, jurnalul de schimbări și întrebările fiecărui show stau într-un
+# slot propriu (alt fișier, același format), ca editarea unui show să nu
+# re-serializeze și să nu invalideze starea celorlalte. Sunt cel mult
+# MAX_SHOWS sloturi; un show nou îl ia pe cel al show-ului cu cea mai veche
+# activitate. Doar show-urile cu întrebări proprii sau cu o întrebare
+# activă setată primesc slot. Starea principală ține și "version_floor",
+# peste versiunile tuturor show-urilor scoase: un slot nou pornește de acolo,
+# ca versiunea unui show revenit să nu coboare sub ce au văzut deja clienții.
+#
+# SYNCPLAY_STATE_BACKEND alege implementarea: "mmap" (implicit) sau "memory"
+# (un singur proces: dezvoltare, platforme fără fcntl).
+
+STATE_BACKEND = os.getenv("SYNCPLAY_STATE_BACKEND", "mmap")
+STATE_FILE = os.getenv("SYNCPLAY_STATE_FILE", os.path.join(tempfile.gettempdir(), "syncplay-state.bin"))
+STATE_SIZE = int(os.getenv("SYNCPLAY_STATE_SIZE", str(1024 * 1024)))
+CHANGE_LOG_SIZE = int(os.getenv("SYNCPLAY_CHANGE_LOG_SIZE", "100"))   # schimbări păstrate per show
+MAX_SHOWS = int(os.getenv("SYNCPLAY_MAX_SHOWS", "64"))                 # sloturi de show
+SLOT_SIZE = int(os.getenv("SYNCPLAY_SLOT_SIZE", str(256 * 1024)))      # octeți per slot
+TOUCH_INTERVAL = 60        # cât de des notăm activitatea unui show în starea principală
+
+_MAGIC = b"SPS1"
+_HEADER = struct.Struct("<4sQI")   # magic, versiune, lungimea payload-ului
+
+
+class StateTooLarge(Exception):
+    """Starea serializată nu mai încape în fișierul partajat"""
+
+
+class MemoryBackend:
+    """Starea într-un dict din procesul curent (nu e partajată între workeri)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._data = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def version(self):
+        return self._version
+
+    def read(self):
+        """(versiune, stare); starea întoarsă nu trebuie modificată"""
+        return self._version, self._data
+
+    def update(self, fn):
+        """Aplică fn(copie) atomic și întoarce (versiune, stare nouă); fn întoarce None dacă nu schimbă nimic"""
+        with self._lock:
+            data = fn(json.loads(json.dumps(self._data)))
+            if data is None:
+                return self._version, self._data
+            self._version += 1
+            self._data = data
+            return self._version, data
+
+
+class MmapBackend:
+    """Starea într-un fișier mapat în memorie, cu flock pentru scrieri"""
+
+    name = "mmap"
+
+    def __init__(self, path=STATE_FILE, size=STATE_SIZE):
+        self.path = path
+        self.size = size
+        self._fd = None
+        self._map = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._cached_version = None
+        self._cached = {}
+
+    def _ensure_open(self):
+        # După fork redeschidem fișierul: flock e legat de descriptor, iar un
+        # descriptor moștenit ar face ca părintele și copilul să împartă lacătul
+        pid = os.getpid()
+        if self._map is not None and self._pid == pid:
+            return self._map
+        with self._lock:
+            if self._map is None or self._pid != pid:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    if os.fstat(fd).st_size < self.size:
+                        os.ftruncate(fd, self.size)
+                    region = mmap.mmap(fd, self.size)
+                    if region[:4] != _MAGIC:
+                        self._write(region, 0, b"{}")
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                self._fd, self._map, self._pid = fd, region, pid
+                self._cached_version = None
+        return self._map
+
+    def _write(self, region, version, payload):
+        if _HEADER.size + len(payload) > self.size:
+            raise StateTooLarge(f"Starea partajată are {len(payload)} octeți, limita este {self.size - _HEADER.size}")
+        # Payload-ul întâi, antetul la final: cine vede versiunea nouă vede și datele
+        region[_HEADER.size:_HEADER.size + len(payload)] = payload
+        _HEADER.pack_into(region, 0, _MAGIC, version, len(payload))
+
+    def _load(self, region):
+        _, version, length = _HEADER.unpack_from(region, 0)
+        data = json.loads(region[_HEADER.size:_HEADER.size + length])
+        self._cached_version, self._cached = version, data
+        return version, data
+
+    def version(self):
+        return _HEADER.unpack_from(self._ensure_open(), 0)[1]
+
+    def read(self):
+        """(versiune, stare); fără lacăt cât timp versiunea nu s-a schimbat"""
+        region = self._ensure_open()
+        version = _HEADER.unpack_from(region, 0)[1]
+        if version == self._cached_version:
+            return version, self._cached
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+            try:
+                return self._load(region)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def update(self, fn):
+        """Citire-modificare-scriere sub flock exclusiv; întoarce (versiune, stare nouă)"""
+        region = self._ensure_open()
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                version, current = self._load(region)
+                data = fn(json.loads(json.dumps(current)))
+                if data is None:
+                    return version, current
+                payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                self._write(region, version + 1, payload)
+                self._cached_version, self._cached = version + 1, data
+                return version + 1, data
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "mmap": MmapBackend,
+}
+
+_store = None
+_store_lock = threading.Lock()
+_slots = {}
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = STATE_BACKEND if (STATE_BACKEND != "mmap" or fcntl is not None) else "memory"
+                _store = BACKENDS[backend]()
+    return _store
+
+
+def read_state():
+    return get_store().read()[1]
+
+
+def state_version():
+    return get_store().version()
+
+
+def update_state(fn):
+    """fn primește o copie a stării și întoarce starea nouă (None = nimic de scris); totul atomic între workeri"""
+    return get_store().update(fn)
+
+
+def get_active(show_id, default=None):
+    """Întrebarea activă salvată local pentru show (citire din memorie)"""
+    return read_state().get("active", {}).get(show_id, default)
+
+
+def _slot_store(index):
+    store = _slots.get(index)
+    if store is None:
+        with _store_lock:
+            store = _slots.get(index)
+            if store is None:
+                if get_store().name == "mmap":
+                    store = MmapBackend(f"{STATE_FILE}.show{index}", SLOT_SIZE)
+                else:
+                    store = MemoryBackend()
+                _slots[index] = store
+    return store
+
+
+def _assign_slot(state, show_id, now):
+    """Slotul show-ului (apelat dintr-un update al stării principale).
+
+    Un show nou primește un slot liber sau îl ia pe cel al show-ului cu cea
+    mai veche activitate, preferând show-urile fără timeline.
+    """
+    state.pop("shows", None)   # formatul vechi, cu toate show-urile într-un singur blob
+    slots = state.setdefault("slots", {})
+    entry = slots.get(show_id)
+    if entry is None:
+        used = {e["slot"] for e in slots.values()}
+        free = next((i for i in range(MAX_SHOWS) if i not in used), None)
+        if free is None:
+            timelines = state.get("timelines", {})
+            victim = min(slots, key=lambda s: (s in timelines, slots[s]["touched"]))
+            free = slots.pop(victim)["slot"]
+            state.get("active", {}).pop(victim, None)
+            # +1: o scriere a show-ului scos, deja în curs în slot, mai poate crește versiunea
+            evicted = _slot_store(free).read()[1]
+            if evicted.get("show_id") == victim:
+                state["version_floor"] = max(state.get("version_floor", 0), evicted["version"] + 1)
+            print(f"♻️ Starea show-ului {victim} a fost scoasă din memorie pentru {show_id}")
+        entry = slots[show_id] = {"slot": free}
+    entry["touched"] = now
+    return entry["slot"]
+
+
+def _claim_slot(show_id):
+    now = time.time()
+    entry = read_state().get("slots", {}).get(show_id)
+    if entry is not None and now - entry["touched"] < TOUCH_INTERVAL:
+        return entry["slot"]
+
+    def apply(state):
+        _assign_slot(state, show_id, now)
+        return state
+    _, state = update_state(apply)
+    return state["slots"][show_id]["slot"]
+
+
+def _read_show(show_id):
+    """Starea show-ului din slotul lui sau None; un slot dat între timp altui show nu contează"""
+    entry = read_state().get("slots", {}).get(show_id)
+    if entry is None:
+        return None
+    show = _slot_store(entry["slot"]).read()[1]
+    return show if show.get("show_id") == show_id else None
+
+
+def _update_show(show_id, index, change):
+    """Aplică change(show) în slotul show-ului (change întoarce False dacă nu schimbă nimic).
+
+    Întoarce starea show-ului sau None dacă slotul a fost dat între timp altui show.
+    """
+    result = [None]
+
+    def apply(data):
+        state = read_state()
+        if state.get("slots", {}).get(show_id, {}).get("slot") != index:
+            return None
+        if data.get("show_id") != show_id:
+            data = {"show_id": show_id, "version": state.get("version_floor", 0), "log": [],
+                    "questions": None, "source": None}
+        result[0] = data
+        return data if change(data) else None
+    _slot_store(index).update(apply)
+    return result[0]
+
+
+def _append_change(show, change):
+    show["version"] += 1
+    change["v"] = show["version"]
+    show["log"].append(change)
+    del show["log"][:-CHANGE_LOG_SIZE]
+
+
+def set_active(show_id, question_id):
+    """Salvează întrebarea activă pentru un singur show; o schimbare reală crește versiunea show-ului"""
+    if not is_valid_show_id(show_id):
+        print(f"⚠️ Întrebarea activă pentru show_id invalid ignorată: {show_id!r}")
+        return 0
+    current = read_state()
+    if current.get("active", {}).get(show_id) == question_id and show_id in current.get("slots", {}):
+        return show_version(show_id)
+
+    now = time.time()
+    changed = [False]
+
+    def apply(state):
+        active = state.setdefault("active", {})
+        _assign_slot(state, show_id, now)
+        changed[0] = active.get(show_id) != question_id
+        active[show_id] = question_id
+        return state
+    _, state = update_state(apply)
+
+    def change(show):
+        if not changed[0]:
+            return False
+        _append_change(show, {"active": question_id})
+        return True
+    show = _update_show(show_id, state["slots"][show_id]["slot"], change)
+    return show["version"] if show is not None else 0
+
+
+def record_questions(show_id, questions, source):
+    """Compară întrebările (id -> întrebare) cu ultimele știute și notează ce s-a editat sau șters"""
+    if not is_valid_show_id(show_id):
+        return 0
+    questions = json.loads(json.dumps(questions))
+    show = _read_show(show_id)
+    if show is not None and show["questions"] == questions:
+        return show["version"]
+    # quiz.json e doar rezerva unui show fără întrebări proprii: un id oarecare
+    # din URL nu primește slot și nu scoate din memorie show-urile reale
+    if source == "global" and show is None:
+        return 0
+
+    def change(show):
+        known = show["questions"]
+        if known == questions:
+            return False
+        # ...și nici nu e o editare: nu anunțăm clienții că toate întrebările s-au schimbat
+        if source == "global" and show["source"] not in (None, "global"):
+            return False
+        known = known or {}
+        show["questions"] = questions
+        show["source"] = source
+        # Și prima înregistrare e o versiune, ca un client sincronizat să nu rămână la 0
+        _append_change(show, {
+            "edited": [qid for qid, q in questions.items() if known.get(qid) != q],
+            "removed": [qid for qid in known if qid not in questions],
+        })
+        return True
+    show = _update_show(show_id, _claim_slot(show_id), change)
+    return show["version"] if show is not None else 0
+
+
+def show_version(show_id):
+    show = _read_show(show_id)
+    return show["version"] if show is not None else 0
+
+
+def show_questions(show_id):
+    """(versiune, întrebările id -> întrebare din acea versiune); (0, None) pentru un show fără slot"""
+    show = _read_show(show_id)
+    if show is None or show["questions"] is None:
+        return 0, None
+    return show["version"], show["questions"]
+
+
+def show_changes(show_id, since):
+    """(versiune, schimbări de după since comasate) sau (versiune, None) când clientul trebuie să ia tot"""
+    show = _read_show(show_id)
+    version = show["version"] if show is not None else 0
+    if since <= 0 or since > version:
+        return version, None
+    if since == version:
+        return version, {"edited": [], "removed": []}
+    log = show["log"]
+    # Jurnalul e limitat: dacă s-au pierdut schimbări de după since, trimitem tot
+    if not log or log[0]["v"] > since + 1:
+        return version, None
+
+    delta = {"edited": {}, "removed": {}}
+    for change in log:
+        if change["v"] <= since:
+            continue
+        if "active" in change:
+            delta["active"] = change["active"]
+        for qid in change.get("edited", ()):
+            delta["removed"].pop(qid, None)
+            delta["edited"][qid] = True
+        for qid in change.get("removed", ()):
+            delta["edited"].pop(qid, None)
+            delta["removed"][qid] = True
+    # Conținutul editat vine tot de aici, deci e exact cel al versiunii anunțate
+    known = show["questions"] or {}
+    delta["edited"] = [known[qid] for qid in delta["edited"] if qid in known]
+    delta["removed"] = list(delta["removed"])
+    return version, delta
+
+
+def active_snapshot():
+    return dict(read_state().get("active", {}))
+
+
+def store_status():
+    store = get_store()
+    return {
+        "backend": store.name,
+        "version": store.version(),
+        "path": getattr(store, "path", None),
+        "shows": len(read_state().get("slots", {})),
+        "max_shows": MAX_SHOWS,
+    }
@@ -0,0 +1,13 @@
+import re
+
+# Id-ul show-ului vine din URL și ajunge în căi de fișiere, chei din starea
+# partajată și documente Firestore: acceptăm doar forma id-urilor reale.
+SHOW_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def is_valid_show_id(show_id):
+    return isinstance(show_id, str) and SHOW_ID_PATTERN.match(show_id) is not None
+
+
+class UnknownShow(ValueError):
+    """show_id-ul nu poate fi al unui show real (rutele răspund cu 404)"""
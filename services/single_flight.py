@@ -0,0 +1,62 @@
+import threading
+
+# Coalescing pentru apeluri identice concurente ("single-flight").
+# Primul apelant pentru o cheie face apelul real; cei care vin cât timp
+# acesta e în curs așteaptă același rezultat (sau aceeași excepție).
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Un singur apel în zbor per cheie; restul apelanților îi împart rezultatul"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "shared": 0, "timeouts": 0, "errors": 0}
+
+    def do(self, key, fn, timeout=None):
+        """Rulează fn() o singură dată pentru apelurile concurente cu aceeași cheie"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["leaders"] += 1
+            else:
+                call.waiters += 1
+                self.stats["shared"] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                    if call.error is not None:
+                        self.stats["errors"] += 1
+                call.done.set()
+        elif not call.done.wait(timeout):
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise TimeoutError(f"Timeout la așteptarea rezultatului pentru {key!r}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._calls)}
@@ -0,0 +1,40 @@
+import os
+import time
+from contextlib import contextmanager
+
+# Raport cu durata fiecărei etape de pornire (importuri, blueprints,
+# primul client Firebase/Gemini, prima cerere), per proces.
+
+PROCESS_START = time.time()
+
+_stages = []
+
+
+def record_stage(name, seconds):
+    _stages.append({
+        "stage": name,
+        "ms": round(seconds * 1000, 1),
+        "pid": os.getpid(),
+        "at": round(time.time() - PROCESS_START, 3)
+    })
+    print(f"⏱️ Pornire [{name}]: {seconds * 1000:.0f} ms")
+
+
+@contextmanager
+def stage(name):
+    """Măsoară o etapă de pornire"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def startup_report():
+    pid = os.getpid()
+    return {
+        "pid": pid,
+        "uptime_seconds": round(time.time() - PROCESS_START, 3),
+        # Etapele din master (înainte de fork, cu --preload) apar cu alt pid
+        "stages": list(_stages)
+    }
@@ -0,0 +1,214 @@
+import os
+import threading
+import time
+from concurrent.futures import wait
+from services import metrics
+from services.executor import get_pool, PoolSaturatedError
+
+# Cache stale-while-revalidate pentru date lente (Firestore în panoul /admin).
+# Fiecare cheie are timpul ei de expirare. O valoare expirată se servește
+# imediat, iar reîmprospătarea pornește în fundal (o singură dată per cheie).
+# Cheile citite recent sunt reîmprospătate înainte să expire de un thread
+# comun, așa că un panou folosit des nu vede aproape niciodată date expirate.
+# Doar prima încărcare a unei chei așteaptă, și atunci doar până la timeout.
+
+REFRESH_AHEAD = 0.2      # fracțiunea din TTL înainte de expirare în care reîmprospătăm
+RETRY_DELAY = 10         # secunde între încercări după o reîmprospătare eșuată
+IDLE_AFTER = 600         # cheile necitite de atâta timp nu mai sunt ținute la zi
+SWEEP_INTERVAL = 5       # cât de des verifică thread-ul comun cheile care expiră
+
+_caches = []
+_sweeper = None
+_sweeper_pid = None
+_sweeper_lock = threading.Lock()
+
+
+class _Entry:
+    def __init__(self):
+        self.value = None
+        self.loaded_at = None
+        self.expires_at = 0
+        self.read_at = 0
+        self.retry_at = 0
+        self.error = None
+        self.future = None
+
+
+class Lookup:
+    """Rezultatul unei căutări: valoarea din cache și, dacă e cazul, încărcarea în curs"""
+
+    def __init__(self, cache, key, entry, future):
+        self.cache = cache
+        self.key = key
+        self.value = entry.value
+        self.error = None
+        self.timed_out = False
+        self.stale = entry.loaded_at is not None and time.monotonic() >= entry.expires_at
+        self.future = future if entry.loaded_at is None else None
+
+    def resolve(self, timeout):
+        """Așteaptă prima încărcare (dacă e cazul) cel mult timeout secunde"""
+        if self.future is None:
+            return self
+        try:
+            self.value = self.future.result(timeout=max(timeout, 0))
+        except TimeoutError:
+            # Încărcarea continuă în fundal și umple cache-ul pentru cererea următoare
+            self.timed_out = True
+            self.error = f"Timeout la obținerea datelor după {timeout:.1f} secunde"
+        except Exception as e:
+            self.error = str(e)
+        return self
+
+
+class StaleWhileRevalidateCache:
+    """Valori încărcate de loader(key) în pool-ul backend-ului, cu TTL propriu fiecărei chei"""
+
+    def __init__(self, name, loader, ttl, backend="firestore", proactive=True):
+        self.name = name
+        self.loader = loader
+        self.proactive = proactive   # False: se reîmprospătează doar la citire (operații scumpe)
+        self.ttl = ttl if callable(ttl) else (lambda key, seconds=ttl: seconds)
+        self.backend = backend
+        self._entries = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.setdefault(key, _Entry())
+        return entry
+
+    def _refresh(self, key, entry):
+        """Pornește încărcarea cheii dacă nu rulează deja; întoarce future-ul sau None"""
+        with self._lock:
+            if entry.future is not None:
+                return entry.future
+            if time.monotonic() < entry.retry_at:
+                return None
+            try:
+                entry.future = get_pool(self.backend).submit(self._load, key, entry)
+            except (PoolSaturatedError, RuntimeError) as e:
+                # RuntimeError: pool-ul e oprit (procesul se închide)
+                entry.error = str(e)
+                entry.retry_at = time.monotonic() + RETRY_DELAY
+                return None
+            return entry.future
+
+    def _load(self, key, entry):
+        try:
+            value = self.loader(key)
+            if not value:
+                raise LookupError(f"Nu s-au găsit date pentru {key}")
+        except Exception as e:
+            entry.error = str(e)
+            entry.retry_at = time.monotonic() + RETRY_DELAY
+            print(f"⚠️ Reîmprospătarea {self.name}[{key}] a eșuat: {e}")
+            raise
+        else:
+            now = time.monotonic()
+            entry.value = value
+            entry.loaded_at = now
+            entry.expires_at = now + self.ttl(key)
+            entry.error = None
+            return value
+        finally:
+            with self._lock:
+                entry.future = None
+
+    def lookup(self, key):
+        """Valoarea din cache fără să aștepte; pornește (re)încărcarea dacă e nevoie"""
+        _ensure_sweeper()
+        entry = self._entry(key)
+        now = time.monotonic()
+        entry.read_at = now
+        future = None
+        if entry.loaded_at is None:
+            metrics.cache_miss(self.name)
+            future = self._refresh(key, entry)
+        else:
+            metrics.cache_hit(self.name)
+            if now >= entry.expires_at - self.ttl(key) * REFRESH_AHEAD:
+                self._refresh(key, entry)
+        lookup = Lookup(self, key, entry, future)
+        if future is None and entry.loaded_at is None:
+            lookup.error = entry.error or "Datele nu sunt încă disponibile"
+        return lookup
+
+    def get(self, key, timeout=2):
+        return self.lookup(key).resolve(timeout)
+
+    def sweep(self):
+        """Reîmprospătează din timp cheile folosite recent care urmează să expire"""
+        if not self.proactive:
+            return
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._entries.items())
+        for key, entry in items:
+            if entry.loaded_at is None or now - entry.read_at > IDLE_AFTER:
+                continue
+            if now >= entry.expires_at - self.ttl(key) * REFRESH_AHEAD:
+                self._refresh(key, entry)
+
+    def invalidate(self, key=None):
+        """Uită valorile (toate dacă key lipsește); următoarea cerere le încarcă din nou"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._entries.items())
+        return {
+            str(key): {
+                "age_seconds": round(now - entry.loaded_at, 1) if entry.loaded_at is not None else None,
+                "expires_in_seconds": round(entry.expires_at - now, 1) if entry.loaded_at is not None else None,
+                "refreshing": entry.future is not None,
+                "error": entry.error,
+            }
+            for key, entry in items
+        }
+
+
+def resolve_all(lookups, timeout):
+    """Așteaptă în paralel toate încărcările, cu un singur termen comun"""
+    lookups = [l for l in lookups if l is not None]
+    pending = [l.future for l in lookups if l.future is not None]
+    if pending:
+        wait(pending, timeout=timeout)
+    for lookup in lookups:
+        lookup.resolve(0)
+    return lookups
+
+
+def _sweep_forever():
+    while True:
+        time.sleep(SWEEP_INTERVAL)
+        for cache in list(_caches):
+            try:
+                cache.sweep()
+            except Exception as e:
+                print(f"⚠️ Eroare la reîmprospătarea cache-ului {cache.name}: {e}")
+
+
+def _ensure_sweeper():
+    # Thread-ul se pornește la prima utilizare și din nou după fork
+    global _sweeper, _sweeper_pid
+    pid = os.getpid()
+    if _sweeper is not None and _sweeper_pid == pid:
+        return
+    with _sweeper_lock:
+        if _sweeper is None or _sweeper_pid != pid:
+            _sweeper = threading.Thread(target=_sweep_forever, name="swr-cache-sweeper", daemon=True)
+            _sweeper.start()
+            _sweeper_pid = pid
+
+
+def _register(cache):
+    _caches.append(cache)
@@ -0,0 +1,386 @@
+import heapq
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from services import shared_state
+from services.executor import get_pool, PoolSaturatedError
+from services.logs import log_event
+from services.response_cache import get_snapshot
+
+try:
+    import fcntl
+except ImportError:  # fără fcntl fiecare proces se consideră lider (un singur worker)
+    fcntl = None
+
+# Lansarea automată a întrebărilor după timecode-ul emisiunii.
+# Operatorul încarcă un timeline per show (timecode -> întrebare sau scenă),
+# pornește emisiunea și, la nevoie, pune pauză sau decalează tot ce a rămas.
+# Timeline-ul stă în starea partajată, deci toți workerii îl văd. Fiecare
+# worker își încălzește singur cache-urile cu PREWARM_SECONDS înainte de
+# fiecare eveniment; doar liderul (cel care ține flock-ul) lansează întrebarea.
+#
+# Starea partajată și flock-ul sunt locale mașinii: timeline-ul funcționează
+# pe un singur dyno. Pe mai multe, fiecare ar avea timeline-ul lui (încărcat
+# doar pe dyno-ul care a primit cererea) și propriul lider.
+
+SCHEDULER_ENABLED = os.getenv("SYNCPLAY_SCHEDULER", "1") == "1"
+LOCK_FILE = os.getenv("SYNCPLAY_SCHEDULER_LOCK", os.path.join(tempfile.gettempdir(), "syncplay-scheduler.lock"))
+PREWARM_SECONDS = 5       # cât de devreme pregătim cache-urile și payload-urile
+MAX_LATENESS = 10         # un eveniment ratat cu mai mult de atât nu se mai lansează
+POLL_INTERVAL = 0.25      # cât de des observăm schimbările făcute de alți workeri
+TIMECODE_FPS = 25         # cadre pe secundă pentru timecode-uri HH:MM:SS:FF (PAL)
+MAX_TIMECODE = 24 * 3600  # un eveniment la peste o zi de la start e o greșeală de tastare
+
+FIRED, MISSED = "fired", "missed"
+
+_DIGITS = re.compile(r"^\d+$")
+_DECIMAL = re.compile(r"^\d+(\.\d+)?$")
+
+_scheduler = None
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def parse_timecode(value):
+    """Secunde de la începutul emisiunii din 90, "MM:SS", "HH:MM:SS(.ms)" sau "HH:MM:SS:FF" """
+    if isinstance(value, bool):
+        raise ValueError(f"Timecode invalid: {value}")
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip()
+        if text.startswith("-"):
+            raise ValueError(f"Timecode negativ: {value}")
+        parts = text.split(":")
+        frames = 0
+        if len(parts) == 4:
+            if not _DIGITS.match(parts[-1]) or int(parts[-1]) >= TIMECODE_FPS:
+                raise ValueError(f"Timecode invalid: {value}")
+            frames = int(parts.pop())
+            last = _DIGITS
+        else:
+            # Doar ultimul câmp poate avea zecimale (și doar fără cadre)
+            last = _DECIMAL
+        if not 1 <= len(parts) <= 3 or not all(_DIGITS.match(p) for p in parts[:-1]) or not last.match(parts[-1]):
+            raise ValueError(f"Timecode invalid: {value}")
+        fields = [float(p) for p in parts]
+        # Minutele și secundele dintr-un timecode compus sunt sub 60
+        if any(f >= 60 for f in fields[1:]):
+            raise ValueError(f"Timecode invalid: {value}")
+        seconds = 0.0
+        for field in fields:
+            seconds = seconds * 60 + field
+        seconds += frames / TIMECODE_FPS
+    # NaN ar bloca heap-ul planificatorului și ar strica JSON-ul din /admin/timeline
+    if not math.isfinite(seconds):
+        raise ValueError(f"Timecode invalid: {value}")
+    if seconds < 0:
+        raise ValueError(f"Timecode negativ: {value}")
+    if seconds > MAX_TIMECODE:
+        raise ValueError(f"Timecode prea mare (peste {MAX_TIMECODE // 3600} ore): {value}")
+    return seconds
+
+
+def finite_seconds(value, name):
+    """Un număr de secunde finit (start_at, decalaj), altfel ValueError"""
+    seconds = float(value)
+    if not math.isfinite(seconds):
+        raise ValueError(f"{name} invalid: {value}")
+    return seconds
+
+
+def normalize_events(events):
+    """Evenimentele încărcate de operator, validate și sortate după timecode"""
+    normalized = []
+    for event in events:
+        if not event.get("question_id") and not event.get("scene"):
+            raise ValueError("Fiecare eveniment are nevoie de question_id sau scene")
+        normalized.append({
+            "at": parse_timecode(event.get("timecode", event.get("at"))),
+            "question_id": event.get("question_id"),
+            "scene": event.get("scene"),
+        })
+    return sorted(normalized, key=lambda e: e["at"])
+
+
+def _update_timeline(show_id, change):
+    """Aplică change(timeline) atomic între workeri; întoarce timeline-ul nou"""
+    def apply(state):
+        timelines = state.setdefault("timelines", {})
+        timeline = timelines.get(show_id)
+        if timeline is None:
+            raise KeyError(show_id)
+        change(timeline, time.time())
+        return state
+    _, state = shared_state.update_state(apply)
+    _wakeup.set()
+    return state["timelines"][show_id]
+
+
+def upload(show_id, events):
+    """Înlocuiește timeline-ul show-ului; emisiunea trebuie pornită separat"""
+    events = normalize_events(events)
+
+    def apply(state):
+        state.setdefault("timelines", {})[show_id] = {
+            "events": events, "started_at": None, "paused_at": None, "shift": 0.0, "done": {}
+        }
+        return state
+    shared_state.update_state(apply)
+    _wakeup.set()
+    return status(show_id)
+
+
+def start(show_id, start_at=None, offset=0):
+    """Emisiunea începe la start_at (acum, implicit); offset = timecode-ul la care suntem deja"""
+    start = finite_seconds(start_at, "start_at") if start_at is not None else None
+    parse_timecode(offset)
+
+    def change(timeline, now):
+        timeline["started_at"] = (now if start_at is None else start) - parse_timecode(offset)
+        timeline["paused_at"] = None
+        timeline["shift"] = 0.0
+        timeline["done"] = {}
+    _update_timeline(show_id, change)
+    return status(show_id)
+
+
+def pause(show_id):
+    def change(timeline, now):
+        if timeline["paused_at"] is None:
+            timeline["paused_at"] = now
+    _update_timeline(show_id, change)
+    return status(show_id)
+
+
+def resume(show_id):
+    """Timpul petrecut în pauză decalează toate evenimentele rămase"""
+    def change(timeline, now):
+        if timeline["paused_at"] is not None:
+            timeline["shift"] += now - timeline["paused_at"]
+            timeline["paused_at"] = None
+    _update_timeline(show_id, change)
+    return status(show_id)
+
+
+def shift(show_id, seconds):
+    """Decalează evenimentele rămase (pozitiv = emisiunea a întârziat)"""
+    seconds = finite_seconds(seconds, "Decalaj")
+    if abs(seconds) > MAX_TIMECODE:
+        raise ValueError(f"Decalaj prea mare: {seconds}")
+
+    def change(timeline, now):
+        timeline["shift"] += seconds
+    _update_timeline(show_id, change)
+    return status(show_id)
+
+
+def remove(show_id):
+    def apply(state):
+        if state.get("timelines", {}).pop(show_id, None) is None:
+            return None
+        return state
+    shared_state.update_state(apply)
+    _wakeup.set()
+
+
+def fire_time(timeline, event):
+    return timeline["started_at"] + timeline["shift"] + event["at"]
+
+
+def status(show_id):
+    """Timeline-ul cu ora la care pleacă fiecare eveniment; None dacă show-ul nu are unul"""
+    timeline = shared_state.read_state().get("timelines", {}).get(show_id)
+    if timeline is None:
+        return None
+    running = timeline["started_at"] is not None
+    events = []
+    for i, event in enumerate(timeline["events"]):
+        done = timeline["done"].get(str(i))
+        events.append({
+            **event,
+            "index": i,
+            "fire_at": fire_time(timeline, event) if running else None,
+            "state": done["status"] if done else ("paused" if timeline["paused_at"] is not None else "pending"),
+        })
+    return {
+        "show_id": show_id,
+        "started_at": timeline["started_at"],
+        "paused": timeline["paused_at"] is not None,
+        "shift_seconds": timeline["shift"],
+        "events": events,
+        "scheduler": scheduler_status(),
+    }
+
+
+def prewarm(show_id, event):
+    """Pregătește în acest worker tot ce vor cere clienții în momentul lansării"""
+    from routes import quiz_routes, scene_routes
+    from services import question_listener
+
+    questions = quiz_routes.get_show_questions(show_id)
+    question_id = event.get("question_id")
+    if question_id:
+        question_listener.ensure_listener(show_id)
+        # /current cu noua întrebare activă e deja serializat (și comprimat)
+        quiz_routes.current_quiz_snapshot(show_id, questions, question_id)
+    if event.get("scene"):
+        # Scena exclusivă nu are încă selecție per show: o încărcăm și o serializăm din timp
+        scene_data = scene_routes.get_scene_data_with_timeout()
+        get_snapshot(("scene_exclusive",), scene_data, lambda: scene_data)
+
+
+def launch(show_id, event):
+    """Lansează întrebarea: întâi local (SSE, starea partajată), apoi în Firestore"""
+    import admin_simplified
+
+    question_id = event.get("question_id")
+    if not question_id:
+        return
+    admin_simplified.save_active_question_local(show_id, question_id)
+    success, error = admin_simplified.set_active_question_safe(show_id, question_id)
+    if not success:
+        print(f"⚠️ Lansarea automată {show_id}/{question_id}: {error}")
+
+
+def _claim(show_id, index, started_at, outcome):
+    """Marchează evenimentul ca lansat/ratat; False dacă l-a luat deja altcineva"""
+    claimed = [False]
+
+    def apply(state):
+        timeline = state.get("timelines", {}).get(show_id)
+        # Timeline-ul a fost reîncărcat sau repornit între timp
+        if timeline is None or timeline["started_at"] != started_at or str(index) in timeline["done"]:
+            return None
+        timeline["done"][str(index)] = {"status": outcome, "at": time.time()}
+        claimed[0] = True
+        return state
+    shared_state.update_state(apply)
+    return claimed[0]
+
+
+def _run_in_pool(fn, *args):
+    try:
+        get_pool("firestore").submit(fn, *args)
+    except PoolSaturatedError:
+        fn(*args)
+
+
+class Scheduler:
+    """Heap cu evenimentele viitoare ale tuturor show-urilor, reconstruit când timeline-urile se schimbă"""
+
+    def __init__(self):
+        self.heap = []
+        self.state_version = None
+        self.prewarmed = set()
+        self.leader = False
+        self._lock_fd = None
+        self.fired = 0
+
+    def try_lead(self):
+        if self.leader:
+            return True
+        if fcntl is None:
+            self.leader = True
+            return True
+        if self._lock_fd is None:
+            self._lock_fd = os.open(LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        # Lacătul e eliberat de sistem dacă procesul moare; alt worker preia
+        self.leader = True
+        print(f"🎬 Worker-ul {os.getpid()} lansează evenimentele din timeline")
+        return True
+
+    def rebuild(self, state):
+        now = time.time()
+        heap = []
+        for show_id, timeline in state.get("timelines", {}).items():
+            if timeline["started_at"] is None or timeline["paused_at"] is not None:
+                continue
+            for i, event in enumerate(timeline["events"]):
+                if str(i) in timeline["done"]:
+                    continue
+                at = fire_time(timeline, event)
+                key = (show_id, i, at)
+                if key not in self.prewarmed and at > now:
+                    heap.append((at - PREWARM_SECONDS, 0, "prewarm", show_id, i, timeline["started_at"], at))
+                heap.append((at, 1, "fire", show_id, i, timeline["started_at"], at))
+        heapq.heapify(heap)
+        self.heap = heap
+
+    def run_due(self, state):
+        now = time.time()
+        while self.heap and self.heap[0][0] <= now:
+            _, _, kind, show_id, index, started_at, at = heapq.heappop(self.heap)
+            timeline = state.get("timelines", {}).get(show_id)
+            if timeline is None:
+                continue
+            event = timeline["events"][index]
+            if kind == "prewarm":
+                self.prewarmed.add((show_id, index, at))
+                _run_in_pool(prewarm, show_id, event)
+            elif self.leader:
+                late = now - at
+                if late > MAX_LATENESS:
+                    if _claim(show_id, index, started_at, MISSED):
+                        log_event("timeline_missed", logging.WARNING, show_id=show_id, index=index,
+                                  late_ms=round(late * 1000))
+                elif _claim(show_id, index, started_at, FIRED):
+                    self.fired += 1
+                    log_event("timeline_fired", show_id=show_id, index=index,
+                              question_id=event.get("question_id"), scene=event.get("scene"),
+                              late_ms=round(late * 1000, 1))
+                    _run_in_pool(launch, show_id, event)
+
+    def run(self):
+        while True:
+            try:
+                self.try_lead()
+                store = shared_state.get_store()
+                version, state = store.read()
+                if version != self.state_version:
+                    self.state_version = version
+                    self.rebuild(state)
+                self.run_due(state)
+            except Exception as e:
+                print(f"❌ Eroare în planificatorul de timeline: {e}")
+            # Dormim până la următorul eveniment, dar observăm des schimbările altor workeri
+            timeout = POLL_INTERVAL
+            if self.heap:
+                timeout = min(timeout, max(self.heap[0][0] - time.time(), 0))
+            _wakeup.wait(timeout)
+            _wakeup.clear()
+
+
+def ensure_scheduler():
+    # Un thread per worker, pornit la prima utilizare și din nou după fork
+    global _scheduler, _scheduler_pid
+    if not SCHEDULER_ENABLED:
+        return
+    pid = os.getpid()
+    if _scheduler is not None and _scheduler_pid == pid:
+        return
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler_pid != pid:
+            _scheduler = Scheduler()
+            threading.Thread(target=_scheduler.run, name="timeline-scheduler", daemon=True).start()
+            _scheduler_pid = pid
+
+
+def scheduler_status():
+    if _scheduler is None or _scheduler_pid != os.getpid():
+        return {"running": False}
+    return {
+        "running": True,
+        "leader": _scheduler.leader,
+        "pending": sum(1 for item in _scheduler.heap if item[2] == "fire"),
+        "fired": _scheduler.fired,
+    }
@@ -0,0 +1,253 @@
+import os
+import socket
+import threading
+import time
+from firebase_utils import init_firebase
+
+# Numărătoare live a voturilor per opțiune, cu citire în timp constant.
+# Fiecare worker numără în memorie răspunsurile pe care le-a scris primul
+# în Firestore (callback-ul din answer_ingest, ca la leaderboard) și își publică
+# totalurile într-un shard propriu din Firestore
+# (shows/<id>/tallies/<question_id>/shards/<worker>). Un thread de fundal
+# citește periodic shard-urile celorlalți workeri, așa că totalul afișat
+# este mereu "local + restul", ținut gata calculat în memorie.
+#
+# Fiecare numărătoare are shard-ul ei (worker + momentul creării), rescris
+# măcar o dată pe minut. Shard-urile care nu mai bat (worker oprit, întrebare
+# abandonată) sunt adunate de un worker viu în shard-ul RETIRED_SHARD și șterse,
+# cu precondiții pe update_time, ca voturile să nu fie numărate de două ori.
+
+SYNC_INTERVAL = 1.0        # secunde între sincronizările cu Firestore
+ACTIVE_WINDOW = 600        # numărătorile neatinse de atât timp sunt scoase din memorie
+SHARD_HEARTBEAT = 60       # un shard viu e rescris cel puțin atât de des
+DEAD_SHARD_AFTER = 300     # un shard nerescris de atâta timp aparține unui worker oprit
+MAX_TALLIES = int(os.getenv("SYNCPLAY_MAX_TALLIES", "200"))   # numărători ținute per proces
+RETIRED_SHARD = "_retired"
+
+_tallies = {}
+_tallies_lock = threading.Lock()
+_sync_thread = None
+_sync_pid = None
+_process_token = None
+
+
+def shard_id():
+    """Identificatorul worker-ului curent: host, pid și momentul pornirii procesului.
+
+    Un worker repornit cu același pid primește alt id, deci nu ia drept ale
+    lui documentele lăsate de cel oprit. Token-ul se regenerează după fork.
+    """
+    global _process_token
+    pid = os.getpid()
+    if _process_token is None or _process_token[0] != pid:
+        _process_token = (pid, int(time.time() * 1000))
+    return f"{socket.gethostname()}-{pid}-{_process_token[1]}"
+
+
+class TallyLimitReached(Exception):
+    """Nu mai ținem alte numărători în acest proces"""
+
+
+class QuestionTally:
+    """Voturile pentru o întrebare: shard-ul local plus suma celorlalte shard-uri"""
+
+    def __init__(self, show_id, question_id):
+        self.show_id = show_id
+        self.question_id = question_id
+        self.local = {}
+        self.remote = {}
+        self.totals = {}
+        self.total = 0
+        self.dirty = False
+        self.touched_at = time.time()
+        self.synced_at = 0
+        self.written_at = 0
+        # Un shard nou la fiecare numărătoare: una scoasă din memorie nu e suprascrisă
+        self.shard_id = f"{shard_id()}-{int(self.touched_at * 1000)}"
+        self.lock = threading.Lock()
+
+    def _add(self, option, delta):
+        self.local[option] = self.local.get(option, 0) + delta
+        self.totals[option] = self.totals.get(option, 0) + delta
+        self.total += delta
+
+    def record(self, option):
+        """Numără un vot; primul răspuns scris e cel care contează, deci nu se mută"""
+        with self.lock:
+            self._add(option, 1)
+            self.dirty = True
+            self.touched_at = time.time()
+
+    def merge_remote(self, remote):
+        """Înlocuiește suma celorlalte shard-uri și recalculează totalurile"""
+        with self.lock:
+            self.remote = remote
+            totals = dict(remote)
+            for option, count in self.local.items():
+                totals[option] = totals.get(option, 0) + count
+            self.totals = totals
+            self.total = sum(totals.values())
+            self.synced_at = time.time()
+
+    def read(self):
+        with self.lock:
+            return dict(self.totals), self.total
+
+    def shards_ref(self, db):
+        return (db.collection('shows').document(self.show_id)
+                .collection('tallies').document(self.question_id)
+                .collection('shards'))
+
+
+def get_tally(show_id, question_id):
+    key = (show_id, question_id)
+    tally = _tallies.get(key)
+    if tally is None:
+        with _tallies_lock:
+            tally = _tallies.get(key)
+            if tally is None:
+                if len(_tallies) >= MAX_TALLIES and not _evict_one():
+                    raise TallyLimitReached(f"Limita de {MAX_TALLIES} numărători atinsă")
+                tally = _tallies[key] = QuestionTally(show_id, question_id)
+        _ensure_sync_thread()
+    return tally
+
+
+def _evict_one():
+    """Scoate cea mai veche numărătoare fără voturi nepublicate (apelat sub _tallies_lock).
+
+    Întâi cele doar citite; voturile uneia scoase rămân în shard-ul ei,
+    dar o întrebare cu voturi e probabil încă activă.
+    """
+    candidates = [t for t in _tallies.values() if not t.dirty]
+    if not candidates:
+        return False
+    oldest = min(candidates, key=lambda t: (bool(t.local), t.touched_at))
+    del _tallies[(oldest.show_id, oldest.question_id)]
+    return True
+
+
+def record_vote(show_id, question_id, option):
+    try:
+        tally = get_tally(show_id, question_id)
+    except TallyLimitReached as e:
+        # Răspunsul e deja scris în Firestore; doar numărătoarea live îl ratează
+        print(f"⚠️ Vot nenumărat pentru {show_id}/{question_id}: {e}")
+        return
+    tally.record(option)
+
+
+def record_written_vote(show_id, doc_id, data):
+    # Apelat de answer_ingest doar pentru răspunsurile scrise prima dată în Firestore
+    record_vote(show_id, data["question_id"], data["answer"])
+
+
+def read_tally(show_id, question_id, track=True):
+    """(voturi per opțiune, total) — citire din memorie, fără agregare.
+
+    Cu track=False o întrebare pe care nu o numărăm deja întoarce ({}, 0)
+    în loc să pornească sincronizarea ei cu Firestore.
+    """
+    tally = _tallies.get((show_id, question_id))
+    if tally is None:
+        if not track:
+            return {}, 0
+        try:
+            tally = get_tally(show_id, question_id)
+        except TallyLimitReached:
+            return {}, 0
+    tally.touched_at = time.time()
+    return tally.read()
+
+
+def retire_shards(db, shards, retired, dead):
+    """Adună shard-urile moarte în RETIRED_SHARD și le șterge, totul într-o singură scriere atomică"""
+    counts = dict(((retired.to_dict() or {}).get("counts") or {})) if retired is not None else {}
+    for doc in dead:
+        for option, count in ((doc.to_dict() or {}).get("counts") or {}).items():
+            counts[option] = counts.get(option, 0) + count
+
+    batch = db.batch()
+    data = {"counts": counts, "updated_at": time.time()}
+    if retired is None:
+        batch.create(shards.document(RETIRED_SHARD), data)
+    else:
+        # Dacă alt worker a compactat între timp, precondiția eșuează și nu se scrie nimic
+        batch.update(retired.reference, data, option=db.write_option(last_update_time=retired.update_time))
+    for doc in dead:
+        batch.delete(doc.reference, option=db.write_option(last_update_time=doc.update_time))
+    batch.commit()
+
+
+def sync_tally(tally, db):
+    """Publică shard-ul local (dacă s-a schimbat) și citește shard-urile celorlalți"""
+    shards = tally.shards_ref(db)
+    now = time.time()
+
+    if tally.dirty or now - tally.written_at > SHARD_HEARTBEAT:
+        with tally.lock:
+            counts = dict(tally.local)
+            tally.dirty = False
+        try:
+            shards.document(tally.shard_id).set({"counts": counts, "updated_at": now})
+            tally.written_at = now
+        except Exception:
+            tally.dirty = True
+            raise
+
+    remote = {}
+    retired = None
+    dead = []
+    for doc in shards.stream():
+        if doc.id == tally.shard_id:
+            continue
+        data = doc.to_dict() or {}
+        if doc.id == RETIRED_SHARD:
+            retired = doc
+        elif now - data.get("updated_at", 0) > DEAD_SHARD_AFTER:
+            dead.append(doc)
+        for option, count in (data.get("counts") or {}).items():
+            remote[option] = remote.get(option, 0) + count
+    tally.merge_remote(remote)
+
+    if dead:
+        try:
+            retire_shards(db, shards, retired, dead)
+        except Exception as e:
+            # De obicei alt worker a compactat primul; reîncercăm la sincronizarea următoare
+            print(f"⚠️ Shard-urile vechi pentru {tally.show_id}/{tally.question_id} nu au fost compactate: {e}")
+
+
+def _sync_loop(db_factory):
+    while True:
+        time.sleep(SYNC_INTERVAL)
+        now = time.time()
+        with _tallies_lock:
+            # Numărătorile abandonate ies din memorie; shard-ul lor e compactat de alții
+            for key, tally in list(_tallies.items()):
+                if now - tally.touched_at >= ACTIVE_WINDOW and not tally.dirty:
+                    del _tallies[key]
+            tallies = list(_tallies.values())
+        if not tallies:
+            continue
+        db = db_factory()
+        if not db:
+            continue
+        for tally in tallies:
+            try:
+                sync_tally(tally, db)
+            except Exception as e:
+                print(f"⚠️ Eroare la sincronizarea voturilor pentru {tally.show_id}/{tally.question_id}: {e}")
+
+
+def _ensure_sync_thread(db_factory=init_firebase):
+    global _sync_thread, _sync_pid
+    pid = os.getpid()
+    if _sync_thread is not None and _sync_pid == pid and _sync_thread.is_alive():
+        return
+    with _tallies_lock:
+        if _sync_thread is None or _sync_pid != pid or not _sync_thread.is_alive():
+            _sync_pid = pid
+            _sync_thread = threading.Thread(target=_sync_loop, args=(db_factory,), name="vote-tally-sync")
+            _sync_thread.daemon = True
+            _sync_thread.start()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Testele rulează fără fișierul mmap partajat și fără planificatorul de timeline
+os.environ.setdefault("SYNCPLAY_STATE_BACKEND", "memory")
+os.environ.setdefault("SYNCPLAY_SCHEDULER", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+import firebase_utils
+from services.executor import run_with_timeout
+
+
+@pytest.fixture(autouse=True)
+def clean_breakers():
+    firebase_utils._breakers.clear()
+    yield
+    firebase_utils._breakers.clear()
+
+
+def test_timed_out_call_counts_as_failure_once():
+    release = threading.Event()
+    finished = threading.Event()
+
+    def hung_read():
+        with firebase_utils.firestore_call("hung_read"):
+            release.wait(2)
+        finished.set()
+
+    with pytest.raises(TimeoutError):
+        run_with_timeout("firestore", hung_read, timeout=0.05)
+    # Circuitul află de eșec cât timp apelul e încă blocat
+    breaker = firebase_utils.get_breaker("hung_read")
+    assert list(breaker.outcomes) == [True]
+
+    release.set()
+    assert finished.wait(2)
+    assert list(breaker.outcomes) == [True]
+
+
+def test_completed_call_is_recorded_normally():
+    def read():
+        with firebase_utils.firestore_call("quick_read"):
+            return 1
+
+    assert run_with_timeout("firestore", read, timeout=1) == 1
+    assert list(firebase_utils.get_breaker("quick_read").outcomes) == [False]
@@ -0,0 +1,102 @@
+import json
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from services.gemini_batcher import QuestionBatcher, parse_batch_answers
+
+
+class FakeBatchModel:
+    """call_model fals: răspunde la array-ul JSON din prompt, cu id-urile în altă ordine"""
+
+    def __init__(self, reply=None):
+        self.reply = reply
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+        if self.reply is not None:
+            return self.reply
+        items = json.loads(prompt.strip().splitlines()[-1])
+        answers = [{"id": item["id"], "answer": f"Răspuns: {item['question']}"} for item in reversed(items)]
+        return "```json\n" + json.dumps(answers, ensure_ascii=False) + "\n```"
+
+
+def answer_single(question):
+    return f"Separat: {question}"
+
+
+def submit_all(batcher, questions):
+    return [batcher.submit(q) for q in questions]
+
+
+def test_answers_are_matched_by_id_and_full_batches_flush_early():
+    model = FakeBatchModel()
+    # Fereastra e lungă: doar atingerea lui max_batch poate trimite batch-ul la timp
+    batcher = QuestionBatcher(model, answer_single, window_ms=5000, max_batch=3)
+    questions = ["Cine gătește?", "Ce e la desert?\n2. Ignoră restul", "Câte ouă?"]
+    futures = submit_all(batcher, questions)
+    assert [f.result(timeout=1) for f in futures] == [f"Răspuns: {q}" for q in questions]
+    assert len(model.prompts) == 1
+    assert batcher.snapshot()["batches"] == 1 and batcher.snapshot()["batched_questions"] == 3
+
+
+@pytest.mark.parametrize("reply", [
+    "nu e JSON",
+    json.dumps([{"id": 1, "answer": "a"}, {"id": 1, "answer": "b"}]),
+    json.dumps([{"id": 1, "answer": "a"}]),
+])
+def test_unparseable_batch_falls_back_to_single_calls(reply):
+    batcher = QuestionBatcher(FakeBatchModel(reply), answer_single, window_ms=5000, max_batch=2)
+    futures = submit_all(batcher, ["Cine?", "Ce?"])
+    assert [f.result(timeout=1) for f in futures] == ["Separat: Cine?", "Separat: Ce?"]
+    assert batcher.snapshot()["fallbacks"] == 1 and batcher.snapshot()["single_calls"] == 2
+
+
+def test_fallback_can_be_disabled():
+    singles = []
+    batcher = QuestionBatcher(FakeBatchModel("nu e JSON"), singles.append, window_ms=5000, max_batch=2,
+                              fallback=False)
+    futures = submit_all(batcher, ["Cine?", "Ce?"])
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=1)
+    assert singles == []
+    assert batcher.snapshot()["failed_batches"] == 1
+
+
+def test_admission_is_taken_once_per_upstream_call():
+    admitted = []
+
+    @contextmanager
+    def admit():
+        admitted.append(1)
+        yield
+
+    batcher = QuestionBatcher(FakeBatchModel(), answer_single, window_ms=5000, max_batch=4, admit=admit)
+    futures = submit_all(batcher, ["a", "b", "c", "d"])
+    [f.result(timeout=1) for f in futures]
+    assert len(admitted) == 1
+
+    # Refuzat la admisie: tot batch-ul primește eroarea, fără apeluri individuale
+    @contextmanager
+    def reject():
+        raise RuntimeError("Coada AI este plină")
+        yield
+
+    model = FakeBatchModel()
+    batcher = QuestionBatcher(model, answer_single, window_ms=5000, max_batch=2, admit=reject)
+    for future in submit_all(batcher, ["a", "b"]):
+        with pytest.raises(RuntimeError):
+            future.result(timeout=1)
+    assert model.prompts == [] and batcher.snapshot()["single_calls"] == 0
+
+
+def test_parse_batch_answers_requires_every_id_once():
+    assert parse_batch_answers('[{"id": 2, "answer": "b"}, {"id": 1, "answer": "a"}]', 2) == ["a", "b"]
+    assert parse_batch_answers('[{"id": 1, "answer": "a"}, {"id": 3, "answer": "c"}]', 2) is None
+    assert parse_batch_answers('[{"id": 1, "answer": " "}, {"id": 2, "answer": "b"}]', 2) is None
+    assert parse_batch_answers('{"id": 1, "answer": "a"}', 1) is None
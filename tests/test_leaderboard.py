@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from bench.fakes import FakeFirestore
+from services import answer_ingest, leaderboard
+from services.answer_ingest import AnswerBuffer
+
+
+@pytest.fixture(autouse=True)
+def clean_boards(monkeypatch):
+    monkeypatch.setattr(leaderboard, "_ensure_sync_thread", lambda: None)
+    leaderboard._boards.clear()
+    yield
+    leaderboard._boards.clear()
+
+
+def submit(buffer, user_id, answer, correct):
+    buffer.submit("master_chef", answer_ingest.answer_doc_id("q1", user_id), {
+        "user_id": user_id, "question_id": "q1", "answer": answer, "correct": correct,
+    })
+
+
+def test_resubmitted_answer_scores_once_across_workers(monkeypatch):
+    fs = FakeFirestore()
+    scored = []
+    monkeypatch.setattr(answer_ingest, "_written_callbacks", [])
+    answer_ingest.add_written_callback(lambda show_id, doc_id, data: scored.append(doc_id))
+    answer_ingest.add_written_callback(leaderboard.score_written_answer)
+
+    # Doi "workeri" (sau un worker repornit) cu buffer-e separate, același Firestore
+    first, second = AnswerBuffer(lambda: fs), AnswerBuffer(lambda: fs)
+    submit(first, "ana", "Paris", True)
+    submit(first, "ana", "Paris", True)
+    assert first.flush(1) == 0
+    submit(second, "ana", "Paris", True)
+    submit(second, "dan", "Roma", False)
+    assert second.flush(1) == 0
+
+    assert scored == ["q1_ana", "q1_dan"]
+    assert first.stats["duplicates"] == 1 and second.stats["duplicates"] == 1
+    board = leaderboard.get_show_leaderboard("master_chef").board
+    assert board.rank("ana") == (1, leaderboard.POINTS_PER_CORRECT)
+    assert board.rank("dan") == (2, 0)
+
+
+def test_concurrent_awards_keep_latest_total():
+    show = leaderboard.get_show_leaderboard("master_chef")
+    threads = [threading.Thread(target=lambda: [show.award("ana", 1) for _ in range(500)]) for _ in range(4)]
+    merges = threading.Thread(target=lambda: [show.merge_remote({"ana": i % 3}) for i in range(500)])
+    for t in threads + [merges]:
+        t.start()
+    for t in threads + [merges]:
+        t.join()
+    assert show.board.rank("ana")[1] == show.local["ana"] + show.remote["ana"]
+
+
+def test_restarted_worker_with_same_pid_keeps_old_scores(monkeypatch):
+    from services import vote_tally
+    fs = FakeFirestore()
+    show = leaderboard.get_show_leaderboard("master_chef")
+    show.award("ana", 10)
+    leaderboard.checkpoint(show, fs)
+
+    # Același host și pid după repornire: doar token-ul de pornire diferă
+    monkeypatch.setattr(vote_tally, "_process_token", (vote_tally._process_token[0], 0))
+    leaderboard._boards.clear()
+    restarted = leaderboard.get_show_leaderboard("master_chef")
+    restarted.award("dan", 5)
+    leaderboard.checkpoint(restarted, fs)
+
+    assert restarted.board.rank("ana") == (1, 10)
+    assert restarted.board.rank("dan") == (2, 5)
+    docs = fs.collection("shows").document("master_chef").collection("leaderboard").stream()
+    assert len({d.to_dict()["shard"] for d in docs}) == 2
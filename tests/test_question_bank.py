@@ -0,0 +1,64 @@
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+import question_bank
+from bench.fakes import FakeFirestore
+
+QUIZ = [
+    {"id": "q1", "question": "Care este capitala Franței?", "options": ["Paris", "Berlin"], "correct": "Paris"},
+    {"id": "q2", "question": "Ce simbol are fluorul?", "options": ["Fl", "F"], "correct": "F"},
+]
+
+
+def records(text, fmt):
+    return list(question_bank.read_records(io.StringIO(text), fmt))
+
+
+def test_read_records_in_every_format():
+    assert records(json.dumps(QUIZ), "json") == [(1, QUIZ[0]), (2, QUIZ[1])]
+    assert records(json.dumps({"master_chef": QUIZ[:1]}), "json") == [
+        ("master_chef[1]", {"show_id": "master_chef", **QUIZ[0]})]
+    assert records(json.dumps(QUIZ[0]) + "\n\n" + json.dumps(QUIZ[1]) + "\n", "ndjson") == [(1, QUIZ[0]), (3, QUIZ[1])]
+
+    csv_text = "show_id,id,question,options,correct\nmaster_chef,m1,Cât sare?,Puțină | Multă |,Puțină\n"
+    [(row_no, row)] = records(csv_text, "csv")
+    assert row_no == 2
+    assert question_bank.normalize(row) == ("master_chef", "m1", {
+        "text": "Cât sare?", "options": ["Puțină", "Multă"], "correct": "Puțină"})
+
+
+def test_normalize_quiz_json_record():
+    record = {**QUIZ[0], "difficulty": "ușor", "hint": ""}
+    assert question_bank.normalize(record, default_show="detectivul_din_canapea") == (
+        "detectivul_din_canapea", "q1",
+        {"difficulty": "ușor", "text": QUIZ[0]["question"], "options": ["Paris", "Berlin"], "correct": "Paris"})
+    for bad in ({"id": "q1", "question": "?"}, {"show_id": "s", "question": "?"}, {"show_id": "s", "id": "q1"}):
+        with pytest.raises(ValueError):
+            question_bank.normalize(bad)
+
+
+def test_import_export_round_trip():
+    db = FakeFirestore()
+    created = datetime(2024, 5, 1, 20, 30, tzinfo=timezone.utc)
+    quiz = [{**q, "created_at": created} for q in QUIZ]
+
+    stats = question_bank.import_questions(db, enumerate(quiz, 1), default_show="master_chef")
+    assert (stats.written, stats.unchanged, stats.shows_created) == (3, 0, 1)
+
+    # Același fișier a doua oară: nimic de scris
+    stats = question_bank.import_questions(db, enumerate(quiz, 1), default_show="master_chef")
+    assert (stats.written, stats.unchanged) == (0, 2)
+
+    out = io.StringIO()
+    assert question_bank.export_questions(db, out) == 2
+    exported = records(out.getvalue(), "ndjson")
+    assert exported[0][1]["created_at"] == created
+
+    # Exportul re-importat e identic cu ce e deja în Firestore
+    stats = question_bank.import_questions(db, exported)
+    assert (stats.read, stats.written, stats.unchanged) == (2, 0, 2)
+    doc = db.collection("shows").document("master_chef").collection("questions").document("q1").get().to_dict()
+    assert isinstance(doc["created_at"], datetime)
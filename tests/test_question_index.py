@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+
+from services import question_index
+from services.show_ids import UnknownShow
+
+FALLBACK = ({"id": "q1", "question": "?", "options": [], "correct": None},)
+
+
+@pytest.fixture
+def shows_dir(tmp_path, monkeypatch):
+    shows = tmp_path / "shows"
+    shows.mkdir()
+    monkeypatch.setattr(question_index, "SHOWS_DIR", os.path.realpath(shows))
+    monkeypatch.setattr(question_index, "load_questions_for_show", lambda show_id: [])
+    monkeypatch.setattr(question_index, "load_show_ids", lambda: ["master_chef", "linked"])
+    question_index.known_shows.invalidate()
+    question_index.invalidate()
+    yield shows
+    question_index.invalidate()
+
+
+def test_show_file_is_read_from_shows_dir(shows_dir):
+    (shows_dir / "master_chef.json").write_text(json.dumps([{"id": "m1", "question": "?"}]))
+    question_set = question_index.get_question_set("master_chef", lambda: FALLBACK)
+    assert question_set.source == "file"
+    assert question_set.ids() == ["m1"]
+
+
+def test_ids_outside_shows_dir_are_rejected(shows_dir):
+    (shows_dir.parent / "secret.json").write_text(json.dumps([{"id": "s1", "question": "?"}]))
+    for show_id in ("../secret", "/etc/passwd", "a/../../secret", ""):
+        with pytest.raises(UnknownShow):
+            question_index.get_question_set(show_id, lambda: FALLBACK)
+
+    # Un symlink din data/shows spre afară nu e urmat
+    os.symlink(shows_dir.parent / "secret.json", shows_dir / "linked.json")
+    assert question_index.show_file("linked") is None
+    assert question_index.get_question_set("linked", lambda: FALLBACK).source == "global"
+
+
+def test_failed_refresh_keeps_last_firestore_set(shows_dir, monkeypatch):
+    docs = [{"id": "f1", "question": "Din Firestore", "options": [], "correct": None}]
+    monkeypatch.setattr(question_index, "load_questions_for_show", lambda show_id: docs)
+    assert question_index.get_question_set("master_chef", lambda: FALLBACK).source == "firestore"
+
+    def brownout(show_id):
+        raise RuntimeError("Firestore indisponibil")
+    monkeypatch.setattr(question_index, "load_questions_for_show", brownout)
+    entry = question_index._entries["master_chef"]
+    question_index._refresh_remote(entry)
+    entry.resolved_at = 0
+    question_set = question_index.get_question_set("master_chef", lambda: FALLBACK)
+    assert question_set.source == "firestore"
+    assert question_set.ids() == ["f1"]
+    assert entry.remote_failed
+
+    # Doar o citire reușită fără documente golește setul
+    monkeypatch.setattr(question_index, "load_questions_for_show", lambda show_id: [])
+    question_index._refresh_remote(entry)
+    entry.resolved_at = 0
+    assert question_index.get_question_set("master_chef", lambda: FALLBACK).source == "global"
+
+
+def test_concurrent_first_requests_share_one_load(shows_dir, monkeypatch):
+    import threading
+    import time
+
+    loads = []
+
+    def slow_load(show_id):
+        loads.append(show_id)
+        time.sleep(0.05)
+        return [{"id": "f1", "question": "?", "options": [], "correct": None}]
+    monkeypatch.setattr(question_index, "load_questions_for_show", slow_load)
+
+    results, errors = [], []
+
+    def request():
+        try:
+            results.append(question_index.get_question_set("master_chef", lambda: FALLBACK).source)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=request) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert results == ["firestore"] * 20
+    assert loads == ["master_chef"]
+
+
+def test_unknown_shows_get_no_index_entry(shows_dir, monkeypatch):
+    loads = []
+    monkeypatch.setattr(question_index, "load_questions_for_show", lambda show_id: loads.append(show_id) or [])
+    for i in range(50):
+        assert question_index.get_question_set(f"junk{i}", lambda: FALLBACK).source == "global"
+    assert loads == []
+    assert question_index._entries == {}
+
+
+def test_index_entries_are_capped(shows_dir, monkeypatch):
+    monkeypatch.setattr(question_index, "MAX_ENTRIES", 3)
+    for show_id in ("s1", "s2", "s3", "s4"):
+        (shows_dir / f"{show_id}.json").write_text(json.dumps([{"id": "m1", "question": "?"}]))
+        question_index.get_question_set(show_id, lambda: FALLBACK)
+    assert sorted(question_index._entries) == ["s2", "s3", "s4"]
@@ -0,0 +1,128 @@
+import time
+
+import pytest
+
+import firebase_utils
+from bench.fakes import FakeFirestore
+from routes import quiz_routes
+from services import question_listener, shared_state
+from services.question_listener import ShowListener
+
+
+@pytest.fixture(autouse=True)
+def clean_listeners():
+    firebase_utils._breakers.clear()
+    question_listener.stop_all()
+    yield
+    question_listener.stop_all()
+    firebase_utils._breakers.clear()
+
+
+def firestore_with_active(show_id, question_id):
+    fs = FakeFirestore()
+    status = fs.collection("shows").document(show_id).collection("metadata").document("status")
+    status.set({"current_question_id": question_id})
+    return fs
+
+
+def test_listener_down_falls_back_to_local():
+    listener = question_listener.ensure_listener("show_down", db_factory=lambda: None)
+    assert not listener.connected
+    assert listener.stale
+
+    shared_state.set_active("show_down", "q3")
+    assert question_listener.get_active_question("show_down", wait=0) is None
+    assert quiz_routes.get_active_question_live("show_down") == "q3"
+
+
+def test_stale_stream_falls_back_to_local():
+    fs = firestore_with_active("show_live", "q2")
+    listener = question_listener.ensure_listener("show_live", db_factory=lambda: fs)
+    assert listener.first_snapshot.wait(2)
+    assert question_listener.get_active_question("show_live") == "q2"
+
+    # Stream-ul moare fără să ne anunțe: valoarea din memorie nu mai e de încredere
+    shared_state.set_active("show_live", "q1")
+    listener._watch.is_active = False
+    assert question_listener.get_active_question("show_live", wait=0) is None
+    assert quiz_routes.get_active_question_live("show_live") == "q1"
+
+    listener.check(time.time())
+    assert not listener.connected
+    assert listener.last_error == "stream-ul Firestore s-a închis"
+
+
+def test_reconnect_backoff_doubles_up_to_cap_and_resets():
+    attempts = []
+
+    def failing():
+        attempts.append(time.time())
+        raise RuntimeError("Firestore indisponibil")
+
+    listener = ShowListener("show_backoff", failing)
+    listener.start()
+    assert len(attempts) == 1
+
+    # Înainte de termen nu reîncercăm
+    listener.check(listener.next_retry - 0.5)
+    assert len(attempts) == 1
+
+    scheduled = []
+    for _ in range(8):
+        firebase_utils._breakers.clear()   # testăm backoff-ul, nu circuitul
+        scheduled.append(round(listener.next_retry - time.time()))
+        listener.check(listener.next_retry)
+    assert scheduled == [1, 2, 4, 8, 16, 32, 60, 60]
+    assert len(attempts) == 9
+    assert listener.reconnects == 8
+
+    # Primul snapshot după reconectare readuce întârzierea la minim
+    fs = firestore_with_active("show_backoff", "q2")
+    listener.db_factory = lambda: fs
+    firebase_utils._breakers.clear()
+    listener.check(listener.next_retry)
+    assert listener.first_snapshot.wait(2)
+    assert listener.retry_delay == question_listener.RECONNECT_MIN_DELAY
+    assert not listener.stale
+    listener.stop()
+
+
+def test_invalid_ids_and_cap(monkeypatch):
+    monkeypatch.setattr(question_listener, "MAX_LISTENERS", 2)
+    assert question_listener.ensure_listener("../../etc/passwd", db_factory=lambda: None) is None
+    assert question_listener.ensure_listener("show_a", db_factory=lambda: None) is not None
+    assert question_listener.ensure_listener("show_b", db_factory=lambda: None) is not None
+    assert question_listener.ensure_listener("show_c", db_factory=lambda: None) is None
+
+    shared_state.set_active("show_c", "q2")
+    assert quiz_routes.get_active_question_live("show_c") == "q2"
+
+
+def test_idle_listeners_are_closed():
+    fs = firestore_with_active("show_idle", "q1")
+    listener = question_listener.ensure_listener("show_idle", db_factory=lambda: fs)
+    assert listener.first_snapshot.wait(2)
+
+    question_listener.evict_idle(time.time())
+    assert "show_idle" in question_listener.listener_status()
+
+    question_listener.evict_idle(time.time() + question_listener.LISTENER_IDLE_TIMEOUT + 1)
+    assert "show_idle" not in question_listener.listener_status()
+    assert listener._watch is None
+
+
+def test_unknown_shows_get_a_single_read_not_a_listener(monkeypatch):
+    from services import question_index
+    monkeypatch.setattr(question_index, "is_known_show", lambda show_id, wait=0: show_id == "master_chef")
+    monkeypatch.setattr(question_listener, "MAX_LISTENERS", 1)
+
+    for i in range(5):
+        fs = firestore_with_active(f"junk{i}", "q4")
+        assert question_listener.get_active_question(f"junk{i}", wait=0, db_factory=lambda: fs) == "q4"
+    assert question_listener.get_active_question("junk_missing", wait=0, db_factory=FakeFirestore) is None
+    assert question_listener.listener_status() == {}
+
+    # Limita rămâne liberă pentru show-urile reale
+    fs = firestore_with_active("master_chef", "q2")
+    assert question_listener.get_active_question("master_chef", wait=2, db_factory=lambda: fs) == "q2"
+    assert list(question_listener.listener_status()) == ["master_chef"]
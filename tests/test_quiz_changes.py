@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from routes import quiz_routes
+from services import shared_state
+from services.question_index import QuestionSet
+
+STORED = {"m1": {"id": "m1", "question": "Din fișier"}, "m2": {"id": "m2", "question": "Tot din fișier"}}
+FALLBACK = QuestionSet("master_chef", [{"id": "q1", "question": "Din quiz.json"}], "global")
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    monkeypatch.setattr(shared_state, "_store", shared_state.MemoryBackend())
+    monkeypatch.setattr(shared_state, "_slots", {})
+
+
+def body(snapshot):
+    return json.loads(snapshot.body)
+
+
+def test_full_payload_matches_the_shared_version():
+    version = shared_state.record_questions("master_chef", STORED, "file")
+    # Worker-ul acesta a căzut pe quiz.json, dar răspunsul complet e cel al versiunii anunțate
+    payload = body(quiz_routes.question_changes_snapshot("master_chef", FALLBACK, 0, "m2"))
+    assert payload["version"] == version
+    assert [q["id"] for q in payload["questions"]] == ["m2", "m1"]
+
+
+def test_fallback_set_has_no_version():
+    payload = body(quiz_routes.question_changes_snapshot("fara_slot", FALLBACK, 0, "q1"))
+    assert payload["version"] == 0
+    assert [q["id"] for q in payload["questions"]] == ["q1"]
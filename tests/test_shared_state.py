@@ -0,0 +1,64 @@
+import pytest
+
+from services import shared_state
+
+QUESTIONS = {"q1": {"id": "q1", "question": "?"}}
+
+
+@pytest.fixture(params=["memory", "mmap"])
+def store(request, tmp_path, monkeypatch):
+    if request.param == "mmap":
+        if shared_state.fcntl is None:
+            pytest.skip("fără fcntl")
+        store = shared_state.MmapBackend(str(tmp_path / "state.bin"), 64 * 1024)
+        monkeypatch.setattr(shared_state, "STATE_FILE", str(tmp_path / "state.bin"))
+    else:
+        store = shared_state.MemoryBackend()
+    monkeypatch.setattr(shared_state, "_store", store)
+    monkeypatch.setattr(shared_state, "_slots", {})
+    monkeypatch.setattr(shared_state, "MAX_SHOWS", 3)
+    return store
+
+
+def test_unknown_and_fallback_shows_get_no_slot(store):
+    assert shared_state.record_questions("../etc", QUESTIONS, "file") == 0
+    assert shared_state.set_active("a b", "q1") == 0
+    # Un id oarecare din URL servit din quiz.json nu ocupă un slot
+    assert shared_state.record_questions("random123", QUESTIONS, "global") == 0
+    assert shared_state.read_state().get("slots", {}) == {}
+
+
+def test_least_recently_active_show_is_evicted(store):
+    assert shared_state.set_active("s1", "q1") == 1
+    assert shared_state.record_questions("s2", QUESTIONS, "file") == 1
+    assert shared_state.record_questions("s3", QUESTIONS, "firestore") == 1
+    assert shared_state.set_active("s1", "q2") == 2
+
+    # Al patrulea show ia slotul lui s2, cel mai vechi, și pornește peste versiunea lui
+    assert shared_state.record_questions("s4", QUESTIONS, "file") == 3
+    assert sorted(shared_state.read_state()["slots"]) == ["s1", "s3", "s4"]
+    assert shared_state.show_version("s2") == 0
+    assert shared_state.show_changes("s2", 1) == (0, None)
+    assert shared_state.get_active("s1") == "q2"
+    assert shared_state.show_changes("s1", 1) == (2, {"edited": [], "removed": [], "active": "q2"})
+
+    # Fiecare show are slotul lui: editarea unuia nu schimbă starea principală
+    main_version = shared_state.state_version()
+    assert shared_state.record_questions("s4", {**QUESTIONS, "q2": {"id": "q2"}}, "file") == 4
+    assert shared_state.state_version() == main_version
+
+
+def test_returning_show_continues_above_its_old_version(store):
+    for i in range(5):
+        shared_state.set_active("s1", f"q{i}")
+    old_version = shared_state.show_version("s1")
+    assert old_version == 5
+
+    # s1 e scos din memorie, apoi revine într-un alt slot
+    for show_id in ("s2", "s3", "s4", "s5"):
+        shared_state.set_active(show_id, "q1")
+    assert shared_state.show_version("s1") == 0
+    version = shared_state.set_active("s1", "q9")
+    assert version > old_version
+    # Un client rămas la versiunea veche primește totul, nu o diferență greșită
+    assert shared_state.show_changes("s1", old_version) == (version, None)
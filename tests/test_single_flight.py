@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from bench.fakes import FakeGenerativeModel, FaultInjector, InjectedFailure
+from services import gemini_batcher, gemini_service
+from services.admission import AdmissionController
+from services.single_flight import SingleFlight
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = FakeGenerativeModel(FaultInjector(latency=0.1))
+    monkeypatch.setattr(gemini_service, "model", model)
+    monkeypatch.setattr(gemini_service, "_model_pid", None)
+    monkeypatch.setattr(gemini_service, "_in_flight", SingleFlight())
+    monkeypatch.setattr(gemini_service, "ai_admission", AdmissionController(rate=1000, burst=1000))
+    monkeypatch.setattr(gemini_batcher, "BATCH_ENABLED", False)
+    return model
+
+
+def ask_concurrently(question, count):
+    results, errors = [], []
+
+    def ask(i):
+        try:
+            results.append(gemini_service.answer_question(question, "master_chef", timeout=2, client_id=f"c{i}"))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_identical_questions_share_one_model_call(fake_model):
+    results, errors = ask_concurrently("Cine câștigă diseară?", 20)
+    assert errors == []
+    assert results == [fake_model.answer] * 20
+    assert fake_model.faults.calls == {"generate": 1}
+    stats = gemini_service._in_flight.snapshot()
+    assert (stats["leaders"], stats["shared"], stats["in_flight"]) == (1, 19, 0)
+
+
+def test_model_error_reaches_every_waiter(fake_model):
+    fake_model.faults.configure(failure_rate=1.0)
+    results, errors = ask_concurrently("Cine câștigă diseară?", 10)
+    assert results == []
+    assert len(errors) == 10 and all(isinstance(e, InjectedFailure) for e in errors)
+    assert fake_model.faults.calls == {"generate": 1}
+
+    # Eroarea nu rămâne agățată de cheie: următoarea cerere face un apel nou
+    fake_model.faults.configure(failure_rate=0.0)
+    assert gemini_service.answer_question("Cine câștigă diseară?", "master_chef", timeout=2) == fake_model.answer
+    assert fake_model.faults.calls == {"generate": 2}
+
+
+def test_waiter_timeout_is_per_key():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=("lent", lambda: release.wait(2)))
+    leader.start()
+    while not flight.in_flight():
+        pass
+
+    with pytest.raises(TimeoutError):
+        flight.do("lent", lambda: "nefolosit", timeout=0.05)
+    # Altă cheie nu așteaptă după apelul blocat
+    assert flight.do("rapid", lambda: "gata", timeout=0.05) == "gata"
+
+    release.set()
+    leader.join(2)
+    assert flight.snapshot() == {"leaders": 2, "shared": 1, "timeouts": 1, "errors": 0, "in_flight": 0}
@@ -0,0 +1,38 @@
+import math
+
+import pytest
+
+from services import timeline
+
+
+@pytest.mark.parametrize("value, seconds", [
+    (90, 90.0),
+    ("90", 90.0),
+    ("12:30", 750.0),
+    ("01:02:03.5", 3723.5),
+    ("00:25:00:12", 1500.48),
+])
+def test_parse_timecode(value, seconds):
+    assert timeline.parse_timecode(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize("value", [
+    "nan", "inf", float("nan"), float("inf"), "1e9", 1e9, -5, "-00:05", True,
+    "00:61", "00:00:60", "00:00:10:25", "00:00:10.5:01", "1:2:3:4:5", "", "ab:cd", "1_0",
+])
+def test_parse_timecode_rejects(value):
+    with pytest.raises(ValueError):
+        timeline.parse_timecode(value)
+
+
+def test_start_and_shift_reject_non_finite_values(monkeypatch):
+    monkeypatch.setattr(timeline.shared_state, "_store", timeline.shared_state.MemoryBackend())
+    timeline.upload("master_chef", [{"timecode": "00:00:10", "question_id": "q1"}])
+    with pytest.raises(ValueError):
+        timeline.start("master_chef", start_at=float("nan"))
+    with pytest.raises(ValueError):
+        timeline.shift("master_chef", "inf")
+
+    status = timeline.start("master_chef", start_at=1000.0, offset="00:00:05")
+    assert status["started_at"] == 995.0
+    assert all(math.isfinite(e["fire_at"]) for e in status["events"])
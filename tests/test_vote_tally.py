@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from bench.fakes import FakeFirestore, FailedPrecondition
+from services import answer_ingest, vote_tally
+from services.answer_ingest import AnswerBuffer
+
+
+@pytest.fixture(autouse=True)
+def clean_tallies(monkeypatch):
+    monkeypatch.setattr(vote_tally, "_ensure_sync_thread", lambda: None)
+    vote_tally._tallies.clear()
+    yield
+    vote_tally._tallies.clear()
+
+
+def shards_of(fs, show_id, question_id):
+    return fs.collection("shows").document(show_id).collection("tallies").document(question_id).collection("shards")
+
+
+def test_dead_shards_are_retired_once():
+    fs = FakeFirestore()
+    shards = shards_of(fs, "master_chef", "q1")
+    old = time.time() - vote_tally.DEAD_SHARD_AFTER - 1
+    shards.document("host-1-1").set({"counts": {"A": 2}, "updated_at": old})
+    shards.document("host-2-1").set({"counts": {"B": 1}, "updated_at": old})
+    shards.document("host-3-1").set({"counts": {"A": 1}, "updated_at": time.time()})
+
+    tally = vote_tally.get_tally("master_chef", "q1")
+    tally.record("A")
+    vote_tally.sync_tally(tally, fs)
+    assert tally.read() == ({"A": 4, "B": 1}, 5)
+    assert sorted(d.id for d in shards.stream()) == sorted([vote_tally.RETIRED_SHARD, "host-3-1", tally.shard_id])
+
+    # Doi workeri compactează același shard: al doilea nu mai scrie nimic
+    shards.document("host-4-1").set({"counts": {"A": 7}, "updated_at": old})
+    docs = list(shards.stream())
+    retired = next(d for d in docs if d.id == vote_tally.RETIRED_SHARD)
+    dead = [d for d in docs if d.id == "host-4-1"]
+    vote_tally.retire_shards(fs, shards, retired, dead)
+    with pytest.raises(FailedPrecondition):
+        vote_tally.retire_shards(fs, shards, retired, dead)
+
+    vote_tally.sync_tally(tally, fs)
+    assert tally.read() == ({"A": 11, "B": 1}, 12)
+
+
+def test_reads_do_not_track_unknown_questions(monkeypatch):
+    monkeypatch.setattr(vote_tally, "MAX_TALLIES", 3)
+    assert vote_tally.read_tally("master_chef", "q9", track=False) == ({}, 0)
+    assert not vote_tally._tallies
+
+    vote_tally.record_vote("master_chef", "q1", "A")
+    vote_tally._tallies[("master_chef", "q1")].dirty = False
+    for i in range(5):
+        vote_tally.read_tally(f"show_{i}", "q1")
+    # Numărătorile doar citite pleacă primele; cea cu voturi rămâne
+    assert len(vote_tally._tallies) == 3
+    assert ("master_chef", "q1") in vote_tally._tallies
+
+
+def test_votes_follow_the_stored_answer(monkeypatch):
+    fs = FakeFirestore()
+    monkeypatch.setattr(answer_ingest, "_written_callbacks", [])
+    answer_ingest.add_written_callback(vote_tally.record_written_vote)
+
+    def submit(buffer, user_id, answer):
+        buffer.submit("master_chef", answer_ingest.answer_doc_id("q1", user_id), {
+            "user_id": user_id, "question_id": "q1", "answer": answer, "correct": None,
+        })
+
+    # Primul răspuns rămâne în Firestore; schimbările ulterioare, la orice worker, nu se numără
+    first, second = AnswerBuffer(lambda: fs), AnswerBuffer(lambda: fs)
+    submit(first, "ana", "A")
+    assert first.flush(1) == 0
+    submit(first, "ana", "B")
+    submit(second, "ana", "B")
+    submit(second, "dan", "B")
+    assert first.flush(1) == 0 and second.flush(1) == 0
+
+    assert vote_tally.read_tally("master_chef", "q1") == ({"A": 1, "B": 1}, 2)